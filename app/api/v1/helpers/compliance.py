@@ -0,0 +1,309 @@
+"""
+DRS compliance summary package.
+Copyright (c) 2018-2020 Qualcomm Technologies, Inc.
+All rights reserved.
+Redistribution and use in source and binary forms, with or without modification, are permitted (subject to the limitations in the disclaimer below) provided that the following conditions are met:
+
+    Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+    Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+    Neither the name of Qualcomm Technologies, Inc. nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+    The origin of this software must not be misrepresented; you must not claim that you wrote the original software. If you use this software in a product, an acknowledgment is required by displaying the trademark/log as per the details provided here: https://www.qualcomm.com/documents/dirbs-logo-and-brand-guidelines
+    Altered source versions must be plainly marked as such, and must not be misrepresented as being the original software.
+    This notice may not be removed or altered from any source distribution.
+
+NO EXPRESS OR IMPLIED LICENSES TO ANY PARTY'S PATENT RIGHTS ARE GRANTED BY THIS LICENSE. THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+import csv
+import gzip
+import io
+import os
+import uuid
+from contextlib import ExitStack
+
+import numpy as np
+
+from app import app
+
+
+class ComplianceReportWriter:
+    """Incremental writer of the tab separated reviewer and user compliance reports.
+
+    Rows are written batch by batch to both reports in a single pass through buffered, optionally gzip
+    compressed streams, the reports are created with the first batch and removed if writing fails.
+    """
+
+    RESTRICTED_COLUMNS = ['block_date', 'seen_on_network', 'stolen_status']
+
+    def __init__(self, report_path, report_name, compress=None, buffer_size=None):
+        """Constructor, defaults are taken from the app configuration."""
+        self.compress = compress if compress is not None else app.config['REPORT_COMPRESS']
+        self.buffer_size = buffer_size or app.config['REPORT_BUFFER_SIZE']
+        self.report_name = report_name + '.gz' if self.compress else report_name
+        self.user_report_name = 'user_report-{}'.format(self.report_name)
+        self.paths = [os.path.join(report_path, self.report_name), os.path.join(report_path, self.user_report_name)]
+        self.files = ExitStack()
+        self.writers = None
+        self.columns = None
+        self.rows = 0
+
+    @classmethod
+    def create(cls, tracking_id, **kwargs):
+        """Return writer of new compliance reports in the upload directory of a request."""
+        report_name = 'compliant_report' + str(uuid.uuid4()) + '.tsv'
+        return cls(os.path.join(app.config['DRS_UPLOADS'], '{0}'.format(tracking_id)), report_name, **kwargs)
+
+    def __enter__(self):
+        """Enter context of the writer."""
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Close the reports, partially written reports are removed on failure."""
+        self.close()
+        if exc_type is not None:
+            for path in self.paths:
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def open(self, path):
+        """Open a report for writing, returns its csv writer."""
+        stream = self.files.enter_context(open(path, 'wb', buffering=self.buffer_size))
+        if self.compress:
+            stream = self.files.enter_context(gzip.GzipFile(fileobj=stream, mode='wb'))
+        text = self.files.enter_context(io.TextIOWrapper(stream, encoding='utf-8', newline='', write_through=True))
+        return csv.writer(text, delimiter='\t', lineterminator=os.linesep)
+
+    def write(self, columns, values):
+        """Write a batch of rows given as lists of column values, None is written as an empty cell.
+
+        Columns of the reports are fixed by the first batch.
+        """
+        count = len(values['imei'])
+        if not count:
+            return
+        if self.writers is None:
+            self.columns = [columns, [column for column in columns if column not in self.RESTRICTED_COLUMNS]]
+            self.writers = [self.open(path) for path in self.paths]
+            for writer, header in zip(self.writers, self.columns):
+                writer.writerow([''] + header)
+        for writer, header in zip(self.writers, self.columns):
+            writer.writerows([index] + [values[column][row] for column in header]
+                             for row, index in enumerate(range(self.rows, self.rows + count)))
+        self.rows += count
+
+    def close(self):
+        """Flush and close the reports."""
+        self.files.close()
+
+
+class ComplianceSummary:
+    """Columnar compliance summary of DIRBS Core imei-batch results.
+
+    Each batch of Core responses is flattened once into typed columns: tri-state flags for the
+    stolen/registration/seen statuses, booleans for the realtime checks and integer bitmasks of the met
+    blocking and informative conditions. Compliance classes and all summary counters are then computed
+    over whole columns, the same way BulkCommonResources.compliance_status evaluates a single record, and
+    the rows of the batch are handed to the report writer so that no batch is kept after it is added.
+    """
+
+    UNKNOWN, FALSE, TRUE = -1, 0, 1
+    MAX_CONDITIONS = 64
+
+    # compliance classes in order of precedence with the base reason of non compliant classes
+    CLASSES = [
+        ('Provisionally Compliant (Inactive)', None),
+        ('Compliant (Active)', None),
+        ('Compliant (Inactive)', None),
+        ('Provisionally Non compliant', 'Device is reported stolen and is pending'),
+        ('Non compliant', 'Device is reported stolen'),
+        ('Non compliant', 'Device is non compliant check blocking conditions if not found it may be invalid IMEI')
+    ]
+    STOLEN_STATUSES = ['Not Stolen', 'Stolen', 'Pending Stolen Verification']
+    SEEN_STATUSES = ['', 'False', 'True']
+    COUNTERS = ['non_compliant', 'compliant', 'compliant_active', 'provisionally_non_compliant',
+                'provisionally_compliant']
+
+    def __init__(self, writer=None, conditions=None):
+        """Constructor."""
+        self.writer = writer
+        self.conditions = conditions if conditions is not None else app.config['conditions']
+        self.verified = 0
+        self.provisional_stolen = 0
+        self.stolen = 0
+        self.seen_on_network = 0
+        self.class_counts = np.zeros(len(self.CLASSES), dtype=np.int64)
+        self.columns = None
+        self.blocking_names = {}
+        self.informative_names = {}
+        self.blocking_counts = np.zeros(self.MAX_CONDITIONS, dtype=np.int64)
+        self.informative_counts = np.zeros(self.MAX_CONDITIONS, dtype=np.int64)
+
+    def __len__(self):
+        """Number of records added to the summary."""
+        return self.verified
+
+    @classmethod
+    def tri_state(cls, value):
+        """Encode an optional flag as UNKNOWN, FALSE or TRUE."""
+        if value is None:
+            return cls.UNKNOWN
+        return cls.TRUE if value else cls.FALSE
+
+    @classmethod
+    def condition_mask(cls, conditions, names):
+        """Return bitmask of met conditions, registering unseen condition names in order of appearance."""
+        mask = 0
+        for condition in conditions or []:
+            bit = names.setdefault(condition['condition_name'], len(names))
+            if bit >= cls.MAX_CONDITIONS:
+                raise ValueError('more than {0} classification conditions'.format(cls.MAX_CONDITIONS))
+            if condition['condition_met']:
+                mask |= 1 << bit
+        return mask
+
+    def flatten(self, records):
+        """Flatten a batch of Core records into columns."""
+        columns = {name: [] for name in ['imei', 'block_date', 'no_block_date', 'stolen', 'registered', 'seen',
+                                         'gsma_not_found', 'in_registration_list', 'invalid_imei', 'blocking',
+                                         'informative']}
+        for record in records:
+            realtime = record['realtime_checks']
+            classification = record['classification_state']
+            block_date = record.get('block_date', 'N/A')
+            columns['imei'].append(record['imei_norm'])
+            columns['block_date'].append(block_date)
+            columns['no_block_date'].append(block_date is None)
+            columns['stolen'].append(self.tri_state(record['stolen_status']['provisional_only']))
+            columns['registered'].append(self.tri_state(record['registration_status']['provisional_only']))
+            columns['seen'].append(self.tri_state(realtime['ever_observed_on_network']))
+            columns['gsma_not_found'].append(bool(realtime['gsma_not_found']))
+            columns['in_registration_list'].append(bool(realtime['in_registration_list']))
+            columns['invalid_imei'].append(bool(realtime['invalid_imei']))
+            columns['blocking'].append(self.condition_mask(classification['blocking_conditions'],
+                                                           self.blocking_names))
+            columns['informative'].append(self.condition_mask(classification['informative_conditions'],
+                                                              self.informative_names))
+        types = {'imei': object, 'block_date': object, 'no_block_date': bool, 'stolen': np.int8, 'registered': np.int8, 'seen': np.int8,
+                 'gsma_not_found': bool, 'in_registration_list': bool, 'invalid_imei': bool,
+                 'blocking': np.uint64, 'informative': np.uint64}
+        return {name: np.array(values, dtype=types[name]) for name, values in columns.items()}
+
+    def classes(self, columns):
+        """Return index into CLASSES of every record of a batch."""
+        in_list = columns['in_registration_list']
+        seen = columns['seen'] == self.TRUE
+        stolen = columns['stolen']
+        compliant = ~columns['gsma_not_found'] & ~in_list & columns['no_block_date'] & ~seen & \
+            ~columns['invalid_imei']
+        return np.select([columns['registered'] == self.TRUE, in_list & seen, in_list,
+                          stolen == self.TRUE, stolen == self.FALSE, compliant],
+                         [0, 1, 2, 3, 4, 2], default=5)
+
+    @classmethod
+    def counter(cls, status):
+        """Return the summary counter a compliance status is tallied in, if any."""
+        if "Provisionally Compliant" in status:
+            return 'provisionally_compliant'
+        elif "Provisionally non compliant" in status:
+            return 'provisionally_non_compliant'
+        elif status == "Compliant (Inactive)":
+            return 'compliant'
+        elif status == "Compliant (Active)":
+            return 'compliant_active'
+        elif status == "Non compliant":
+            return 'non_compliant'
+        return None
+
+    def counters(self):
+        """Return number of records per compliance counter."""
+        counts = dict.fromkeys(self.COUNTERS, 0)
+        for index, total in enumerate(self.class_counts):
+            counter = self.counter(self.CLASSES[index][0])
+            if counter:
+                counts[counter] += int(total)
+        return counts
+
+    @staticmethod
+    def count_bits(masks, counts, bits):
+        """Add number of records meeting the condition of each of the first bits to counts."""
+        for bit in range(bits):
+            counts[bit] += np.count_nonzero((masks >> np.uint64(bit)) & np.uint64(1))
+
+    def count_per_condition(self):
+        """Return number of records meeting each blocking and informative condition."""
+        count = {name: int(self.blocking_counts[bit]) for name, bit in self.blocking_names.items()}
+        count.update({name: int(self.informative_counts[bit]) for name, bit in self.informative_names.items()})
+        return count
+
+    def reasons(self, classes, blocking):
+        """Return inactivity reasons of every record of a batch, None for compliant records."""
+        masks, inverse = np.unique(blocking, return_inverse=True)
+        keys, positions = np.unique(classes.astype(np.int64) * len(masks) + inverse.ravel(), return_inverse=True)
+        table = np.empty(len(keys), dtype=object)
+        for position, key in enumerate(keys):
+            reason = self.CLASSES[key // len(masks)][1]
+            if reason is None:
+                continue
+            mask = int(masks[key % len(masks)])
+            table[position] = str([reason] + [condition['reason'] for condition in self.conditions
+                                              if condition['name'] in self.blocking_names and
+                                              mask >> self.blocking_names[condition['name']] & 1])
+        return table[positions.ravel()]
+
+    @staticmethod
+    def columns_order(classes):
+        """Return report columns in the order the first record introduces them."""
+        if classes[0] >= 3:
+            return ['imei', 'status', 'block_date', 'inactivity_reasons', 'stolen_status', 'seen_on_network']
+        return ['imei', 'status', 'stolen_status', 'seen_on_network', 'block_date', 'inactivity_reasons']
+
+    def report(self, columns, classes):
+        """Write report rows of a batch."""
+        non_compliant = classes >= 3
+        values = {
+            'imei': columns['imei'],
+            'status': np.array([status for status, _ in self.CLASSES], dtype=object)[classes],
+            'stolen_status': np.array(self.STOLEN_STATUSES, dtype=object)[columns['stolen'] + 1],
+            'seen_on_network': np.array(self.SEEN_STATUSES, dtype=object)[columns['seen'] + 1],
+            'block_date': np.where(non_compliant, columns['block_date'], None),
+            'inactivity_reasons': self.reasons(classes, columns['blocking'])
+        }
+        if self.columns is None:
+            self.columns = self.columns_order(classes)
+        self.writer.write(self.columns, {column: value.tolist() for column, value in values.items()})
+
+    def add(self, records):
+        """Add a batch of Core records to the summary and write their report rows."""
+        columns = self.flatten(records)
+        if not len(columns['imei']):
+            return self
+        classes = self.classes(columns)
+        self.verified += len(classes)
+        self.provisional_stolen += int(np.count_nonzero(columns['stolen'] == self.TRUE))
+        self.stolen += int(np.count_nonzero(columns['stolen'] == self.FALSE))
+        self.seen_on_network += int(np.count_nonzero(columns['seen'] == self.TRUE))
+        self.class_counts += np.bincount(classes, minlength=len(self.CLASSES))
+        self.count_bits(columns['blocking'], self.blocking_counts, len(self.blocking_names))
+        self.count_bits(columns['informative'], self.informative_counts, len(self.informative_names))
+        if self.writer is not None:
+            self.report(columns, classes)
+        return self
+
+    def summary(self, tracking_id):
+        """Return summary of the request, empty if no record was added."""
+        if not self.verified:
+            return {}
+        counts = self.counters()
+        return {
+            'provisional_stolen': self.provisional_stolen,
+            'verified_imei': self.verified,
+            'count_per_condition': self.count_per_condition(),
+            'non_compliant': counts['non_compliant'],
+            'compliant': counts['compliant'],
+            'compliant_active': counts['compliant_active'],
+            'provisional_non_compliant': counts['provisionally_non_compliant'],
+            'provisional_compliant': counts['provisionally_compliant'],
+            'seen_on_network': self.seen_on_network,
+            'stolen': self.stolen,
+            'compliant_report_name': self.writer.report_name if self.writer is not None else None,
+            'id': tracking_id
+        }
@@ -0,0 +1,158 @@
+"""
+DRS DIRBS Core client package.
+Copyright (c) 2018-2020 Qualcomm Technologies, Inc.
+All rights reserved.
+Redistribution and use in source and binary forms, with or without modification, are permitted (subject to the limitations in the disclaimer below) provided that the following conditions are met:
+
+    Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+    Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+    Neither the name of Qualcomm Technologies, Inc. nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+    The origin of this software must not be misrepresented; you must not claim that you wrote the original software. If you use this software in a product, an acknowledgment is required by displaying the trademark/log as per the details provided here: https://www.qualcomm.com/documents/dirbs-logo-and-brand-guidelines
+    Altered source versions must be plainly marked as such, and must not be misrepresented as being the original software.
+    This notice may not be removed or altered from any source distribution.
+
+NO EXPRESS OR IMPLIED LICENSES TO ANY PARTY'S PATENT RIGHTS ARE GRANTED BY THIS LICENSE. THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+import heapq
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from itertools import chain
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app import app
+
+
+class CoreClientError(Exception):
+    """Indicates that IMEI batches could not be classified by DIRBS Core."""
+    pass
+
+
+class CoreBatchClient:
+    """Bounded concurrency client for DIRBS Core imei-batch API.
+
+    IMEIs are cut into contiguous batches which are identified by their offsets in the input, at most
+    max_in_flight batches are posted to Core at a time over a pooled keep-alive session. The size of the
+    next batch grows while Core answers faster than target_latency and shrinks when it slows down or fails.
+    Failed batches are retried with exponential backoff and full jitter, each offset range is dispatched
+    exactly once at a time and stored once on success so no batch is lost or duplicated.
+    """
+
+    GROWTH_FACTOR = 1.25
+    SHRINK_FACTOR = 0.5
+
+    def __init__(self, max_in_flight=None, min_batch_size=None, max_batch_size=None, target_latency=None,
+                 max_retries=None, backoff_base=None, backoff_cap=None, timeout=None):
+        """Constructor, defaults are taken from the app configuration."""
+        self.max_in_flight = max_in_flight or app.config['CORE_MAX_IN_FLIGHT']
+        self.min_batch_size = min_batch_size or app.config['CORE_MIN_BATCH_SIZE']
+        self.max_batch_size = max_batch_size or app.config['CORE_MAX_BATCH_SIZE']
+        self.target_latency = target_latency or app.config['CORE_TARGET_LATENCY']
+        self.max_retries = max_retries if max_retries is not None else app.config['CORE_MAX_RETRIES']
+        self.backoff_base = backoff_base or app.config['CORE_BACKOFF_BASE']
+        self.backoff_cap = backoff_cap or app.config['CORE_BACKOFF_CAP']
+        self.timeout = timeout or app.config['CORE_TIMEOUT']
+        self.batch_size = self.max_batch_size
+        self.url = '{0}/imei-batch'.format(app.config['CORE_BASE_URL'] + app.config['API_VERSION'])
+        self.session = self.create_session()
+
+    def create_session(self):
+        """Create http session with one connection per in flight request to Core."""
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_in_flight, max_retries=0)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def close(self):
+        """Close pooled connections of the http session."""
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def fetch(self, imeis):
+        """Classify a single batch of IMEIs, returns results and latency of the call."""
+        batch_req = {
+            "imeis": imeis,
+            "include_registration_status": True,
+            "include_stolen_status": True
+        }
+        started = time.monotonic()
+        response = self.session.post(self.url, json=batch_req, timeout=self.timeout)
+        latency = time.monotonic() - started
+        if response.status_code != 200:
+            raise CoreClientError('imei batch failed with status {0}'.format(response.status_code))
+        results = response.json().get('results', [])
+        if len(results) != len(imeis):
+            raise CoreClientError('imei batch returned {0} results for {1} imeis'.format(len(results), len(imeis)))
+        return results, latency
+
+    def adapt(self, latency=None):
+        """Adjust size of the next batches to the observed latency, a failure counts as slow."""
+        if latency is not None and latency <= self.target_latency:
+            batch_size = int(self.batch_size * self.GROWTH_FACTOR)
+        else:
+            batch_size = int(self.batch_size * self.SHRINK_FACTOR)
+        self.batch_size = max(self.min_batch_size, min(self.max_batch_size, batch_size))
+
+    def backoff(self, attempt):
+        """Return delay in seconds before retrying a batch, exponential with full jitter."""
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+    def classify(self, imeis):
+        """Classify all the IMEIs, returns Core results in the same order as the input."""
+        return list(chain.from_iterable(self.iter_classify(imeis)))
+
+    def iter_classify(self, imeis):
+        """Classify all the IMEIs, yields Core results batch by batch in the same order as the input.
+
+        Batches answered out of order are held until the preceding ones are yielded, no new batch is
+        started while max_in_flight batches are held so the results in memory stay bounded.
+        """
+        pending = {}
+        retries = []
+        in_flight = {}
+        cursor = 0
+        position = 0
+        total = len(imeis)
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as executor:
+            while cursor < total or retries or in_flight:
+                now = time.monotonic()
+                while len(in_flight) < self.max_in_flight:
+                    if retries and retries[0][0] <= now:
+                        _, start, end, attempt = heapq.heappop(retries)
+                    elif cursor < total and len(pending) < self.max_in_flight:
+                        start, end, attempt = cursor, min(total, cursor + self.batch_size), 0
+                        cursor = end
+                    else:
+                        break
+                    in_flight[executor.submit(self.fetch, imeis[start:end])] = (start, end, attempt)
+
+                timeout = max(0, retries[0][0] - now) if retries else None
+                if not in_flight:
+                    time.sleep(timeout)
+                    continue
+                done, _ = wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    start, end, attempt = in_flight.pop(future)
+                    try:
+                        records, latency = future.result()
+                    except Exception as e:
+                        self.adapt()
+                        if attempt >= self.max_retries:
+                            raise CoreClientError('imei batch {0}-{1} failed after {2} retries'.format(
+                                start, end, attempt)) from e
+                        app.logger.warning('imei batch {0}-{1} failed, retrying: {2}'.format(start, end, e))
+                        heapq.heappush(retries, (time.monotonic() + self.backoff(attempt), start, end, attempt + 1))
+                    else:
+                        self.adapt(latency)
+                        pending[start] = (end, records)
+                while position in pending:
+                    position, records = pending.pop(position)
+                    yield records
@@ -0,0 +1,142 @@
+"""
+DRS Parsed File Cache package.
+Copyright (c) 2018-2020 Qualcomm Technologies, Inc.
+All rights reserved.
+Redistribution and use in source and binary forms, with or without modification, are permitted (subject to the limitations in the disclaimer below) provided that the following conditions are met:
+
+    Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+    Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+    Neither the name of Qualcomm Technologies, Inc. nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+    The origin of this software must not be misrepresented; you must not claim that you wrote the original software. If you use this software in a product, an acknowledgment is required by displaying the trademark/log as per the details provided here: https://www.qualcomm.com/documents/dirbs-logo-and-brand-guidelines
+    Altered source versions must be plainly marked as such, and must not be misrepresented as being the original software.
+    This notice may not be removed or altered from any source distribution.
+
+NO EXPRESS OR IMPLIED LICENSES TO ANY PARTY'S PATENT RIGHTS ARE GRANTED BY THIS LICENSE. THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+import os
+import glob
+import hashlib
+from collections import OrderedDict
+from collections.abc import Sequence
+
+import numpy as np
+
+
+class FileCache:
+    """Class for persisting validated registration files as compact binary artifacts.
+
+    Each IMEI is stored as a single uint64 of the form (length * 10^16 + numeric value) so that
+    leading zeros and the 14/15/16 digit length survive the round trip. The resulting
+    device x imei_per_device matrix is saved next to the upload as <sha256-of-file>.npy and
+    memory-mapped on later reads instead of re-parsing and re-validating the file.
+    """
+
+    LENGTH_BASE = 10 ** 16
+    EXTENSION = '.npy'
+    MAX_DIGESTS = 1024
+
+    # (file path, mtime, size) -> SHA-256 of the file, most recently used last
+    digests = OrderedDict()
+
+    @staticmethod
+    def file_hash(file_path):
+        """Method to compute SHA-256 of a file without loading it into memory."""
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as input_file:
+            for block in iter(lambda: input_file.read(1024 * 1024), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    @classmethod
+    def cached_file_hash(cls, file_path):
+        """Method to return SHA-256 of a file, computed once per modification of the file."""
+        stat = os.stat(file_path)
+        key = (os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size)
+        digest = cls.digests.get(key)
+        if digest is None:
+            digest = cls.file_hash(file_path)
+            cls.digests[key] = digest
+            while len(cls.digests) > cls.MAX_DIGESTS:
+                cls.digests.popitem(last=False)
+        else:
+            cls.digests.move_to_end(key)
+        return digest
+
+    @classmethod
+    def artifact_path(cls, upload_path, file_hash):
+        """Method to return the artifact path for a file hash."""
+        return os.path.join(upload_path, '{0}{1}'.format(file_hash, cls.EXTENSION))
+
+    @classmethod
+    def encode(cls, devices):
+        """Method to encode list of device imeis into uint64 matrix."""
+        matrix = np.empty((len(devices), len(devices[0]) if devices else 0), dtype=np.uint64)
+        for index, device_imeis in enumerate(devices):
+            matrix[index] = [len(imei) * cls.LENGTH_BASE + int(imei) for imei in device_imeis]
+        return matrix
+
+    @classmethod
+    def decode(cls, matrix):
+        """Method to decode uint64 matrix back to list of device imeis."""
+        lengths = (matrix // np.uint64(cls.LENGTH_BASE)).tolist()
+        values = (matrix % np.uint64(cls.LENGTH_BASE)).tolist()
+        return [[str(value).zfill(length) for value, length in zip(row_values, row_lengths)]
+                for row_values, row_lengths in zip(values, lengths)]
+
+    @classmethod
+    def store(cls, file_path, devices):
+        """Method to store the artifact of a validated file, removes stale artifacts of the request."""
+        upload_path = os.path.dirname(file_path)
+        artifact = cls.artifact_path(upload_path, cls.cached_file_hash(file_path))
+        for stale in glob.glob(os.path.join(upload_path, '*{0}'.format(cls.EXTENSION))):
+            if stale != artifact:
+                os.remove(stale)
+        np.save(artifact, cls.encode(devices), allow_pickle=False)
+        return artifact
+
+    @classmethod
+    def load(cls, file_path, shape=None):
+        """Method to memory-map the artifact of a file, returns None if missing or shape is not as expected."""
+        if not os.path.isfile(file_path):
+            return None
+        artifact = cls.artifact_path(os.path.dirname(file_path), cls.cached_file_hash(file_path))
+        if not os.path.isfile(artifact):
+            return None
+        matrix = np.load(artifact, mmap_mode='r', allow_pickle=False)
+        if shape and tuple(matrix.shape) != tuple(shape):
+            return None
+        return matrix
+
+
+class DeviceImeis(Sequence):
+    """Read-only sequence of device imeis backed by an encoded (memory-mapped) FileCache matrix.
+
+    Rows are decoded only when accessed, iteration decodes BATCH_SIZE devices at a time so that
+    consumers streaming the devices (COPY, TAC grouping, Core batching) never hold the whole file
+    as Python strings.
+    """
+
+    BATCH_SIZE = 10000
+
+    def __init__(self, matrix):
+        """Constructor, expects device x imei_per_device uint64 matrix."""
+        self.matrix = matrix
+
+    def __len__(self):
+        """Return number of devices."""
+        return self.matrix.shape[0]
+
+    def __getitem__(self, index):
+        """Return imeis of a device, or a view over a slice of devices."""
+        if isinstance(index, slice):
+            return DeviceImeis(self.matrix[index])
+        return FileCache.decode(self.matrix[index][np.newaxis])[0]
+
+    def __iter__(self):
+        """Iterate over imeis of devices, decoding a batch of devices at a time."""
+        for start in range(0, len(self), self.BATCH_SIZE):
+            yield from FileCache.decode(self.matrix[start:start + self.BATCH_SIZE])
+
+    def tolist(self):
+        """Return imeis of all the devices as list."""
+        return list(self)
@@ -13,174 +13,385 @@ Redistribution and use in source and binary forms, with or without modification,
 
 NO EXPRESS OR IMPLIED LICENSES TO ANY PARTY'S PATENT RIGHTS ARE GRANTED BY THIS LICENSE. THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 """
-import pandas as pd
+from collections.abc import Mapping
+
+import numpy as np
 from marshmallow import ValidationError
 from flask_babel import lazy_gettext as _
 
 
-class Processor:
-    """Class for processing input files for Device Registration."""
+class ImeiValidator:
+    """Vectorized validation engine for IMEIs.
 
-    def __init__(self, file_path, args):
-        """Constructor."""
-        self.file_path = file_path
-        self.device_count = int(args.get('device_count'))
-        self.data = Processor.extract_data(file_path)
-        self.series_data = self.transform_to_series()
-        self.imei_per_device = int(args.get('imei_per_device')) if 'imei_per_device' in args else \
-            int(Processor.extract_imei_per_device(self.data))
+    IMEIs are converted once into a fixed-width byte array (S17) which is laid out column wise, one array
+    of character codes per position, so that length, digit-only, Luhn and normalization are computed as
+    element-wise operations over all IMEIs. Duplicates are found by sorting the normalized 14 digit IMEIs
+    as integers. The width is one more than the maximum IMEI length so that over-long values are still
+    reported as invalid after truncation.
+    """
 
-    @staticmethod
-    def extract_imei_per_device(data):
-        """Method to extract IMEIs per device from file object."""
-        return len(data.columns)
+    MIN_LENGTH = 14
+    MAX_LENGTH = 16
+    WIDTH = 17
+
+    def __init__(self, columns, imeis=None):
+        """Constructor, expects WIDTH x n matrix of character codes."""
+        self.columns = columns
+        self.imeis = imeis
+        self.buffer = self.starts = self.token_lengths = None
+        self.lengths = np.zeros(columns.shape[1], dtype=np.int64)
+        self.digit_only = self.lengths == 0
+        for column in self.columns:
+            self.lengths += column != 0
+            self.digit_only &= (column - ord('0') < 10) | (column == 0)
+        self.digit_only &= self.lengths > 0
 
     @classmethod
-    def read_txt_file(cls, file_path):
-        """Method to read and load text file into data frame."""
-        data = pd.read_csv(file_path, skip_blank_lines=True, dtype=str, header=None).dropna(axis=1, how='all')
-        data = pd.DataFrame(data)
-        return data
+    def from_imeis(cls, imeis):
+        """Create validator from a list of IMEI strings."""
+        try:
+            data = np.asarray(imeis, dtype='S{0}'.format(cls.WIDTH))
+        except UnicodeEncodeError:
+            data = np.asarray([imei.encode('ascii', 'replace') for imei in imeis], dtype='S{0}'.format(cls.WIDTH))
+        return cls(np.ascontiguousarray(data.view(np.uint8).reshape(-1, cls.WIDTH).T), imeis)
 
     @classmethod
-    def read_tsv_file(cls, file_path):
-        """Method to read and load TSV file into data frame."""
-        data = pd.read_csv(file_path, skip_blank_lines=True, error_bad_lines=False, warn_bad_lines=True, dtype=str,
-                           delim_whitespace=True, header=None).dropna(axis=1, how='all')
-        data = pd.DataFrame(data)
-        return data
+    def from_buffer(cls, buffer, starts, lengths):
+        """Create validator from tokens of a bytes buffer, given their start offsets and lengths."""
+        data = np.frombuffer(buffer, dtype=np.uint8)
+        columns = np.zeros((cls.WIDTH, len(starts)), dtype=np.uint8)
+        for position in range(cls.WIDTH):
+            present = lengths > position
+            columns[position][present] = data[starts[present] + position]
+        validator = cls(columns)
+        validator.buffer = buffer
+        validator.starts = starts
+        validator.token_lengths = lengths
+        return validator
+
+    def imei(self, index):
+        """Return IMEI at an index as string."""
+        if self.imeis is not None:
+            return self.imeis[index]
+        start = self.starts[index]
+        return self.buffer[start:start + self.token_lengths[index]].decode('utf-8', 'replace')
+
+    def valid_length(self):
+        """Return mask of IMEIs with valid length."""
+        return (self.lengths >= self.MIN_LENGTH) & (self.lengths <= self.MAX_LENGTH)
+
+    def normalizable(self):
+        """Return mask of IMEIs which can be normalized to 14 digit integers."""
+        return self.digit_only & (self.lengths >= self.MIN_LENGTH)
+
+    def digit(self, position):
+        """Return digit values at a position, only meaningful for digit-only IMEIs."""
+        return (self.columns[position] - ord('0')) % 10
+
+    def luhn_valid(self):
+        """Return mask of IMEIs with a correct check digit, only 15 digit IMEIs carry one."""
+        total = np.zeros(len(self.lengths), dtype=np.uint8)
+        for position in range(self.MIN_LENGTH):
+            digit = self.digit(position)
+            if position % 2:
+                digit = digit * 2
+                digit -= 9 * (digit > 9).astype(np.uint8)
+            total += digit
+        check_digit = (10 - total % 10) % 10
+        has_check_digit = self.digit_only & (self.lengths == 15)
+        return ~has_check_digit | (check_digit == self.digit(self.MIN_LENGTH))
+
+    def normalized(self):
+        """Return normalized 14 digit IMEIs as integers for the normalizable IMEIs along with the mask."""
+        mask = self.normalizable()
+        values = np.zeros(np.count_nonzero(mask), dtype=np.int64)
+        for position in range(self.MIN_LENGTH):
+            values *= 10
+            values += self.columns[position][mask]
+            values -= ord('0')
+        return values, mask
+
+    def invalid_imeis(self):
+        """Return list of IMEIs with invalid length."""
+        return [self.imei(i) for i in np.flatnonzero(~self.valid_length())]
+
+    def invalid_format(self):
+        """Return list of IMEIs which are not digit only."""
+        return [self.imei(i) for i in np.flatnonzero(~self.digit_only)]
+
+    def duplicate_imeis(self):
+        """Return list of duplicate IMEIs, every occurrence after the first is reported."""
+        values, mask = self.normalized()
+        duplicates = []
+        if self.has_duplicates(np.sort(values)):
+            positions = np.flatnonzero(mask)
+            order = np.argsort(values, kind='stable')
+            sorted_values = values[order]
+            repeated = np.zeros(len(values), dtype=bool)
+            repeated[1:] = sorted_values[1:] == sorted_values[:-1]
+            duplicates = positions[order[repeated]].tolist()
+
+        seen = set()
+        for i in np.flatnonzero(~mask):
+            imei = self.imei(i)
+            if imei in seen:
+                duplicates.append(i)
+            seen.add(imei)
+        return [self.imei(i) for i in sorted(duplicates)]
+
+    @staticmethod
+    def has_duplicates(sorted_values):
+        """Check if an already sorted array has any repeated value."""
+        return bool(len(sorted_values) > 1 and (sorted_values[1:] == sorted_values[:-1]).any())
+
+
+class TacGroups(Mapping):
+    """Read only TAC to IMEIs mapping backed by a single contiguous array.
+
+    IMEIs are grouped with one stable sort on the TAC (first 8 digits), TACs keep the order of their
+    first appearance in the file and IMEIs keep the file order inside each TAC. Group boundaries are
+    kept as offsets into the array, so a group lookup is a slice and flattening is free.
+    """
+
+    TAC_LENGTH = 8
+
+    def __init__(self, imeis, tacs, offsets):
+        """Constructor, expects grouped imeis, unique tacs and len(tacs) + 1 offsets."""
+        self.imeis = imeis
+        self.tacs = tacs
+        self.offsets = offsets
+        self.index = {tac: position for position, tac in enumerate(tacs.tolist())}
 
     @classmethod
-    def extract_data(cls, file_path):
-        """Method to read and return the correct file type."""
-        if file_path.endswith('.txt'):
-            return cls.read_txt_file(file_path)
-        else:
-            return cls.read_tsv_file(file_path)
+    def from_imeis(cls, imeis):
+        """Group a sequence of IMEIs by TAC in a single pass."""
+        imeis = np.asarray(imeis, dtype=str)
+        if imeis.size == 0:
+            return cls(imeis, np.array([], dtype=str), np.zeros(1, dtype=np.int64))
+        tacs = imeis.astype('U{0}'.format(cls.TAC_LENGTH))
+        unique_tacs, first_index, inverse = np.unique(tacs, return_index=True, return_inverse=True)
+        appearance = np.argsort(first_index, kind='stable')
+        rank = np.empty_like(appearance)
+        rank[appearance] = np.arange(appearance.size)
+        keys = rank[inverse.ravel()]
+        order = np.argsort(keys, kind='stable')
+        offsets = np.zeros(appearance.size + 1, dtype=np.int64)
+        np.cumsum(np.bincount(keys, minlength=appearance.size), out=offsets[1:])
+        return cls(imeis[order], unique_tacs[appearance], offsets)
 
-    def validate_imei_per_device(self):
-        """Method to validate if IMEI per device count is matched to the IMEIs in file."""
-        if len(self.data.columns) == self.imei_per_device:
-            return True
-        else:
-            return False
+    def group(self, position):
+        """Return array slice of the IMEIs of a group."""
+        return self.imeis[self.offsets[position]:self.offsets[position + 1]]
 
-    def validate_device_count(self):
-        """Method to validate if Device count is matched to devices in file."""
-        if len(self.data.index) == self.device_count:
-            return True
-        else:
-            return False
+    def subset(self, tacs):
+        """Return new groups for the given tacs only, unknown tacs are skipped."""
+        positions = []
+        for tac in tacs:
+            position = self.index.get(tac)
+            if position is not None and position not in positions:
+                positions.append(position)
+        groups = [self.group(position) for position in positions]
+        offsets = np.zeros(len(groups) + 1, dtype=np.int64)
+        np.cumsum([len(group) for group in groups], out=offsets[1:])
+        imeis = np.concatenate(groups) if groups else self.imeis[:0]
+        return TacGroups(imeis, self.tacs[positions], offsets)
 
-    def check_rows_limit(self):
-        """Method to check the rows limit in data frame."""
-        if len(self.data.index) > 10000000:
-            return False
-        else:
-            return True
+    def flatten(self):
+        """Return list of all the IMEIs grouped by TAC."""
+        return self.imeis.tolist()
+
+    def __getitem__(self, tac):
+        """Return list of IMEIs of a TAC."""
+        return self.group(self.index[tac]).tolist()
+
+    def __contains__(self, tac):
+        """Check if the TAC exists in groups."""
+        return tac in self.index
 
-    def validate_missing_imei(self):
-        """Method to validate missing IMEIs in file."""
-        if self.data.isnull().any(axis=1).sum() > 0:
-            return True
+    def __iter__(self):
+        """Iterate over TACs in order."""
+        return iter(self.index)
+
+    def __len__(self):
+        """Return number of TACs."""
+        return len(self.index)
+
+
+class StreamProcessor:
+    """Class for validating input files in bounded chunks instead of loading them as a whole.
+
+    Whitespace separated files are read BLOCK_SIZE bytes at a time and tokenized as byte arrays, comma
+    separated (.txt) files CHUNK_SIZE lines at a time. Each part is checked for length, format, column
+    count and device count using ImeiValidator as it arrives, only the normalized (14 digit) IMEIs are
+    kept as a compact integer array for duplicate detection, so memory usage stays flat regardless of
+    the size of the file.
+    """
+
+    CHUNK_SIZE = 100000
+    BLOCK_SIZE = 8 * 1024 * 1024
+    ROWS_LIMIT = 10000000
+
+    WHITESPACE = np.zeros(256, dtype=bool)
+    WHITESPACE[[ord(char) for char in ' \t\n\r\x0b\x0c']] = True
+
+    def __init__(self, file_path, args, chunk_size=None):
+        """Constructor."""
+        self.file_path = file_path
+        self.device_count = int(args.get('device_count'))
+        self.imei_per_device = int(args.get('imei_per_device')) if 'imei_per_device' in args else None
+        self.chunk_size = chunk_size or self.CHUNK_SIZE
+        self.separator = ',' if file_path.endswith('.txt') else None
+
+    def split_row(self, line):
+        """Method to split a single line of the file into IMEIs, returns None for blank lines."""
+        if self.separator:
+            tokens = [token.strip() for token in line.rstrip('\r\n').split(self.separator)]
+            while tokens and not tokens[-1]:
+                tokens.pop()
         else:
-            return False
-
-    def find_null_locations(self):
-        """Method to validate and find null locations in file."""
-        null_values = (data.loc[(self.data['null values'] == 1)].drop(columns=['null values']))
-        return null_values
-
-    def transform_to_series(self):
-        """Method to transform file data to pandas series."""
-        series_data = pd.Series(self.data.values.ravel('F')).dropna()
-        series_data = pd.DataFrame(series_data)
-        series_data = series_data.rename(columns={0: "IMEIs"}).dropna()
-        return series_data
-
-    def get_invalid_imeis(self):
-        """Method to find invalid IMEIs in file data."""
-        self.series_data['length'] = self.series_data['IMEIs'].str.len()
-        self.series_data['valid'] = (self.series_data['length'] >= 14) & (self.series_data['length'] <= 16)
-        series_data = self.series_data.loc[(self.series_data['valid']==False)].drop(columns=['valid', 'length'])
-        series_data = series_data.to_dict(orient='list')
-        return series_data["IMEIs"]
-
-    def check_imei_format(self):
-        """Method to validate IMEI format."""
-        self.series_data['alpha_num'] = self.series_data['IMEIs'].str.isdigit()
-        return self.series_data.loc[(self.series_data['alpha_num']==False)]
-
-    def get_duplicate_imeis(self):
-        """Method to find duplicate IMEIs in file."""
-        self.series_data['Duplication'] = self.series_data.duplicated(keep='first')
-        duplication = self.series_data.loc[(self.series_data['Duplication'] == True)]\
-            .drop(columns=['Duplication', 'length', 'valid'])
-        return duplication.to_dict(orient='list')
-
-    def get_unique_tags(self):
-        """Method to extract unique TACs from file."""
-        self.series_data['Tacs'] = self.series_data['IMEIs'].str[0:8].astype(str)
-        unique_tacs = self.series_data['IMEIs Tac'].unique()
-        return unique_tacs
+            tokens = line.split()
+        return tokens or None
 
-    def transform_dreg_data(self):
-        """Method to transform data to dictionaries."""
-        response_dict = {}
-        data = self.data.rename(columns={0: "IMEIs"}).dropna()
-        data['IMEIs Tac'] = data['IMEIs'].str[0:8].astype(str)
-        for i in data['IMEIs Tac'].unique():
-            response_dict[i] = [data['IMEIs'][j] for j in data[data['IMEIs Tac'] == i].index]
-        return response_dict
+    def read_chunks(self):
+        """Generator method to read the file in chunks of rows, blank lines are skipped."""
+        with open(self.file_path, 'r') as input_file:
+            chunk = []
+            for line in input_file:
+                row = self.split_row(line)
+                if row is None:
+                    continue
+                chunk.append(row)
+                if len(chunk) == self.chunk_size:
+                    yield chunk
+                    chunk = []
+            if chunk:
+                yield chunk
 
-    def transform_data(self, type):
-        """Method to return transformed data."""
-        if type == 'registration':
-            return self.data.values.tolist()
+    def read_blocks(self):
+        """Generator method to read the file in blocks of complete lines."""
+        with open(self.file_path, 'rb') as input_file:
+            remainder = b''
+            for block in iter(lambda: input_file.read(self.BLOCK_SIZE), b''):
+                block = remainder + block
+                cut = block.rfind(b'\n') + 1
+                remainder = block[cut:]
+                if cut:
+                    yield block[:cut]
+            if remainder:
+                yield remainder
+
+    def tokenize(self, block):
+        """Method to find whitespace separated tokens of a block, returns starts, lengths and tokens per row."""
+        data = np.frombuffer(block, dtype=np.uint8)
+        separator = np.concatenate(([True], self.WHITESPACE[data], [True])).view(np.int8)
+        boundaries = np.diff(separator)
+        starts = np.flatnonzero(boundaries == -1)
+        lengths = np.flatnonzero(boundaries == 1) - starts
+        rows = np.searchsorted(np.flatnonzero(data == ord('\n')), starts)
+        columns = np.bincount(rows)
+        return starts, lengths, columns[columns > 0]
+
+    def read_validators(self):
+        """Generator method to read the file, yields validator, tokens per row and missing flag for each part."""
+        if self.separator:
+            for chunk in self.read_chunks():
+                columns = np.array([len(row) for row in chunk])
+                imeis = [imei for row in chunk for imei in row if imei]
+                yield ImeiValidator.from_imeis(imeis), columns, len(imeis) != columns.sum()
         else:
-            return self.transform_dreg_data()
+            for block in self.read_blocks():
+                starts, lengths, columns = self.tokenize(block)
+                yield ImeiValidator.from_buffer(block, starts, lengths), columns, False
+
+    def scan(self):
+        """Method to scan the whole file once and collect validation stats."""
+        stats = {
+            'rows': 0,
+            'min_columns': None,
+            'max_columns': 0,
+            'missing': False,
+            'invalid': False,
+            'invalid_format': False,
+            'duplicate': False
+        }
+        normalized = []
+        seen = set()
+        for validator, columns, missing in self.read_validators():
+            if len(columns) == 0:
+                continue
+            stats['rows'] += len(columns)
+            stats['max_columns'] = max(stats['max_columns'], int(columns.max()))
+            stats['min_columns'] = int(columns.min()) if stats['min_columns'] is None \
+                else min(stats['min_columns'], int(columns.min()))
+            stats['missing'] = stats['missing'] or missing
+            stats['invalid'] = stats['invalid'] or not validator.valid_length().all()
+            stats['invalid_format'] = stats['invalid_format'] or not validator.digit_only.all()
+            values, mask = validator.normalized()
+            normalized.append(values)
+            for i in np.flatnonzero(~mask):
+                imei = validator.imei(i)
+                stats['duplicate'] = stats['duplicate'] or imei in seen
+                seen.add(imei)
+        if normalized:
+            values = np.concatenate(normalized)
+            del normalized
+            values.sort()
+            stats['duplicate'] = stats['duplicate'] or ImeiValidator.has_duplicates(values)
+        if stats['min_columns'] is not None and stats['min_columns'] < stats['max_columns']:
+            stats['missing'] = True
+        return stats
 
     def validate_registration(self):
         """Method to validate registration request data."""
         errors = {}
-        invalid_imeis = self.get_invalid_imeis()
-        duplicate_imeis = self.get_duplicate_imeis()
-        missing_imeis = self.validate_missing_imei()
-        rows_limit = self.check_rows_limit()
-        invalid_format = self.check_imei_format()
-        # If user needs the list of imeis on the frontend we can show it.
-        if not self.validate_imei_per_device():
+        stats = self.scan()
+        if self.imei_per_device is not None and stats['max_columns'] != self.imei_per_device:
             errors['imei_per_device'] = [_("IMEIs per device count in file is not same as input.")]
-        if not self.validate_device_count():
+        if stats['rows'] != self.device_count:
             errors['device_count'] = [_("Device count in file is not same as input")]
-        if len(invalid_imeis) > 0:
+        if stats['invalid']:
             errors['invalid_imeis'] = [_("Invalid IMEIs in the input file")]
-        if len(duplicate_imeis['IMEIs']) > 0:
+        if stats['duplicate']:
             errors['duplicate_imeis'] = [_("Duplicate IMEIs in the input file")]
-        if missing_imeis:
+        if stats['missing']:
             errors['missing_imeis'] = [_("Some IMEIs are missing in the columns")]
-        if not rows_limit:
+        if stats['rows'] > self.ROWS_LIMIT:
             errors['limit'] = [_("Rows limit is 10000000 for single request")]
-        if len(invalid_format) > 0:
+        if stats['invalid_format']:
             errors['invalid_format'] = [_("Invalid IMEIs Format in input file")]
         return errors
 
     def validate_de_registration(self):
         """Method to validate de registration data."""
         errors = {}
-        invalid_imeis = self.get_invalid_imeis()
-        duplicate_imeis = self.get_duplicate_imeis()
-        invalid_format = self.check_imei_format()
-        if not self.validate_device_count():
+        stats = self.scan()
+        if stats['rows'] != self.device_count:
             errors['device_count'] = [_("Device count in file is not same as input")]
-        if len(invalid_imeis) > 0:
+        if stats['invalid']:
             errors['invalid_imeis'] = [_("Invalid IMEIs in the input file")]
-        if len(duplicate_imeis['IMEIs']) > 0:
+        if stats['duplicate']:
             errors['duplicate_imeis'] = [_("Duplicate IMEIs in the input file")]
-        if len(invalid_format) > 0:
+        if stats['invalid_format']:
             errors['invalid_format'] = [_("Invalid IMEIs Format in input file")]
         return errors
 
+    def transform_dreg_data(self):
+        """Method to transform data to TAC to IMEIs mapping."""
+        imeis = []
+        for chunk in self.read_chunks():
+            imeis.extend(row[0] for row in chunk)
+        return TacGroups.from_imeis(imeis)
+
+    def transform_data(self, type):
+        """Method to return transformed data."""
+        if type == 'registration':
+            data = []
+            for chunk in self.read_chunks():
+                data.extend(chunk)
+            return data
+        else:
+            return self.transform_dreg_data()
+
     def process(self, request_type):
         """Method to start the main process."""
         if request_type == 'registration':
@@ -189,4 +400,3 @@ class Processor:
             errors = self.validate_de_registration()
         response = errors if errors else self.transform_data(request_type)
         return response
-
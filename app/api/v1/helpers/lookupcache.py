@@ -0,0 +1,85 @@
+"""
+DRS Lookup Cache package.
+Copyright (c) 2018-2020 Qualcomm Technologies, Inc.
+All rights reserved.
+Redistribution and use in source and binary forms, with or without modification, are permitted (subject to the limitations in the disclaimer below) provided that the following conditions are met:
+
+    Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+    Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+    Neither the name of Qualcomm Technologies, Inc. nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+    The origin of this software must not be misrepresented; you must not claim that you wrote the original software. If you use this software in a product, an acknowledgment is required by displaying the trademark/log as per the details provided here: https://www.qualcomm.com/documents/dirbs-logo-and-brand-guidelines
+    Altered source versions must be plainly marked as such, and must not be misrepresented as being the original software.
+    This notice may not be removed or altered from any source distribution.
+
+NO EXPRESS OR IMPLIED LICENSES TO ANY PARTY'S PATENT RIGHTS ARE GRANTED BY THIS LICENSE. THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+import time
+from collections import namedtuple
+
+from app import db
+from app.api.v1.models.lookupversion import LookupVersion
+
+
+class LookupCache:
+    """Per process, read-through cache of small reference tables (status, device types, technologies, documents).
+
+    Rows of a table are loaded once as plain tuples along with the version of the cache they were loaded in.
+    The version is kept in the lookupversion table and checked at most every CHECK_INTERVAL seconds, seeding
+    the tables invalidates the cache by moving to the next version so rows are loaded again on next use in
+    every process (API and Celery workers), not only in the one which seeded them.
+    """
+
+    CHECK_INTERVAL = 5
+
+    version = 0
+    checked_at = None
+    tables = {}
+
+    @classmethod
+    def invalidate(cls):
+        """Invalidate rows of all the cached tables, in this process right away and in others on next check."""
+        cls.version = LookupVersion.bump()
+        cls.checked_at = time.monotonic()
+        cls.tables = {}
+
+    @classmethod
+    def current_version(cls):
+        """Return version of the cache, re-read from the database once CHECK_INTERVAL has passed."""
+        now = time.monotonic()
+        if cls.checked_at is None or now - cls.checked_at >= cls.CHECK_INTERVAL:
+            cls.version = LookupVersion.get()
+            cls.checked_at = now
+        return cls.version
+
+    @classmethod
+    def load(cls, model):
+        """Return cached rows and indexes of the table of a model, loads the table when not cached."""
+        name = model.__tablename__
+        version = cls.current_version()
+        entry = cls.tables.get(name)
+        if entry is None or entry['version'] != version:
+            columns = [column.name for column in model.__table__.columns]
+            row_type = namedtuple('{0}Row'.format(model.__name__), columns)
+            query = model.__table__.select().order_by(model.__table__.c.id)
+            rows = [row_type(*[row[column] for column in columns]) for row in db.session.execute(query)]
+            entry = {'version': version, 'rows': rows, 'indexes': {}}
+            cls.tables[name] = entry
+        return entry
+
+    @classmethod
+    def rows(cls, model):
+        """Return all rows of the table of a model."""
+        return cls.load(model)['rows']
+
+    @classmethod
+    def lookup(cls, model, column, value):
+        """Return the first row of the table of a model having the value in the column, None if there is none."""
+        entry = cls.load(model)
+        index = entry['indexes'].get(column)
+        if index is None:
+            index = {}
+            for row in entry['rows']:
+                index.setdefault(getattr(row, column), row)
+            entry['indexes'][column] = index
+        return index.get(value)
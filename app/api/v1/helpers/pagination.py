@@ -14,6 +14,10 @@ Redistribution and use in source and binary forms, with or without modification,
 NO EXPRESS OR IMPLIED LICENSES TO ANY PARTY'S PATENT RIGHTS ARE GRANTED BY THIS LICENSE. THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 """
 
+from sqlalchemy import text
+
+from app import db
+
 
 class Pagination:
     """Class for data pagination."""
@@ -49,3 +53,34 @@ class Pagination:
             # finally extract result according to bounds
             obj['requests'] = model_data[(start - 1):(start - 1 + limit)]
             return obj
+
+    @staticmethod
+    def get_paginated_query(query, url, start, limit, order_by, params=None):
+        """Execute a query for the requested page only and transform it like get_paginated_list.
+
+        Rows are counted by a separate count query and the page is fetched with LIMIT/OFFSET, so
+        only rows of the page are read. Requests are not included when start is out of bounds.
+        """
+        params = dict(params or {})
+        count = db.session.execute(text('SELECT count(*) FROM ({0}) AS paginated'.format(query)), params).scalar()
+
+        obj = {'start': start, 'limit': limit, 'count': count}
+        if start < 1 or start > count:
+            return obj
+
+        if start == 1:
+            obj['previous'] = ''
+        else:
+            start_copy = max(1, start - limit)
+            limit_copy = start - 1
+            obj['previous'] = url + '?start=%d&limit=%d' % (start_copy, limit_copy)
+        if start + limit > count:
+            obj['next'] = ''
+        else:
+            start_copy = start + limit
+            obj['next'] = url + '?start=%d&limit=%d' % (start_copy, limit)
+        params.update({'page_limit': limit, 'page_offset': start - 1})
+        rows = db.session.execute(text('{0} ORDER BY {1} LIMIT :page_limit OFFSET :page_offset'.format(
+            query, order_by)), params)
+        obj['requests'] = [dict(row.items()) for row in rows]
+        return obj
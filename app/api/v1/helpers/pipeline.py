@@ -0,0 +1,278 @@
+"""
+DRS Request Pipeline package.
+Copyright (c) 2018-2020 Qualcomm Technologies, Inc.
+All rights reserved.
+Redistribution and use in source and binary forms, with or without modification, are permitted (subject to the limitations in the disclaimer below) provided that the following conditions are met:
+
+    Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+    Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+    Neither the name of Qualcomm Technologies, Inc. nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+    The origin of this software must not be misrepresented; you must not claim that you wrote the original software. If you use this software in a product, an acknowledgment is required by displaying the trademark/log as per the details provided here: https://www.qualcomm.com/documents/dirbs-logo-and-brand-guidelines
+    Altered source versions must be plainly marked as such, and must not be misrepresented as being the original software.
+    This notice may not be removed or altered from any source distribution.
+
+NO EXPRESS OR IMPLIED LICENSES TO ANY PARTY'S PATENT RIGHTS ARE GRANTED BY THIS LICENSE. THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+import ast
+import json
+import os
+
+from app import app, celery, db
+from app.api.v1.helpers.compliance import ComplianceReportWriter, ComplianceSummary
+from app.api.v1.helpers.coreclient import CoreBatchClient
+from app.api.v1.helpers.filecache import DeviceImeis
+from app.api.v1.helpers.fileprocessor import TacGroups
+from app.api.v1.helpers.utilities import Utilities
+from app.api.v1.models.requeststage import RequestStage
+
+
+class RequestPipeline:
+    """Staged processing of registration and de-registration requests on Celery workers.
+
+    A request goes through parse -> persist -> classify -> report -> review. Every stage is a separate
+    task keyed only by the tracking id of the request and commits its work together with the stage it
+    completed, a stage which is already completed is skipped when the chain is run again. Stages can be
+    redelivered to any worker and a failed request resumes from the last completed stage.
+    """
+
+    SUMMARY_FILE = 'compliance_summary.json'
+
+    @classmethod
+    def start(cls, request, request_type, auto_review=False, ussd=False, eager=False):
+        """Start processing of a request from the first stage, returns id of the queued chain.
+
+        With eager, parse and persist stages are performed in the calling process before queueing the rest.
+        """
+        request.update_processing_status('Processing')
+        request_stage = RequestStage.begin(request.tracking_id, request_type, request.id, auto_review, ussd)
+        db.session.commit()
+        if eager:
+            cls.execute(request.tracking_id, 'parsed')
+            cls.execute(request.tracking_id, 'persisted')
+        return cls.dispatch(request, request_stage)
+
+    @classmethod
+    def resume(cls, request, request_type):
+        """Resume processing of a request after its last completed stage, returns id of the queued chain."""
+        request_stage = RequestStage.get(request.tracking_id)
+        if request_stage is None:
+            return cls.start(request, request_type, auto_review=app.config['AUTOMATE_IMEI_CHECK'])
+        if not request_stage.is_completed('persisted'):
+            request.update_processing_status('Processing')
+        request.update_report_status('Processing')
+        db.session.commit()
+        return cls.dispatch(request, request_stage)
+
+    @classmethod
+    def dispatch(cls, request, request_stage):
+        """Queue the chain of stages of a request, request is marked as failed if it can not be queued."""
+        tracking_id = request_stage.tracking_id
+        try:
+            stages = cls.parse_request.si(tracking_id) | cls.persist_request.si(tracking_id) | \
+                cls.classify_request.si(tracking_id) | cls.report_request.si(tracking_id) | \
+                cls.review_request.si(tracking_id)
+            response = stages.apply_async(link_error=cls.request_failed.s(tracking_id))
+            app.logger.info('processing of request {0} queued with task_id: {1}'.format(tracking_id, response.id))
+            return response.id
+        except Exception as e:
+            app.logger.exception(e)
+            if not request_stage.is_completed('persisted'):
+                request.update_processing_status('Failed')
+            request.update_report_status('Failed')
+            db.session.commit()
+            return None
+
+    @classmethod
+    def execute(cls, tracking_id, stage):
+        """Perform a stage of a request unless it is already completed."""
+        request_stage = RequestStage.get(tracking_id)
+        if request_stage is None:
+            raise ValueError('no processing stage found for request {0}'.format(tracking_id))
+        if request_stage.is_completed(stage):
+            app.logger.info('stage {0} of request {1} already completed'.format(stage, tracking_id))
+            return
+        request = cls.get_request(request_stage)
+        handlers = {
+            'parsed': cls.parse,
+            'persisted': cls.persist,
+            'classified': cls.classify,
+            'reported': cls.report,
+            'reviewed': cls.review
+        }
+        try:
+            handlers[stage](request_stage, request)
+            request_stage.complete(stage)
+            db.session.commit()
+            app.logger.info('stage {0} of request {1} completed'.format(stage, tracking_id))
+        except Exception:
+            db.session.rollback()
+            raise
+        if stage == 'reported':
+            cls.remove_summary(tracking_id)
+
+    @staticmethod
+    def get_request(request_stage):
+        """Return registration or de-registration request of a stage."""
+        if request_stage.request_type == 'registration':
+            from app.api.v1.models.regdetails import RegDetails
+            return RegDetails.get_by_id(request_stage.request_id)
+        from app.api.v1.models.deregdetails import DeRegDetails
+        return DeRegDetails.get_by_id(request_stage.request_id)
+
+    @staticmethod
+    def registration_devices(reg_details, ussd=False):
+        """Return list (or lazily decoded DeviceImeis) of devices imeis of a registration request."""
+        if reg_details.import_type == 'file':
+            args = {'imei_per_device': reg_details.imei_per_device, 'device_count': reg_details.device_count}
+            devices = Utilities.process_reg_file(reg_details.file, reg_details.tracking_id, args)
+        elif ussd:
+            devices = [list(reg_details.imeis.strip('}{').split(','))]
+        else:
+            devices = ast.literal_eval(reg_details.imeis)
+        if not isinstance(devices, (list, DeviceImeis)):
+            raise ValueError('invalid imeis in request {0}: {1}'.format(reg_details.tracking_id, devices))
+        return devices
+
+    @staticmethod
+    def de_registration_imeis(dereg_details):
+        """Return TAC to IMEIs mapping of a de-registration request."""
+        args = {'device_count': dereg_details.device_count}
+        imei_tac_map = Utilities.process_de_reg_file(dereg_details.file, dereg_details.tracking_id, args)
+        if not isinstance(imei_tac_map, TacGroups):
+            raise ValueError('invalid imeis in request {0}: {1}'.format(dereg_details.tracking_id, imei_tac_map))
+        return imei_tac_map
+
+    @classmethod
+    def parse(cls, request_stage, request):
+        """Parse and validate imeis of the request, parsed registration files are cached for the next stage."""
+        if request_stage.request_type == 'registration':
+            cls.registration_devices(request, request_stage.ussd)
+        else:
+            cls.de_registration_imeis(request)
+
+    @classmethod
+    def persist(cls, request_stage, request):
+        """Replace devices and imeis of the request."""
+        if request_stage.request_type == 'registration':
+            from app.api.v1.models.device import Device
+            from app.api.v1.models.regdevice import RegDevice
+            reg_device = RegDevice.get_device_by_registration_id(request.id)
+            devices = cls.registration_devices(request, request_stage.ussd)
+            Device.delete_request_devices(request.id)
+            Device.bulk_create_devices(request, reg_device.id, devices)
+        else:
+            from app.api.v1.models.deregdevice import DeRegDevice
+            DeRegDevice.bulk_copy_imeis(request.id, cls.de_registration_imeis(request))
+        request.update_processing_status('Processed')
+        request.update_report_status('Processing')
+
+    @classmethod
+    def classify(cls, request_stage, request):
+        """Classify imeis of the request by DIRBS Core, writing compliance reports as batches are classified.
+
+        Summary of the request is stored for the report stage.
+        """
+        if request_stage.request_type == 'registration':
+            from app.api.v1.models.imeidevice import ImeiDevice
+            imeis = ImeiDevice.get_request_imeis(request.id)
+        else:
+            from app.api.v1.models.deregimei import DeRegImei
+            imeis = DeRegImei.get_request_imeis(request.id)
+        Utilities.create_directory(request_stage.tracking_id)
+        with ComplianceReportWriter.create(request_stage.tracking_id) as writer, CoreBatchClient() as client:
+            summary = ComplianceSummary(writer)
+            for records in client.iter_classify(imeis):
+                summary.add(records)
+        summary_path = cls.summary_path(request_stage.tracking_id)
+        with open(summary_path + '.tmp', 'w') as summary_file:
+            json.dump(summary.summary(request_stage.tracking_id), summary_file)
+        os.replace(summary_path + '.tmp', summary_path)
+
+    @classmethod
+    def report(cls, request_stage, request):
+        """Store compliance summary and report of the request."""
+        with open(cls.summary_path(request_stage.tracking_id)) as summary_file:
+            result = json.load(summary_file)
+        request.summary = json.dumps({'summary': result})
+        request.report = result.get('compliant_report_name')
+        if not request_stage.auto_review:
+            request.update_report_status('Processed')
+        request.save()
+
+    @staticmethod
+    def review(request_stage, request):
+        """Auto approve/reject the request based on its compliance summary.
+
+        The stage is marked as completed before deciding so that it is committed in the same transaction as
+        the decision, a redelivered stage never applies the decision (and deducts the quota) twice.
+        """
+        if not request_stage.auto_review:
+            return
+        result = json.loads(request.summary).get('summary')
+        request_stage.complete('reviewed')
+        if request_stage.request_type == 'registration':
+            from app.api.v1.models.device import Device
+            Device.auto_approve(result, request, app)
+        else:
+            from app.api.v1.models.deregdevice import DeRegDevice
+            DeRegDevice.auto_approve(result, request)
+
+    @staticmethod
+    def summary_path(tracking_id):
+        """Return path of the file holding compliance summary of a request."""
+        return os.path.join(app.config['DRS_UPLOADS'], '{0}'.format(tracking_id), RequestPipeline.SUMMARY_FILE)
+
+    @staticmethod
+    def remove_summary(tracking_id):
+        """Remove stored compliance summary of a request once it is saved with the request."""
+        summary_path = RequestPipeline.summary_path(tracking_id)
+        if os.path.exists(summary_path):
+            os.remove(summary_path)
+
+    @staticmethod
+    @celery.task(acks_late=True)
+    def parse_request(tracking_id):
+        """Celery task for parse stage."""
+        with app.app_context():
+            RequestPipeline.execute(tracking_id, 'parsed')
+
+    @staticmethod
+    @celery.task(acks_late=True)
+    def persist_request(tracking_id):
+        """Celery task for persist stage."""
+        with app.app_context():
+            RequestPipeline.execute(tracking_id, 'persisted')
+
+    @staticmethod
+    @celery.task(acks_late=True)
+    def classify_request(tracking_id):
+        """Celery task for classify stage."""
+        with app.app_context():
+            RequestPipeline.execute(tracking_id, 'classified')
+
+    @staticmethod
+    @celery.task(acks_late=True)
+    def report_request(tracking_id):
+        """Celery task for report stage."""
+        with app.app_context():
+            RequestPipeline.execute(tracking_id, 'reported')
+
+    @staticmethod
+    @celery.task(acks_late=True)
+    def review_request(tracking_id):
+        """Celery task for review stage."""
+        with app.app_context():
+            RequestPipeline.execute(tracking_id, 'reviewed')
+
+    @staticmethod
+    @celery.task
+    def request_failed(request, exc, traceback, tracking_id):
+        """Celery errback of the stages chain, marks the request as failed."""
+        with app.app_context():
+            app.logger.error('task {0} of request {1} failed: {2}'.format(request.id, tracking_id, exc))
+            request_stage = RequestStage.get(tracking_id)
+            req = RequestPipeline.get_request(request_stage)
+            if not request_stage.is_completed('persisted'):
+                req.update_processing_status('Failed')
+            req.update_report_status('Failed')
+            db.session.commit()
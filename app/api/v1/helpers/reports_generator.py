@@ -13,266 +13,14 @@ Redistribution and use in source and binary forms, with or without modification,
 
 NO EXPRESS OR IMPLIED LICENSES TO ANY PARTY'S PATENT RIGHTS ARE GRANTED BY THIS LICENSE. THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 """
-import os
-from app import session, celery, app
-from requests import ConnectionError
+from app import app
 from app.api.v1.helpers.error_handlers import *
 from app.api.v1.helpers.multisimcheck import MultiSimCheck
 
-from threading import Thread
-from math import ceil
-
-import pandas as pd
-import uuid
-import json
-
 
 class BulkCommonResources:  # pragma: no cover
     """Common resources for bulk request."""
 
-    @staticmethod
-    @celery.task
-    def get_summary(imeis_list, tracking_id):
-        """Celery task for bulk request processing."""
-        try:
-            imeis_chunks = BulkCommonResources.chunked_data(imeis_list)
-            records = BulkCommonResources.start_threads(imeis_list=imeis_chunks)
-            # send records for summary generation
-            response = BulkCommonResources.build_drs_summary(records, tracking_id)
-            return response
-        except Exception as e:
-            raise e
-
-    @staticmethod
-    def chunked_data(imeis_list):
-        """Divide IMEIs into batches of 1000 and chunks for multi threading."""
-        try:
-            if imeis_list:
-                imeis_list = list(imeis_list[i:i + 1000] for i in
-                                  range(0, len(imeis_list), 1000))
-                chunksize = int(ceil(len(imeis_list) / 10))
-                imeis_list = list(imeis_list[i:i + chunksize] for i in range(0, len(imeis_list), chunksize))
-                return imeis_list
-            return imeis_list
-        except Exception as e:
-            raise e
-
-    @staticmethod
-    def start_threads(imeis_list):
-        """Process IMEIs simultaneously by starting multiple threads at a time."""
-        thread_list = []
-        records = []
-        unprocessed_imeis = []
-        for imei in imeis_list:
-            thread_list.append(Thread(target=BulkCommonResources.get_records, args=(imei, records, unprocessed_imeis)))
-
-        # start threads for all imei chunks
-        for x in thread_list:
-            x.start()
-
-        # stop all threads on completion
-        for t in thread_list:
-            t.join()
-
-        if unprocessed_imeis:
-            records, unprocessed_imeis = BulkCommonResources.retry(records, unprocessed_imeis)
-
-        return records
-
-    # get records from core system
-    @staticmethod
-    def get_records(imeis, records, unprocessed_imeis):
-        """Compile IMEIs batch responses from DIRBS core system."""
-        try:
-            while imeis:
-                imei = imeis.pop(-1)  # pop the last item from queue
-
-                try:
-                    if imei:
-                        batch_req = {
-                            "imeis": imei,
-                            "include_registration_status": True,
-                            "include_stolen_status": True
-                        }
-                        headers = {'content-type': 'application/json', 'charset': 'utf-8', 'keep_alive': 'false'}
-                        app.logger.info('{}/imei-batch'.format(app.config['CORE_BASE_URL']+app.config['API_VERSION']))
-                        imei_response = session.post('{}/imei-batch'.format(app.config['CORE_BASE_URL']+app.config['API_VERSION']),
-                                                     data=json.dumps(batch_req),
-                                                     headers=headers)  # dirbs core batch api call
-
-                        if imei_response.status_code == 200:
-                            imei_response = imei_response.json()
-
-                            # if imei_per_device is not None:
-                            #     imeis_for_multi_sim_check = [imei[x:x + imei_per_device] for x in range(0, len(imei),
-                            #                                                                             imei_per_device)]
-                            #     multi_sim_result = MultiSimCheck.validate_imeis_capacity(app.config['CORE_BASE_URL'],
-                            #                                                              app.config['API_VERSION'],
-                            #                                                              imeis_for_multi_sim_check)
-                            #
-                            #     if len(multi_sim_result) > 0 and multi_sim_result[0] == False:
-                            #         imei_response['results'][0]['multi_sim_matched'] = multi_sim_result[0]
-                            #         imei_response['results'][0]['multi_sim_info'] = multi_sim_result[1]
-                            #     elif len(multi_sim_result) > 0:
-                            #         imei_response['results'][0]['multi_sim_matched'] = multi_sim_result[0]
-
-                            records.extend(imei_response['results'])
-                        else:
-                            app.logger.info("imei batch failed due to status other than 200")
-                            unprocessed_imeis.append(imei)  # in case of connection error append imei count to unprocessed IMEIs list
-                    else:
-                        continue
-                except (ConnectionError, Exception) as e:
-                    unprocessed_imeis.append(imei)  # in case of connection error append imei count to unprocessed IMEIs list
-                    app.logger.exception(e)
-        except Exception as error:
-            raise error
-
-    @staticmethod
-    def retry(records, unprocessed_imeis):
-        """Retry failed IMEI batches."""
-        retry = 10
-
-        while retry and len(unprocessed_imeis) > 0:
-            threads = []
-            retry = retry - 1
-            imeis_list = unprocessed_imeis
-            unprocessed_imeis = []
-            chunksize = int(ceil(len(imeis_list) / 10))
-            imeis_list = list(imeis_list[i:i + chunksize] for i in
-                              range(0, len(imeis_list), chunksize))  # make 100 chunks for 1 million imeis
-            for imeis in imeis_list:
-                threads.append(Thread(target=BulkCommonResources.get_records, args=(imeis, records, unprocessed_imeis)))
-            for x in threads:
-                x.start()
-
-            for t in threads:
-                t.join()
-
-        return records, unprocessed_imeis
-
-    @staticmethod
-    def build_drs_summary(records, tracking_id):
-        """Generate summary for DRS bulk records."""
-        try:
-            response = {}
-            if records:
-                result = pd.DataFrame(records)  # main dataframe for results
-
-                stolen_list = pd.DataFrame(list(result['stolen_status']))   # dataframe for stolen status
-                pending_stolen_count = len(stolen_list.loc[stolen_list['provisional_only']==True])
-
-                stolen = len(stolen_list.loc[stolen_list['provisional_only']==False])
-
-                count_per_condition = {}
-
-                realtime = pd.DataFrame(list(result['realtime_checks']))  # dataframe of realtime checks
-                seen_on_network = len(realtime.loc[realtime['ever_observed_on_network']==True])
-
-                blocking_condition = pd.DataFrame(i['blocking_conditions'] for i in result['classification_state'] if i['blocking_conditions'])  # dataframe for blocking conditions
-
-                info_condition = pd.DataFrame(i['informative_conditions'] for i in result['classification_state'] if i['informative_conditions'])  # dataframe for informative conditions
-
-                #  IMEI count per blocking condition
-                count_per_condition, block = BulkCommonResources.count_condition(count=count_per_condition, conditions=blocking_condition)
-
-                # IMEI count per informative condition
-                count_per_condition, info = BulkCommonResources.count_condition(count=count_per_condition, conditions=info_condition)
-
-                # processing compliant status for all IMEIs
-                data = BulkCommonResources.generate_drs_compliant_report(records, tracking_id)
-
-                # summary for bulk verify IMEI
-                response['provisional_stolen'] = pending_stolen_count
-                response['verified_imei'] = len(records)
-                response['count_per_condition'] = count_per_condition
-                response['non_compliant'] = data['non_compliant']
-                response['compliant'] = data['compliant']
-                response['compliant_active'] = data['compliant_active']
-                response['provisional_non_compliant'] = data['provisionally_non_compliant']
-                response['provisional_compliant'] = data['provisionally_compliant']
-                response['seen_on_network'] = seen_on_network
-                response['stolen'] = stolen
-                response['compliant_report_name'] = data['filename']
-                # response['multi_sim_not_matched'] = data['multi_sim_not_matched']
-                response['id'] = tracking_id
-            return response
-        except Exception as e:
-            raise e
-
-    # generate compliant report and count non compliant IMEIs
-    @staticmethod
-    def generate_drs_compliant_report(records, tracking_id):
-        """Return non compliant report for DRS bulk request."""
-        non_compliant = 0
-        compliant = 0
-        active_compliant = 0
-        provisionally_compliant = 0
-        provisionally_non_compliant = 0
-        complaint_report = []
-        # multi_sim_not_matched = 0
-
-        for key in records:
-            status = BulkCommonResources.compliance_status(resp=key, status_type="bulk", imei=key['imei_norm'])
-            status['stolen_status'] = "Pending Stolen Verification" if key['stolen_status']['provisional_only'] \
-                else "Not Stolen" if key['stolen_status']['provisional_only'] is None else "Stolen"
-
-            status['seen_on_network'] = key['realtime_checks']['ever_observed_on_network']
-
-            if "Provisionally Compliant" in status['status']:
-                provisionally_compliant += 1
-            elif "Provisionally non compliant" in status['status']:
-                provisionally_non_compliant += 1
-            elif status['status'] == "Compliant (Inactive)":
-                compliant += 1
-            elif status['status'] == "Compliant (Active)":
-                active_compliant += 1
-            elif status['status'] == "Non compliant":
-                non_compliant += 1
-            # if "multi_sim_matched" in key:
-            #     if key['multi_sim_matched'] is not True:
-            #         multi_sim_not_matched += 1
-
-            complaint_report.append(status)
-
-        complaint_report = pd.DataFrame(complaint_report)  # dataframe of compliant report
-        report_name = 'compliant_report' + str(uuid.uuid4()) + '.tsv'
-        report_path = os.path.join(app.config['DRS_UPLOADS'], '{0}'.format(tracking_id))
-        complaint_report.to_csv(os.path.join(report_path, report_name), sep='\t')
-
-        del_columns = ['block_date', 'seen_on_network', 'stolen_status']
-        restricted_report = complaint_report.drop(del_columns, axis=1, errors='ignore')
-        user_report_name = 'user_report-{}'.format(report_name)
-        restricted_report.to_csv(os.path.join(report_path, user_report_name), sep='\t')
-
-        data = {
-            "non_compliant": non_compliant,
-            "compliant": compliant,
-            "compliant_active": active_compliant,
-            "provisionally_non_compliant": provisionally_non_compliant,
-            "provisionally_compliant": provisionally_compliant,
-            "filename": report_name,
-            "user_report_name": user_report_name,
-            # "multi_sim_not_matched": multi_sim_not_matched
-        }
-        return data
-
-    # count per condition classification state
-    @staticmethod
-    def count_condition(conditions, count):
-        """Helper functions to generate summary, returns IMEI count per condition."""
-        condition = []
-        transponsed = conditions.transpose()
-        for c in transponsed:
-            cond = {}
-            for i in transponsed[c]:
-                cond[i['condition_name']] = i['condition_met']  # serialize conditions in list of dictionaries
-            condition.append(cond)
-        condition = pd.DataFrame(condition)
-        for key in condition:  # iterate over list
-            count[key] = len(condition[condition[key]])  # count meeting conditions
-        return count, condition
-
     @staticmethod
     def compliance_status(resp, status_type, imei=None):
         """Evaluate IMEIs to be compliant/non complaint."""
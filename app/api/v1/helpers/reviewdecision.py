@@ -0,0 +1,81 @@
+"""
+DRS Review Decision package.
+Copyright (c) 2018-2020 Qualcomm Technologies, Inc.
+All rights reserved.
+Redistribution and use in source and binary forms, with or without modification, are permitted (subject to the limitations in the disclaimer below) provided that the following conditions are met:
+
+    Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+    Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+    Neither the name of Qualcomm Technologies, Inc. nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+    The origin of this software must not be misrepresented; you must not claim that you wrote the original software. If you use this software in a product, an acknowledgment is required by displaying the trademark/log as per the details provided here: https://www.qualcomm.com/documents/dirbs-logo-and-brand-guidelines
+    Altered source versions must be plainly marked as such, and must not be misrepresented as being the original software.
+    This notice may not be removed or altered from any source distribution.
+
+NO EXPRESS OR IMPLIED LICENSES TO ANY PARTY'S PATENT RIGHTS ARE GRANTED BY THIS LICENSE. THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+from app import app, celery, db
+from app.api.v1.models.approvedimeis import ApprovedImeis
+from app.api.v1.models.reviewjob import ReviewJob
+
+
+class ReviewDecision:
+    """Approval or rejection of the imeis of a reviewed registration request.
+
+    A decision changes the imeis of the request in approvedimeis in batches, every batch is committed together
+    with the progress of the request's review job. Requests with more imeis than REVIEW_BACKGROUND_THRESHOLD
+    are changed by a Celery task so the reviewer is not kept waiting, and can follow the job's progress.
+    """
+
+    @classmethod
+    def start(cls, request_id, decision, background=False):
+        """Start applying the decision to imeis of a request, returns id of the queued task if any.
+
+        The review job is committed together with the pending changes of the caller, with background the
+        imeis are always changed by the Celery task so they are not left half changed if the caller dies.
+        """
+        total = ApprovedImeis.count_review_imeis(decision, request_id)
+        ReviewJob.begin(request_id, decision, total)
+        db.session.commit()
+        if not background and total <= app.config['REVIEW_BACKGROUND_THRESHOLD']:
+            cls.execute(request_id)
+            return None
+        try:
+            response = cls.review_imeis.apply_async((request_id,))
+            app.logger.info('review of request {0} queued with task_id: {1}'.format(request_id, response.id))
+            return response.id
+        except Exception as e:
+            # decision is already committed to the request, so its imeis are still changed
+            app.logger.exception(e)
+            cls.execute(request_id)
+            return None
+
+    @staticmethod
+    def execute(request_id):
+        """Apply the decision of a request's review job to its remaining imeis."""
+        review_job = ReviewJob.get(request_id)
+        if review_job is None or review_job.state == 'completed':
+            return
+        batch_size = app.config['REVIEW_BATCH_SIZE']
+        try:
+            review_job.advance('running')
+            db.session.commit()
+            while True:
+                changed = ApprovedImeis.review_request_imeis(review_job.decision, request_id, batch_size)
+                review_job.advance('running', changed)
+                db.session.commit()
+                if changed < batch_size:
+                    break
+            review_job.advance('completed')
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            review_job.advance('failed')
+            db.session.commit()
+            raise
+
+    @staticmethod
+    @celery.task(acks_late=True)
+    def review_imeis(request_id):
+        """Celery task applying the review decision of a request."""
+        with app.app_context():
+            ReviewDecision.execute(request_id)
@@ -14,17 +14,28 @@ Redistribution and use in source and binary forms, with or without modification,
 NO EXPRESS OR IMPLIED LICENSES TO ANY PARTY'S PATENT RIGHTS ARE GRANTED BY THIS LICENSE. THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 """
 
-from app import app, db
+from app import app
 import json
 from flask import request, Response
 from app.api.v1.helpers.response import MIME_TYPES, CODES
 from app.api.v1.helpers.pagination import Pagination
-from datetime import datetime, timedelta
+from app.api.v1.helpers.search_query import SearchQuery
 from marshmallow.utils import isoformat
 
 
 class SearchDeregistration:
     """Class for De-Registration Searching."""
+
+    # free text columns which can be searched by a part of their value
+    TEXT_COLUMNS = ['tracking_id', 'user_name', 'status', 'brand', 'model_name', 'model_num', 'operating_system',
+                    'device_type', 'reviewer_id', 'reviewer_name', 'user_id', 'report']
+
+    # requests having any of the searched imeis are resolved through indexed imei columns
+    IMEI_FILTER = """id IN (SELECT deregdevice.dereg_details_id
+                              FROM deregimei
+                              JOIN deregdevice ON deregdevice.id = deregimei.device_id
+                             WHERE deregimei.imei = ANY({imeis}) OR deregimei.norm_imei = ANY({imeis}))"""
+
     def __init__(self):
         """Constructor."""
 
@@ -67,223 +78,63 @@ class SearchDeregistration:
             results.append(response)
         return results
 
+    @staticmethod
+    def get_page(sql, start, limit, params=None):
+        """Respond with a page of the search results, results are paginated and counted in the database."""
+        paginated_data = Pagination.get_paginated_query(sql, '/search', start, limit, 'id desc, updated_at desc',
+                                                        params)
+        if paginated_data['count'] == 0:
+            data = {
+                "start": start,
+                "previous": "",
+                "next": "",
+                "requests": [],
+                "count": 0,
+                "limit": limit
+            }
+            return Response(json.dumps(data, default=str), status=CODES.get("OK"),
+                            mimetype=MIME_TYPES.get('APPLICATION_JSON'))
+        if 'requests' not in paginated_data:
+            return SearchDeregistration.not_found(start, limit)
+        paginated_data['requests'] = SearchDeregistration.format_response(paginated_data['requests'])
+        return Response(json.dumps(paginated_data, default=str), status=CODES.get("OK"),
+                        mimetype=MIME_TYPES.get('APPLICATION_JSON'))
+
+    @staticmethod
+    def not_found(start, limit):
+        """Respond with not found for searches which can not be served."""
+        data = {
+            "start": start,
+            "previous": "",
+            "next": "",
+            "requests": [],
+            "count": 0,
+            "limit": limit,
+            "message": "Not Found"
+        }
+        return Response(json.dumps(data), status=CODES.get("NOT_FOUND"),
+                        mimetype=MIME_TYPES.get('APPLICATION_JSON'))
+
     @staticmethod
     def get_result(request, group=None):
         """Method to get search data from the database."""
         args = request.get_json()
         request_data = args.get("search_args")
-        count = len(request_data)
         search_specs = args.get("search_specs")
         start = 1 if args.get('start') < 1 else args.get('start', 1)
         limit = 10 if args.get('limit') < 1 else args.get('limit', 10)
 
-        sql = "select distinct on (id) * from search_deregistration"
+        query = SearchQuery('select distinct on (id) * from search_deregistration', SearchDeregistration.TEXT_COLUMNS, SearchDeregistration.IMEI_FILTER)
 
         try:
-            if count == 0:
-                if group:
-                    if group == 'reviewer':
-                        data = db.engine.execute(sql +" where status<>'New Request' and status<>'Awaiting Documents' and status<>'Closed' order by id desc, updated_at desc")
-                    elif (group == 'exporter') and search_specs['user_id']:
-                        data = db.engine.execute(
-                            sql + " where user_id = '{val}' order by id desc, updated_at desc".format(val=search_specs['user_id']))
-                requests = []
-                for row in data:
-                    requests.append(dict((col, val) for col, val in row.items()))
-                if requests:
-                    paginated_data = Pagination.get_paginated_list(requests, '/search', start=start,
-                                                                   limit=limit)
-                    paginated_data['requests'] = SearchDeregistration.format_response(paginated_data['requests'])
-                    response = Response(json.dumps(paginated_data, default=str), status=CODES.get("OK"),
-                                        mimetype=MIME_TYPES.get('APPLICATION_JSON'))
-                    return response
-                else:
-                    data = {
-                        "start": start,
-                        "previous": "",
-                        "next": "",
-                        "requests": requests,
-                        "count": 0,
-                        "limit": limit
-                    }
-                    response = Response(json.dumps(data, default=str), status=CODES.get("OK"),
-                                        mimetype=MIME_TYPES.get('APPLICATION_JSON'))
-                    return response
+            if group == 'reviewer':
+                query.not_in('status', ['New Request', 'Awaiting Documents', 'Closed'])
+            elif (group == 'exporter') and search_specs['user_id']:
+                query.equals('user_id', str(search_specs['user_id']))
             else:
-                if group:
-                    if group == 'reviewer':
-                        sql = sql + " where status <> 'New Request' and status <> 'Awaiting Documents' and status <> 'Closed' AND"
-                    elif (group == 'exporter') and search_specs['user_id']:
-                        sql = sql + " where user_id = '{val}' AND".format(val=search_specs['user_id'])
-
-                for x in request_data:
-                    count = count - 1
-                    if count == 0:
-                        if x == "updated_at" or x == "created_at":
-                            date = request_data.get(x).split(",")
-                            sql = sql + " {col} between '{min}' AND '{max}'".format(
-                                col=x,
-                                min=date[0],
-                                max=datetime.strptime(date[1], "%Y-%m-%d") + timedelta(hours=23, minutes=59, seconds=59)
-                            )
-                        elif x == 'id':
-                            data = request_data.get(x)
-                            sql = sql + " {col}={val} ".format(col=x,val=data)
-
-                        elif x == 'device_count':
-                            data = request_data.get(x)
-                            sql = sql + " {col}='{val}'".format(col=x,val=data)
-
-                        elif x == "imeis":
-                            record_len = len(request_data.get(x))
-                            if record_len == 1:
-                                sql = sql + " {col} like '%%{val}%%' ".format(
-                                    col=x,
-                                    val=request_data.get(x)[0]
-                                )
-                            if record_len > 1:
-                                sql = sql + "("
-                                for val in request_data.get(x):
-                                    record_len = record_len - 1
-                                    if record_len == 0:
-                                        sql = sql + " {col} like '%%{val}%%') ".format(
-                                            col=x,
-                                            val=val
-                                        )
-                                    else:
-                                        sql = sql + " {col} like '%%{val}%%' OR".format(
-                                            col=x,
-                                            val=val
-                                        )
-
-                        elif x == "technologies":
-                            record_len = len(request_data.get(x))
-                            if record_len == 1:
-                                sql = sql + " {col} like '%%{val}%%' ".format(
-                                    col=x,
-                                    val=request_data.get(x)[0]
-                                )
-                            if record_len > 1:
-                                sql = sql + "("
-                                for val in request_data.get(x):
-                                    record_len = record_len - 1
-                                    if record_len == 0:
-                                        sql = sql + " {col} like '%%{val}%%') ".format(
-                                            col=x,
-                                            val=val
-                                        )
-                                    else:
-                                        sql = sql + " {col} like '%%{val}%%' OR".format(
-                                            col=x,
-                                            val=val
-                                        )
-
-                        else:
-                            sql = sql + " {col} ilike '%%{val}%%'".format(
-                                col=x,
-                                val=request_data.get(x)
-                            )
-                    else:
-                        if x == "updated_at" or x == "created_at":
-                            date = request_data.get(x).split(",")
-                            sql = sql + " {col} between '{min}' AND '{max}' AND".format(
-                                col=x,
-                                min=date[0],
-                                max=datetime.strptime(date[1], "%Y-%m-%d") + timedelta(hours=23, minutes=59, seconds=59)
-                            )
-
-                        elif x=='id':
-                            data = request_data.get(x)
-                            sql = sql + " {col}={val} AND".format(col=x,val=data)
-
-                        elif x=='device_count':
-                            data = request_data.get(x)
-                            sql = sql + " {col}='{val}' AND".format(col=x,val=data)
-
-                        elif x == "imeis":
-                            record_len = len(request_data.get(x))
-                            if record_len == 1:
-                                sql = sql + " {col} like '%%{val}%%' AND".format(col=x, val=request_data.get(x)[0]
-                                                                                 )
-                            if record_len > 1:
-                                sql = sql + "("
-                                for val in request_data.get(x):
-                                    record_len = record_len - 1
-                                    if record_len == 0:
-                                        sql = sql + " {col} like '%%{val}%%') AND".format(
-                                            col=x,
-                                            val=val
-                                        )
-                                    else:
-                                        sql = sql + " {col} like '%%{val}%%' OR".format(
-                                            col=x,
-                                            val=val
-                                        )
-
-                        elif x == "technologies":
-                            record_len = len(request_data.get(x))
-                            if record_len == 1:
-                                sql = sql + " {col} like '%%{val}%%' AND".format(
-                                    col=x,
-                                    val=request_data.get(x)[0]
-                                )
-                            if record_len > 1:
-                                sql = sql + "("
-                                for val in request_data.get(x):
-                                    record_len = record_len - 1
-                                    if record_len == 0:
-                                        sql = sql + " {col} like '%%{val}%%') AND".format(
-                                            col=x,
-                                            val=val
-                                        )
-                                    else:
-                                        sql = sql + " {col} like '%%{val}%%' OR".format(
-                                            col=x,
-                                            val=val
-                                        )
-
-                        else:
-                            sql = sql + " {col} like '%%{val}%%' AND".format(
-                                col=x,
-                                val=request_data.get(x)
-                            )
-
-                sql = sql + " order by id desc, updated_at desc"
-                data = db.session.execute(sql)
-                requests = []
-                for row in data:
-                    requests.append(dict((col, val) for col, val in row.items()))
-                if requests:
-                    paginated_data = Pagination.get_paginated_list(requests, '/search', start=start,
-                                                                   limit=limit)
-
-                    paginated_data['requests'] = SearchDeregistration.format_response(paginated_data['requests'])
-                    response = Response(json.dumps(paginated_data, default=str), status=CODES.get("OK"),
-                                        mimetype=MIME_TYPES.get('APPLICATION_JSON'))
-                    return response
-                else:
-                    data = {
-                        "start": start,
-                        "previous": "",
-                        "next": "",
-                        "requests": requests,
-                        "count": 0,
-                        "limit": limit
-                    }
-                    response = Response(json.dumps(data, default=str), status=CODES.get("OK"),
-                                        mimetype=MIME_TYPES.get('APPLICATION_JSON'))
-                    return response
+                return SearchDeregistration.not_found(start, limit)
+            query.search(request_data)
+            return SearchDeregistration.get_page(query.sql, start, limit, query.params)
         except Exception as e:
             app.logger.exception(e)
-            data = {
-                "start": start,
-                "previous": "",
-                "next": "",
-                "requests": [],
-                "count": 0,
-                "limit": limit,
-                "message": "Not Found"
-            }
-            response = Response(json.dumps(data), status=CODES.get("NOT_FOUND"),
-                                mimetype=MIME_TYPES.get('APPLICATION_JSON'))
-            return response
+            return SearchDeregistration.not_found(start, limit)
@@ -0,0 +1,95 @@
+"""
+DRS Search Query package.
+Copyright (c) 2018-2020 Qualcomm Technologies, Inc.
+All rights reserved.
+Redistribution and use in source and binary forms, with or without modification, are permitted (subject to the limitations in the disclaimer below) provided that the following conditions are met:
+
+    Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+    Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+    Neither the name of Qualcomm Technologies, Inc. nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+    The origin of this software must not be misrepresented; you must not claim that you wrote the original software. If you use this software in a product, an acknowledgment is required by displaying the trademark/log as per the details provided here: https://www.qualcomm.com/documents/dirbs-logo-and-brand-guidelines
+    Altered source versions must be plainly marked as such, and must not be misrepresented as being the original software.
+    This notice may not be removed or altered from any source distribution.
+
+NO EXPRESS OR IMPLIED LICENSES TO ANY PARTY'S PATENT RIGHTS ARE GRANTED BY THIS LICENSE. THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+from datetime import datetime, timedelta
+
+
+class SearchQuery:
+    """Builder of parameterized search queries over a search table.
+
+    Every searched value is bound as a query parameter and only known columns can be searched,
+    free text columns are matched with ILIKE which can use the trigram indexes of the search tables.
+    """
+
+    def __init__(self, select, text_columns, imei_filter):
+        """Constructor."""
+        self.select = select
+        self.text_columns = text_columns
+        self.imei_filter = imei_filter
+        self.clauses = []
+        self.params = {}
+
+    @property
+    def sql(self):
+        """SQL of the query."""
+        if self.clauses:
+            return '{0} WHERE {1}'.format(self.select, ' AND '.join(self.clauses))
+        return self.select
+
+    def bind(self, value):
+        """Bind a value as a new parameter, returns placeholder of the parameter."""
+        name = 'search_{0}'.format(len(self.params))
+        self.params[name] = value
+        return ':' + name
+
+    def equals(self, column, value):
+        """Match rows having the value in the column."""
+        self.clauses.append('{0} = {1}'.format(column, self.bind(value)))
+        return self
+
+    def not_in(self, column, values):
+        """Match rows not having any of the values in the column."""
+        self.clauses.append('{0} <> ALL({1})'.format(column, self.bind(list(values))))
+        return self
+
+    def between_dates(self, column, value):
+        """Match rows with the column in the "min,max" range of dates, max date is included as a whole."""
+        dates = value.split(',')
+        max_date = datetime.strptime(dates[1], '%Y-%m-%d') + timedelta(hours=23, minutes=59, seconds=59)
+        self.clauses.append('{0} BETWEEN {1} AND {2}'.format(column, self.bind(dates[0]), self.bind(max_date)))
+        return self
+
+    def contains_any(self, column, values):
+        """Match rows having any of the values (strings or numbers) as a part of the column."""
+        values = values if isinstance(values, (list, tuple)) else [values]
+        if not values:
+            raise ValueError('search argument {0} has no values'.format(column))
+        clauses = ['{0} ILIKE {1}'.format(column, self.bind('%{0}%'.format(str(value)))) for value in values]
+        self.clauses.append('({0})'.format(' OR '.join(clauses)))
+        return self
+
+    def imeis(self, imeis):
+        """Match rows of requests having any of the imeis."""
+        imeis = [imeis] if isinstance(imeis, str) else list(imeis)
+        self.clauses.append(self.imei_filter.format(imeis=self.bind(imeis)))
+        return self
+
+    def search(self, search_args):
+        """Add filters of the search arguments, raises ValueError for arguments which can not be searched."""
+        for column, value in search_args.items():
+            if column in ['updated_at', 'created_at']:
+                self.between_dates(column, value)
+            elif column == 'id':
+                self.equals(column, value)
+            elif column == 'device_count':
+                self.equals(column, str(value))
+            elif column == 'imeis':
+                self.imeis(value)
+            elif column == 'technologies' or column in self.text_columns:
+                self.contains_any(column, value)
+            else:
+                raise ValueError('search argument {0} is not supported'.format(column))
+        return self
@@ -15,19 +15,29 @@ NO EXPRESS OR IMPLIED LICENSES TO ANY PARTY'S PATENT RIGHTS ARE GRANTED BY THIS
 """
 
 import json
-from datetime import datetime, timedelta
 from marshmallow.utils import isoformat
 
 from flask import Response
 
-from app import app, db
+from app import app
 from app.api.v1.helpers.pagination import Pagination
+from app.api.v1.helpers.search_query import SearchQuery
 from app.api.v1.helpers.response import MIME_TYPES, CODES
 
 
 class SearchRegistraion:
     """Class for searching registration data in database."""
 
+    # free text columns which can be searched by a part of their value
+    TEXT_COLUMNS = ['tracking_id', 'user_name', 'imei_per_device', 'm_location', 'status', 'brand', 'model_name', 'model_num',
+                    'operating_system', 'device_type', 'reviewer_id', 'reviewer_name', 'user_id', 'report']
+
+    # requests having any of the searched imeis are resolved through indexed imei columns
+    IMEI_FILTER = """id IN (SELECT device.reg_details_id
+                              FROM imeidevice
+                              JOIN device ON device.id = imeidevice.device_id
+                             WHERE imeidevice.imei = ANY({imeis}) OR imeidevice.normalized_imei = ANY({imeis}))"""
+
     def __init__(self):
         """Constructor."""
 
@@ -68,247 +78,63 @@ class SearchRegistraion:
             results.append(response)
         return results
 
+    @staticmethod
+    def get_page(sql, start, limit, params=None):
+        """Respond with a page of the search results, results are paginated and counted in the database."""
+        paginated_data = Pagination.get_paginated_query(sql, '/search', start, limit, 'updated_at desc, id desc',
+                                                        params)
+        if paginated_data['count'] == 0:
+            data = {
+                "start": start,
+                "previous": "",
+                "next": "",
+                "requests": [],
+                "count": 0,
+                "limit": limit
+            }
+            return Response(json.dumps(data, default=str), status=CODES.get("OK"),
+                            mimetype=MIME_TYPES.get('APPLICATION_JSON'))
+        if 'requests' not in paginated_data:
+            return SearchRegistraion.not_found(start, limit)
+        paginated_data['requests'] = SearchRegistraion.format_response(paginated_data['requests'])
+        return Response(json.dumps(paginated_data, default=str), status=CODES.get("OK"),
+                        mimetype=MIME_TYPES.get('APPLICATION_JSON'))
+
+    @staticmethod
+    def not_found(start, limit):
+        """Respond with not found for searches which can not be served."""
+        data = {
+            "start": start,
+            "previous": "",
+            "next": "",
+            "requests": [],
+            "count": 0,
+            "limit": limit,
+            "message": "Not Found"
+        }
+        return Response(json.dumps(data), status=CODES.get("NOT_FOUND"),
+                        mimetype=MIME_TYPES.get('APPLICATION_JSON'))
+
     @staticmethod
     def get_result(request, group=None):
         """Method to get search data from the database."""
         args = request.get_json()
         request_data = args.get("search_args")
-        count = len(request_data)
         search_specs = args.get("search_specs")
         start = 1 if args.get('start') < 1 else args.get('start', 1)
         limit = 10 if args.get('limit') < 1 else args.get('limit', 10)
 
-        sql = "select * from search_registration"
+        query = SearchQuery('select * from search_registration', SearchRegistraion.TEXT_COLUMNS, SearchRegistraion.IMEI_FILTER)
 
         try:
-            if count == 0:
-                if group:
-                    if group == 'reviewer':
-                        data = db.engine.execute(
-                            sql + " where status<>'New Request' and status<>'Awaiting Documents' and status<>'Closed' "
-                                  "order by updated_at desc")
-                    elif (group == 'individual' or group == 'importer') and bool(search_specs['user_id']):
-                        data = db.engine.execute(
-                            sql + " where user_id = '{val}' order by updated_at desc".format(
-                                val=search_specs['user_id']))
-                requests = []
-                for row in data:
-                    requests.append(dict((col, val) for col, val in row.items()))
-                if requests:
-                    paginated_data = Pagination.get_paginated_list(requests, '/search', start=start,
-                                                                   limit=limit)
-
-                    paginated_data['requests'] = SearchRegistraion.format_response(paginated_data['requests'])
-                    response = Response(json.dumps(paginated_data, default=str), status=CODES.get("OK"),
-                                        mimetype=MIME_TYPES.get('APPLICATION_JSON'))
-                    return response
+            if group == 'reviewer':
+                query.not_in('status', ['New Request', 'Awaiting Documents', 'Closed'])
+            elif (group == 'individual' or group == 'importer') and bool(search_specs['user_id']):
+                query.equals('user_id', str(search_specs['user_id']))
             else:
-
-                if group:
-                    if group == 'reviewer':
-                        sql = sql + " where status <> 'New Request' and status <> 'Awaiting Documents' and status <> 'Closed' AND"
-                    elif (group == 'individual' or group == 'importer') and bool(search_specs['user_id']):
-                        sql = sql + " where user_id = '{val}' AND".format(val=search_specs['user_id'])
-                for x in request_data:
-                    count = count - 1
-                    if count == 0:
-                        if x == "updated_at" or x == "created_at":
-                            date = request_data.get(x).split(",")
-                            sql = sql + " {col} between '{min}' AND '{max}'".format(
-                                col=x,
-                                min=date[0],
-                                max=datetime.strptime(date[1], "%Y-%m-%d") + timedelta(hours=23, minutes=59, seconds=59)
-                            )
-
-                        elif x == 'id':
-                            data = request_data.get(x)
-                            sql = sql + " {col}={val}".format(col=x, val=data)
-
-                        elif x == 'device_count':
-                            data = request_data.get(x)
-                            sql = sql + " {col}='{val}'".format(col=x, val=data)
-
-                        elif x == "imeis":
-                            record_len = len(request_data.get(x))
-                            if record_len == 1:
-                                sql = sql + " {col} like '%%{val}%%'".format(
-                                    col=x,
-                                    val=request_data.get(x)[0]
-                                )
-                            if record_len > 1:
-                                sql = sql + "("
-                                for val in request_data.get(x):
-                                    record_len = record_len - 1
-                                    if record_len == 0:
-                                        sql = sql + " {col} like '%%{val}%%')".format(
-                                            col=x,
-                                            val=val
-                                        )
-                                    else:
-                                        sql = sql + " {col} like '%%{val}%%' OR".format(
-                                            col=x,
-                                            val=val
-                                        )
-
-                        elif x == "technologies":
-
-                            record_len = len(request_data.get(x))
-
-                            if record_len == 1:
-                                sql = sql + " {col} ilike '%%{val}%%'".format(
-
-                                    col=x,
-
-                                    val=request_data.get(x)[0]
-
-                                )
-
-                            if record_len > 1:
-                                sql = sql + "("
-                                for val in request_data.get(x):
-
-                                    record_len = record_len - 1
-
-                                    if record_len == 0:
-
-                                        sql = sql + " {col} ilike '%%{val}%%')".format(
-
-                                            col=x,
-
-                                            val=val
-
-                                        )
-
-                                    else:
-
-                                        sql = sql + " {col} ilike '%%{val}%%' OR".format(
-
-                                            col=x,
-
-                                            val=val
-
-                                        )
-
-                        else:
-                            sql = sql + " {col} ilike '%%{val}%%'".format(
-                                col=x,
-                                val=request_data.get(x)
-                            )
-                    else:
-                        if x == "updated_at" or x == "created_at":
-                            date = request_data.get(x).split(",")
-                            sql = sql + " {col} between '{min}' AND '{max}' AND".format(
-                                col=x,
-                                min=date[0],
-                                max=datetime.strptime(date[1], "%Y-%m-%d") + timedelta(hours=23, minutes=59, seconds=59)
-                            )
-
-                        elif x == 'id':
-                            data = request_data.get(x)
-                            sql = sql + " {col}={val} AND".format(col=x, val=data)
-
-                        elif x == 'device_count':
-                            data = request_data.get(x)
-                            sql = sql + " {col}='{val}' AND".format(col=x, val=data)
-
-                        elif x == "imeis":
-                            record_len = len(request_data.get(x))
-                            if record_len == 1:
-                                sql = sql + " {col} like '%%{val}%%' AND".format(col=x, val=request_data.get(x)[0]
-                                                                                 )
-                            if record_len > 1:
-                                sql = sql + "("
-                                for val in request_data.get(x):
-                                    record_len = record_len - 1
-                                    if record_len == 0:
-                                        sql = sql + " {col} like '%%{val}%%') AND".format(
-                                            col=x,
-                                            val=val
-                                        )
-                                    else:
-                                        sql = sql + " {col} like '%%{val}%%' OR".format(
-                                            col=x,
-                                            val=val
-                                        )
-
-                        elif x == "technologies":
-                            record_len = len(request_data.get(x))
-                            if record_len == 1:
-                                sql = sql + " {col} ilike '%%{val}%%' AND".format(
-
-                                    col=x,
-
-                                    val=request_data.get(x)[0]
-
-                                )
-
-                            if record_len > 1:
-                                sql = sql + "("
-                                for val in request_data.get(x):
-
-                                    record_len = record_len - 1
-
-                                    if record_len == 0:
-
-                                        sql = sql + " {col} ilike '%%{val}%%') AND".format(
-
-                                            col=x,
-
-                                            val=val
-
-                                        )
-
-                                    else:
-
-                                        sql = sql + " {col} like '%%{val}%%' OR".format(
-
-                                            col=x,
-
-                                            val=val
-
-                                        )
-
-                        else:
-                            sql = sql + " {col} ilike '%%{val}%%' AND".format(
-                                col=x,
-                                val=request_data.get(x)
-                            )
-                sql = sql + " order by updated_at desc"
-                data = db.session.execute(sql)
-                requests = []
-                for row in data:
-                    requests.append(dict((col, val) for col, val in row.items()))
-                if requests:
-                    paginated_data = Pagination.get_paginated_list(requests, '/search', start=start,
-                                                                   limit=limit)
-
-                    paginated_data['requests'] = SearchRegistraion.format_response(paginated_data['requests'])
-                    response = Response(json.dumps(paginated_data, default=str), status=CODES.get("OK"),
-                                        mimetype=MIME_TYPES.get('APPLICATION_JSON'))
-                    return response
-                else:
-                    data = {
-                        "start": start,
-                        "previous": "",
-                        "next": "",
-                        "requests": requests,
-                        "count": 0,
-                        "limit": limit
-                    }
-                    response = Response(json.dumps(data, default=str), status=CODES.get("OK"),
-                                        mimetype=MIME_TYPES.get('APPLICATION_JSON'))
-                    return response
+                return SearchRegistraion.not_found(start, limit)
+            query.search(request_data)
+            return SearchRegistraion.get_page(query.sql, start, limit, query.params)
         except Exception as e:
             app.logger.exception(e)
-            data = {
-                "start": start,
-                "previous": "",
-                "next": "",
-                "requests": [],
-                "count": 0,
-                "limit": limit,
-                "message": "Not Found"
-            }
-            response = Response(json.dumps(data), status=CODES.get("NOT_FOUND"),
-                                mimetype=MIME_TYPES.get('APPLICATION_JSON'))
-            return response
+            return SearchRegistraion.not_found(start, limit)
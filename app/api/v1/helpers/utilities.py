@@ -14,10 +14,10 @@ Redistribution and use in source and binary forms, with or without modification,
 NO EXPRESS OR IMPLIED LICENSES TO ANY PARTY'S PATENT RIGHTS ARE GRANTED BY THIS LICENSE. THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 """
 
+import io
 import json
 import os
 import shutil
-import threading
 import time
 from itertools import chain
 
@@ -26,9 +26,9 @@ import requests
 from flask_babel import lazy_gettext as _
 
 from app import GLOBAL_CONF, db, app
-from app.api.v1.helpers.fileprocessor import Processor
+from app.api.v1.helpers.fileprocessor import StreamProcessor, TacGroups
+from app.api.v1.helpers.filecache import FileCache, DeviceImeis
 from app.api.v1.models.approvedimeis import ApprovedImeis
-from app.api.v1.helpers.reports_generator import BulkCommonResources
 # from app.api.v1.models.regdetails import RegDetails
 # from app.api.v1.models.devicequota import DeviceQuota as DeviceQuotaModel
 
@@ -60,6 +60,8 @@ class Utilities:
     @staticmethod
     def filter_imeis_by_tac(tac_imei_map, tacs):
         """Method to filter/distinguish IMEIs by unique TACs."""
+        if isinstance(tac_imei_map, TacGroups):
+            return tac_imei_map.subset(tacs)
         filtered_imeis = {}
         for tac in tacs:
             imeis = tac_imei_map.get(tac)
@@ -79,61 +81,22 @@ class Utilities:
     @classmethod
     def extract_imeis(cls, imei_tac_map):
         """Extract IMEIs from IMEI-TAC mapping."""
-        imeis = []
-        for tac in imei_tac_map.keys():
-            tac_imeis = imei_tac_map.get(tac)
-            if tac_imeis:
-                imeis = imeis + tac_imeis
-        return imeis
-
-    @classmethod
-    def generate_summary(cls, imeis, tracking_id):
-        """Method to get compliance summary and report."""
-        try:
-            response = BulkCommonResources.get_summary.apply_async((imeis, tracking_id))
-            # response = BulkCommonResources.get_summary(imeis, tracking_id)
-            return response.id
-        except Exception as e:
-            app.logger.exception(e)
-            return None
+        if isinstance(imei_tac_map, TacGroups):
+            return imei_tac_map.flatten()
+        return list(chain.from_iterable(tac_imeis for tac_imeis in imei_tac_map.values() if tac_imeis))
 
     @staticmethod
     def de_register_imeis(imeis):
-        """Method to De-Register imeis.
+        """Method to De-Register imeis along with the other imeis of their devices.
+
+        Returns number of de-registered imeis, None on failure.
         """
-        # find imei devices and related imeis
-        if len(imeis) == 1:
-            query = """SELECT normalized_imei
-                         FROM public.imeidevice
-                        WHERE device_id IN
-                        (SELECT device_id
-                           FROM public.imeidevice
-                          WHERE normalized_imei='{imei}')""".format(imei=imeis[0])
-        else:
-            query = """SELECT normalized_imei
-                             FROM public.imeidevice
-                            WHERE device_id IN 
-                            (SELECT device_id
-                               FROM public.imeidevice
-                              WHERE normalized_imei IN {imeis})""".format(imeis=tuple(imeis))
         try:
-            res = db.engine.execute(query).fetchall()
-            matched_imeis = list(chain.from_iterable(res))
-
-            # de register imeis from approved imeis
-            updated_imeis = []
-            for imei in matched_imeis:
-                imei_ = ApprovedImeis.get_imei(imei)
-                if imei_.status != 'removed':
-                    imei_.status = 'removed'
-                    imei_.delta_status = 'remove'
-                    updated_imeis.append(imei_)
-            if len(updated_imeis) > 0:
-                ApprovedImeis.bulk_insert_imeis(updated_imeis)
-                return True
-            else:
-                return False
+            de_registered = ApprovedImeis.bulk_de_register_imeis(imeis)
+            db.session.commit()
+            return de_registered
         except Exception as e:
+            db.session.rollback()
             app.logger.error('An exception occurred while De-Registering IMEIs see exception log:')
             app.logger.exception(e)
             return None
@@ -156,69 +119,6 @@ class Utilities:
             app.logger.exception(IOError)
             return False
 
-    @classmethod
-    def pool_summary_request(cls, task_id, req, app):  # pragma: no cover
-        """Method for pooling about summary request until get response back."""
-        try:
-            if task_id:
-                req.update_report_status('Processing')
-                db.session.commit()
-                app.logger.info('polling task with task_id: {0} and request_id: {1}'.format(task_id, req.id))
-                thread = threading.Thread(daemon=True, target=cls.check_summary_status,
-                                          args=(task_id, req, app))
-                thread.start()
-            else:
-                req.update_report_status('Failed')
-                db.session.commit()
-        except Exception as e:
-            app.logger.exception(e)
-            req.update_report_status('Failed')
-            db.session.commit()
-
-    @classmethod
-    def check_summary_status(cls, task_id, req, app):  # pragma: no cover
-        """Method to pool and check if the summary is available."""
-        with app.app_context():
-            from app import db
-            try:
-                task = BulkCommonResources.get_summary.AsyncResult(task_id)
-                while task.state == 'PENDING':
-                    task = BulkCommonResources.get_summary.AsyncResult(task_id)
-                    app.logger.info('task_id:{0}-request_id:{1}-status:{2}'.
-                                    format(task_id, req.id, task.state))
-                task = BulkCommonResources.get_summary.AsyncResult(task_id)
-                result = task.get()
-                req.summary = json.dumps({'summary': result})
-                req.report = result.get('compliant_report_name')
-
-                if not app.config['AUTOMATE_IMEI_CHECK']:
-                    req.update_report_status('Processed')
-                    req.save()
-                    db.session.commit()
-
-                app.logger.info('task_id:{0}-request_id:{1}-status:COMPLETED'.
-                                format(task_id, req.id, task.state))
-            except Exception as e:
-                db.session.rollback()
-                if not app.config['AUTOMATE_IMEI_CHECK']:
-                    req.update_report_status('Failed')
-                    req.update_status('Failed')
-                db.session.commit()
-
-    @staticmethod
-    def check_request_status(task_id):
-        task = BulkCommonResources.get_summary.AsyncResult(task_id)
-
-        while task.state != 'SUCCESS':
-            task = BulkCommonResources.get_summary.AsyncResult(task_id)
-
-        if task.state == 'SUCCESS':
-            result = task.get()
-            return result
-        else:
-            return False
-
-
     @classmethod
     def bulk_normalize(cls, imeis):
         """Method to transform IMEIs to normalize form in bulk."""
@@ -394,17 +294,40 @@ class Utilities:
 
     @staticmethod
     def process_reg_file(filename, tracking_id, args):
-        """Process registration input file."""
+        """Process registration input file, already validated files are returned as lazily decoded DeviceImeis."""
         file_path = os.path.join(app.config['DRS_UPLOADS'], '{0}'.format(tracking_id), filename)
-        processor = Processor(file_path, args)
+        cached = Utilities.load_reg_file(file_path, args)
+        if cached is not None:
+            return DeviceImeis(cached)
+        processor = StreamProcessor(file_path, args)
         response = processor.process('registration')
+        if isinstance(response, list) and response:
+            try:
+                FileCache.store(file_path, response)
+            except (IOError, ValueError) as e:
+                app.logger.warning('unable to cache parsed file {0} of request {1}'.format(filename, tracking_id))
+                app.logger.exception(e)
         return response
 
+    @staticmethod
+    def load_reg_file(file_path, args):
+        """Return memory-mapped device imeis matrix of an already validated registration file, if any."""
+        shape = None
+        if 'imei_per_device' in args:
+            shape = (int(args.get('device_count')), int(args.get('imei_per_device')))
+        try:
+            matrix = FileCache.load(file_path, shape)
+        except (IOError, ValueError):
+            return None
+        if matrix is not None and matrix.shape[0] != int(args.get('device_count')):
+            return None
+        return matrix
+
     @staticmethod
     def process_de_reg_file(filename, tracking_id, args):
         """Process de registration input file."""
         file_path = os.path.join(app.config['DRS_UPLOADS'], '{0}'.format(tracking_id), filename)
-        processor = Processor(file_path, args)
+        processor = StreamProcessor(file_path, args)
         response = processor.process('de_registration')
         return response
 
@@ -418,6 +341,33 @@ class Utilities:
         res = db.engine.execute(query).first()
         return res.idx_exists
 
+    @staticmethod
+    def copy_rows(table, columns, rows, chunk_size=100000):
+        """Method to load rows into a table using COPY in bounded chunks, returns number of rows copied.
+
+        COPY is executed on the connection of the current session so the rows are part of its transaction,
+        values are expected to be free of tabs/new lines (imeis, tacs, ids).
+        """
+        cursor = db.session.connection().connection.cursor()
+        query = 'COPY {0} ({1}) FROM STDIN'.format(table, ', '.join(columns))
+        buffer = io.StringIO()
+        count = 0
+        try:
+            for row in rows:
+                buffer.write('\t'.join('\\N' if value is None else str(value) for value in row))
+                buffer.write('\n')
+                count += 1
+                if count % chunk_size == 0:
+                    buffer.seek(0)
+                    cursor.copy_expert(query, buffer)
+                    buffer = io.StringIO()
+            if buffer.tell():
+                buffer.seek(0)
+                cursor.copy_expert(query, buffer)
+        finally:
+            cursor.close()
+        return count
+
     @staticmethod
     def split_chunks(item_list, num_items_in_list):
         """Method to split lists into chunks (number of items in each list = num_items_in_list)."""
@@ -17,7 +17,8 @@ from flask_sqlalchemy import declarative_base
 
 __all__ = ["deregcomments", 'deregdetails', 'deregdocuments', 'deregimei', 'device', 'devicequota',
            'devicetechnology', 'devicetype', 'documents', 'imeidevice', 'regcomments', 'regdetails',
-           'regdevice', 'regdocuments', 'technologies', 'status', 'approvedimeis', 'notification','ussd']
+           'regdevice', 'regdocuments', 'technologies', 'status', 'approvedimeis', 'notification','ussd',
+           'requeststage', 'listwatermark', 'imeitally', 'reviewjob', 'lookupversion']
 
 from app.api.v1.models import *
 
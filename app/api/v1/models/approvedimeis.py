@@ -13,6 +13,7 @@ Redistribution and use in source and binary forms, with or without modification,
 
 NO EXPRESS OR IMPLIED LICENSES TO ANY PARTY'S PATENT RIGHTS ARE GRANTED BY THIS LICENSE. THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 """
+from sqlalchemy import text
 from sqlalchemy.exc import SQLAlchemyError
 
 from app import db
@@ -62,6 +63,9 @@ class ApprovedImeis(db.Model):
         status_index = db.Index('approved_imeis_status', cls.status, postgresql_concurrently=True)
         status_index.create(bind=engine)
 
+        updated_index = db.Index('approved_imeis_updated_at', cls.updated_at, postgresql_concurrently=True)
+        updated_index.create(bind=engine)
+
         # removed_flag_index = db.Index('approved_imeis_removed', cls.removed, postgresql_concurrently=True)
         # removed_flag_index.create(bind=engine)
 
@@ -108,6 +112,126 @@ class ApprovedImeis(db.Model):
             db.session.rollback()
             raise SQLAlchemyError
 
+    @staticmethod
+    def bulk_upsert_request_imeis(imeis_norm, request_id):
+        """Method to add imeis of a registration request in bulk.
+
+        The imeis are loaded into a temp table with COPY and resolved with a single statement,
+        imeis not yet known are added as pending, previously removed imeis are revived for the request
+        and imeis which are already present are left untouched.
+        """
+        from app.api.v1.helpers.utilities import Utilities  # pylint: disable=cyclic-import
+
+        connection = db.session.connection()
+        connection.execute('DROP TABLE IF EXISTS request_imeis')
+        connection.execute('CREATE TEMP TABLE request_imeis (imei VARCHAR(14)) ON COMMIT DROP')
+        Utilities.copy_rows('request_imeis', ['imei'], ((imei,) for imei in imeis_norm))
+        connection.execute('ANALYZE request_imeis')
+        query = text("""WITH request AS (SELECT DISTINCT imei FROM request_imeis),
+                             revived AS (
+                               UPDATE approvedimeis
+                                  SET status = 'pending', delta_status = 'add', removed = FALSE,
+                                      request_id = :request_id, updated_at = now()
+                                 FROM (SELECT DISTINCT ON (approved.imei) approved.id
+                                         FROM approvedimeis AS approved
+                                         JOIN request ON request.imei = approved.imei
+                                        WHERE approved.status = 'removed'
+                                          AND NOT EXISTS (SELECT 1
+                                                            FROM approvedimeis AS present
+                                                           WHERE present.imei = approved.imei
+                                                             AND present.status IS DISTINCT FROM 'removed')
+                                     ORDER BY approved.imei, approved.id) AS removed_imeis
+                                WHERE approvedimeis.id = removed_imeis.id
+                            RETURNING approvedimeis.imei)
+                      INSERT INTO approvedimeis (imei, request_id, status, delta_status, exported, removed)
+                      SELECT request.imei, :request_id, 'pending', 'add', FALSE, FALSE
+                        FROM request
+                       WHERE NOT EXISTS (SELECT 1 FROM approvedimeis WHERE approvedimeis.imei = request.imei)""")
+        res = connection.execute(query, request_id=request_id)
+        res.close()
+
+    # de-registered imeis are matched through a temp table rather than an array above this count
+    DE_REGISTER_ARRAY_LIMIT = 10000
+
+    @classmethod
+    def bulk_de_register_imeis(cls, imeis_norm):
+        """Method to de-register imeis in bulk, returns number of de-registered imeis.
+
+        All the imeis of the registered devices having any of the imeis are removed with a single statement,
+        large inputs are loaded into a temp table with COPY instead of being bound as an array.
+        """
+        from app.api.v1.helpers.utilities import Utilities  # pylint: disable=cyclic-import
+
+        imeis_norm = list(imeis_norm)
+        if len(imeis_norm) > cls.DE_REGISTER_ARRAY_LIMIT:
+            connection = db.session.connection()
+            connection.execute('DROP TABLE IF EXISTS de_register_imeis')
+            connection.execute('CREATE TEMP TABLE de_register_imeis (imei VARCHAR(14)) ON COMMIT DROP')
+            Utilities.copy_rows('de_register_imeis', ['imei'], ((imei,) for imei in imeis_norm))
+            connection.execute('ANALYZE de_register_imeis')
+            matched, params = 'normalized_imei IN (SELECT imei FROM de_register_imeis)', {}
+        else:
+            matched, params = 'normalized_imei = ANY(:imeis)', {'imeis': imeis_norm}
+        query = text("""UPDATE approvedimeis
+                           SET status = 'removed', delta_status = 'remove', updated_at = now()
+                          FROM (SELECT DISTINCT siblings.normalized_imei
+                                  FROM imeidevice AS siblings
+                                 WHERE siblings.device_id IN (SELECT device_id
+                                                                FROM imeidevice
+                                                               WHERE {0})) AS device_imeis
+                         WHERE approvedimeis.imei = device_imeis.normalized_imei
+                           AND approvedimeis.removed IS FALSE
+                           AND approvedimeis.status IS DISTINCT FROM 'removed'""".format(matched))
+        res = db.session.execute(query, params)
+        return res.rowcount
+
+    # review decision -> (changes to the imeis of a request, imeis of the request which are yet to be changed)
+    # an approved imei which was exported is updated in the lists, otherwise it is still added. A rejected imei
+    # which was exported is removed from the lists, otherwise it is dropped without ever being listed.
+    REVIEW_TRANSITIONS = {
+        'approve': ("""status = 'whitelist',
+                       delta_status = CASE WHEN exported THEN 'update' ELSE delta_status END""",
+                    """removed IS FALSE
+                       AND status IS DISTINCT FROM 'whitelist'"""),
+        'reject': ("""status = 'removed',
+                      delta_status = 'remove',
+                      removed = CASE WHEN exported THEN removed ELSE TRUE END""",
+                   """removed IS FALSE
+                      AND status IS DISTINCT FROM 'removed'
+                      AND status IS DISTINCT FROM 'whitelist'
+                      AND (exported_at IS NULL OR exported_at < LOCALTIMESTAMP)""")
+    }
+
+    @classmethod
+    def count_review_imeis(cls, decision, request_id):
+        """Return number of imeis of a request which are changed by the review decision."""
+        predicate = cls.REVIEW_TRANSITIONS[decision][1]
+        query = text("""SELECT count(*)
+                          FROM approvedimeis
+                         WHERE request_id = :request_id
+                           AND {0}""".format(predicate))
+        return db.session.execute(query, {'request_id': request_id}).scalar()
+
+    @classmethod
+    def review_request_imeis(cls, decision, request_id, batch_size):
+        """Apply the review decision to a batch of imeis of a request, returns number of changed imeis.
+
+        Changed imeis no longer match the decision, so repeating the call until it returns 0 changes all
+        of them and an interrupted review can be resumed.
+        """
+        changes, predicate = cls.REVIEW_TRANSITIONS[decision]
+        query = text("""UPDATE approvedimeis
+                           SET {0},
+                               updated_at = now()
+                         WHERE id IN (SELECT id
+                                        FROM approvedimeis
+                                       WHERE request_id = :request_id
+                                         AND {1}
+                                    ORDER BY id
+                                       LIMIT :batch_size)""".format(changes, predicate))
+        res = db.session.execute(query, {'request_id': request_id, 'batch_size': batch_size})
+        return res.rowcount
+
     @staticmethod
     def bulk_delete_imeis(reg_details):
         """Method to delete IMEIs in bulk."""
@@ -123,3 +247,152 @@ class ApprovedImeis(db.Model):
            based on type of the list generation.
         """
         return ApprovedImeis.query.filter_by(removed=False).all()
+
+    @staticmethod
+    def export_columns(list_type):
+        """Return csv columns of a registration list."""
+        columns = ['APPROVED_IMEI', 'make', 'model', 'status', 'model_number', 'brand_name', 'device_type',
+                   'radio_interface']
+        return columns + ['change_type'] if list_type == 'delta' else columns
+
+    @staticmethod
+    def export_snapshot(connection=None):
+        """Export snapshot of the current transaction so that list shards can be read from it in parallel."""
+        connection = connection or db.session.connection()
+        return connection.execute('SELECT pg_export_snapshot()').scalar()
+
+    @staticmethod
+    def change_horizon(connection=None):
+        """Return point in time up to which all the changes of approved imeis are visible to the caller.
+
+        It is the start of the oldest transaction which is still writing, changes of such transaction are
+        stamped later than its start but become visible only once it commits. Must be the first statement
+        of a REPEATABLE READ transaction so that the horizon is not later than its snapshot.
+        """
+        connection = connection or db.session.connection()
+        query = """SELECT LEAST(now(), min(xact_start))::timestamp
+                     FROM pg_stat_activity
+                    WHERE backend_xid IS NOT NULL AND pid <> pg_backend_pid()"""
+        return connection.execute(query).scalar()
+
+    @staticmethod
+    def select_export(list_type, first_id=None, last_id=None, since=None, connection=None):
+        """Select imeis of a registration list into the list_export temp table, returns number of imeis.
+
+        Full list consists of all the imeis which are not removed, delta list of those which are changed
+        since the watermark of the previous list through the index on updated_at, or since their own
+        last export when there is no watermark yet. The selection can be limited to a shard of ids, the
+        temp table lives until the end of the current transaction.
+        """
+        connection = connection or db.session.connection()
+        connection.execute('DROP TABLE IF EXISTS list_export')
+        connection.execute('CREATE TEMP TABLE list_export (id INTEGER PRIMARY KEY) ON COMMIT DROP')
+        if list_type == 'full':
+            changed = ''
+        elif since is not None:
+            changed = 'AND (updated_at > :since OR updated_at IS NULL)'
+        else:
+            changed = 'AND (exported_at IS NULL OR updated_at IS NULL OR updated_at > exported_at)'
+        query = text("""INSERT INTO list_export
+                        SELECT id
+                          FROM approvedimeis
+                         WHERE removed = FALSE {0} {1}""".format(
+            changed, '' if first_id is None else 'AND id BETWEEN :first_id AND :last_id'))
+        res = connection.execute(query, first_id=first_id, last_id=last_id, since=since)
+        count = res.rowcount
+        res.close()
+        connection.execute('ANALYZE list_export')
+        return count
+
+    @staticmethod
+    def export_shards(shards, connection=None):
+        """Split selected imeis into at most shards contiguous ranges of ids of about equal size."""
+        connection = connection or db.session.connection()
+        query = text("""SELECT min(id), max(id)
+                          FROM (SELECT id, ntile(:shards) OVER (ORDER BY id) AS shard
+                                  FROM list_export) AS list_shards
+                      GROUP BY shard
+                      ORDER BY shard""")
+        return [(first_id, last_id) for first_id, last_id in connection.execute(query, shards=shards)]
+
+    @staticmethod
+    def cache_metadata(connection=None):
+        """Resolve make, model, device type and technologies once per request of the selected imeis.
+
+        The metadata is kept in the list_metadata temp table keyed by request id, so imeis of the list
+        are joined with it instead of aggregating devices of their request per imei.
+        """
+        connection = connection or db.session.connection()
+        connection.execute('DROP TABLE IF EXISTS list_metadata')
+        connection.execute("""CREATE TEMP TABLE list_metadata ON COMMIT DROP AS
+                                WITH requests AS (SELECT DISTINCT approvedimeis.request_id
+                                                    FROM list_export
+                                                    JOIN approvedimeis ON approvedimeis.id = list_export.id),
+                                     devices AS (SELECT DISTINCT ON (device.reg_details_id)
+                                                        device.reg_details_id AS request_id,
+                                                        regdevice.id AS reg_device_id,
+                                                        regdevice.brand,
+                                                        regdevice.model_name,
+                                                        regdevice.model_num,
+                                                        devicetype.description AS device_type
+                                                   FROM requests
+                                                   JOIN device ON device.reg_details_id = requests.request_id
+                                                   JOIN regdevice ON regdevice.id = device.reg_device_id
+                                              LEFT JOIN devicetype ON devicetype.id = regdevice.device_types_id
+                                               ORDER BY device.reg_details_id, device.id DESC)
+                              SELECT devices.request_id,
+                                     devices.brand,
+                                     devices.model_name,
+                                     devices.model_num,
+                                     devices.device_type,
+                                     (SELECT string_agg(DISTINCT technologies.description::text, ', ')
+                                        FROM devicetechnology
+                                        JOIN technologies ON technologies.id = devicetechnology.technology_id
+                                       WHERE devicetechnology.reg_device_id = devices.reg_device_id)
+                                         AS technologies
+                                FROM devices""")
+        connection.execute('ALTER TABLE list_metadata ADD PRIMARY KEY (request_id)')
+        connection.execute('ANALYZE list_metadata')
+
+    @staticmethod
+    def copy_exported(list_type, output, header=True, connection=None):
+        """Write selected imeis along with the cached metadata of their requests as csv to the output file."""
+        connection = connection or db.session.connection()
+        change_type = ', approvedimeis.delta_status AS change_type' if list_type == 'delta' else ''
+        query = """COPY (SELECT approvedimeis.imei AS "APPROVED_IMEI",
+                                list_metadata.brand AS make,
+                                list_metadata.model_name AS model,
+                                approvedimeis.status,
+                                list_metadata.model_num AS model_number,
+                                list_metadata.brand AS brand_name,
+                                list_metadata.device_type,
+                                list_metadata.technologies AS radio_interface{0}
+                           FROM list_export
+                           JOIN approvedimeis ON approvedimeis.id = list_export.id
+                      LEFT JOIN list_metadata ON list_metadata.request_id = approvedimeis.request_id
+                       ORDER BY approvedimeis.id) TO STDOUT WITH CSV{1}""".format(change_type,
+                                                                             ' HEADER' if header else '')
+        cursor = connection.connection.cursor()
+        try:
+            cursor.copy_expert(query, output)
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def mark_exported(exported_at, watermark):
+        """Flag selected imeis as exported in a single statement, returns number of imeis flagged.
+
+        Imeis never updated are stamped with the watermark of the list so they are not part of the next
+        delta list unless changed.
+        """
+        query = text("""UPDATE approvedimeis
+                           SET exported = TRUE,
+                               exported_at = :exported_at,
+                               updated_at = COALESCE(updated_at, :watermark),
+                               removed = CASE WHEN status = 'removed' THEN TRUE ELSE removed END
+                          FROM list_export
+                         WHERE approvedimeis.id = list_export.id""")
+        res = db.session.connection().execute(query, exported_at=exported_at, watermark=watermark)
+        count = res.rowcount
+        res.close()
+        return count
@@ -13,6 +13,7 @@ Redistribution and use in source and binary forms, with or without modification,
 
 NO EXPRESS OR IMPLIED LICENSES TO ANY PARTY'S PATENT RIGHTS ARE GRANTED BY THIS LICENSE. THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 """
+from sqlalchemy import text
 from sqlalchemy.exc import SQLAlchemyError
 
 from app import db
@@ -100,34 +101,41 @@ class ImeiAssociation(db.Model):
             raise Exception
 
     @staticmethod
-    def update_export_date(id):
-        """Method to update exported_at when IMEI is exported"""
-        try:
-            associated_imeis = ImeiAssociation.query.filter_by(id=id).first()
-            associated_imeis.exported_at = db.func.now()
-            db.session.commit()
-        except Exception:
-            db.session.rollback()
-            raise Exception
+    def iter_export(list_type, chunk_size=10000):
+        """Stream associations of a DDCDS list ordered by id in chunks of (id, uid, imei, change_type) rows.
 
-    @staticmethod
-    def mark_exported(id):
-        """Method to mark IMEI as exported"""
+        Full list holds all the active associations, delta list the associations not exported yet and
+        the exported ones which are de-associated since their export.
+        """
+        if list_type == 'full':
+            query = """SELECT id, uid, imei, NULL AS change_type
+                         FROM public.associatedimeis
+                        WHERE end_date IS NULL
+                     ORDER BY id"""
+        else:
+            query = """SELECT id, uid, imei, CASE WHEN end_date IS NULL THEN 'add' ELSE 'remove' END AS change_type
+                         FROM public.associatedimeis
+                        WHERE (exported = FALSE AND end_date IS NULL)
+                           OR (exported = TRUE AND end_date > exported_at)
+                     ORDER BY id"""
+        result = db.session.connection().execution_options(stream_results=True).execute(text(query))
         try:
-            exported_imei = ImeiAssociation.query.filter_by(id=id).first()
-            exported_imei.exported_at = db.func.now()
-            exported_imei.exported = True
-            db.session.commit()
-        except Exception:
-            db.session.rollback()
-            raise Exception
+            while True:
+                rows = result.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            result.close()
 
     @staticmethod
-    def get_all_imeis():
-        """Method to get list of all IMEIs"""
-        query = 'select * from public.associatedimeis'
-        results = db.engine.execute(query)
-        return results
+    def bulk_mark_exported(ids):
+        """Method to mark IMEIs as exported at the time of the current transaction in a single statement."""
+        query = text("""UPDATE public.associatedimeis
+                           SET exported = TRUE, exported_at = now()
+                         WHERE id = ANY(:ids)""")
+        res = db.session.execute(query, {'ids': list(ids)})
+        res.close()
 
     @staticmethod
     def bulk_exists(imeis):
@@ -15,9 +15,10 @@ NO EXPRESS OR IMPLIED LICENSES TO ANY PARTY'S PATENT RIGHTS ARE GRANTED BY THIS
 """
 from app import db, app
 from app.api.v1.models.deregimei import DeRegImei
+from app.api.v1.helpers.pipeline import RequestPipeline
 from app.api.v1.helpers.utilities import Utilities
+from sqlalchemy import text
 import json
-import threading
 from app.api.v1.models.deregdetails import DeRegDetails
 
 
@@ -74,6 +75,10 @@ class DeRegDevice(db.Model):
         # tac_index = db.Index('dereg_device_tac', cls.tac)
         # tac_index.create(bind=engine)
 
+        details_id_index = db.Index('dereg_device_details_id', cls.dereg_details_id,
+                                    postgresql_concurrently=True)
+        details_id_index.create(bind=engine)
+
     @classmethod
     def curate_args(cls, args, dereg):
         """Curate http request args."""
@@ -94,16 +99,14 @@ class DeRegDevice(db.Model):
         return device
 
     @classmethod
-    def bulk_insert_imeis(cls, devices, imei_tac_map, old_devices, imeis_list, dereg):
-        """Insert IMEIs in bulk."""
+    def bulk_insert_imeis(cls, old_devices, dereg):
+        """Clear old devices of the request and start the pipeline which inserts IMEIs of the devices in bulk."""
         try:
-            dereg.update_processing_status('Processing')
-            db.session.commit()
-            thread = threading.Thread(daemon=True, target=cls.async_create, args=(devices, imei_tac_map, old_devices,
-                                                                                  dereg.id, imeis_list, app))
-            thread.start()
+            cls.clear_devices(old_devices)
+            RequestPipeline.start(dereg, 'de_registration', auto_review=app.config['AUTOMATE_IMEI_CHECK'])
         except Exception as e:
             app.logger.exception(e)
+            db.session.rollback()
             dereg.update_processing_status('Failed')
             db.session.commit()
 
@@ -117,120 +120,86 @@ class DeRegDevice(db.Model):
         return created_devices
 
     @classmethod
-    def async_create(cls, devices, imei_tac_map, old_devices, dereg_id, imeis_list, app):
-        """Async create a new device."""
-        with app.app_context():
-            from app import db
-            dereg = DeRegDetails.get_by_id(dereg_id)
-            try:
-                DeRegDevice.clear_devices(old_devices)
-                for device in devices:
-                    device_imeis = imei_tac_map.get(device.get('tac'))
-                    dereg_imei_list = DeRegImei.get_deregimei_list(device.get('id'), device_imeis)
-                    res = db.engine.execute(DeRegImei.__table__.insert(), dereg_imei_list)
-                    res.close()
-                dereg.update_processing_status('Processed')
-                db.session.commit()
-                task_id = Utilities.generate_summary(imeis_list, dereg.tracking_id)
-                if task_id:
-                    Utilities.pool_summary_request(task_id, dereg, app)
-                else:
-                    dereg.update_processing_status('Failed')
-                    db.session.commit()
-
-                if app.config['AUTOMATE_IMEI_CHECK']:
-                    if DeRegDevice.auto_approve(task_id, dereg):
-                        print("Auto Approved/Rejected DeRegistration Application Id:" + str(dereg.id))
-
-            except Exception as e:
-                app.logger.exception(e)
-                db.session.rollback()
-                dereg.update_processing_status('Failed')
-                dereg.update_report_status('Failed')
-                db.session.commit()
+    def bulk_copy_imeis(cls, dereg_details_id, imei_tac_map):
+        """Replace IMEIs of all the devices of a request using COPY, IMEIs are looked up by device TAC."""
+        db.session.execute(text("""DELETE FROM deregimei
+                                    WHERE device_id IN (SELECT id
+                                                          FROM deregdevice
+                                                         WHERE dereg_details_id = :dereg_details_id)"""),
+                           {'dereg_details_id': dereg_details_id})
+        devices = cls.get_devices_by_dereg_id(dereg_details_id)
+        rows = ((imei, imei[0:14], device.id) for device in devices for imei in imei_tac_map.get(device.tac) or [])
+        return Utilities.copy_rows(DeRegImei.__tablename__, ['imei', 'norm_imei', 'device_id'], rows)
 
     @staticmethod
-    def auto_approve(task_id, reg_details):
-        # TODO: Need to remove duplicated session which throws warning
-        from app.api.v1.resources.reviewer import SubmitReview
+    def auto_approve(result, reg_details):
+        """Auto approve/reject a de-registration request based on its compliance summary.
+
+        The decision (quota, de-registered imeis, comments, status and notification) is committed at once
+        along with the pending changes of the caller. Errors are raised to the caller.
+        """
+        from app.api.v1.models.approvedimeis import ApprovedImeis
+        from app.api.v1.models.deregcomments import DeRegComments
         from app.api.v1.models.devicequota import DeviceQuota as DeviceQuotaModel
+        from app.api.v1.models.notification import Notification
         from app.api.v1.models.status import Status
         from app.api.v1.models.eslog import EsLog
-        import json
-        sr = SubmitReview()
 
-        try:
-            result = Utilities.check_request_status(task_id)
-            section_status = 6
-            sections_comment = "Auto"
-            auto_approved_sections = ['device_quota', 'device_description', 'imei_classification',
-                                      'imei_registration']
-
-            if result:
-                if result['non_compliant'] != 0 or result['stolen'] != 0 or result['compliant_active'] != 0 \
-                        or result['provisional_non_compliant'] != 0:
-                    sections_comment = sections_comment + ' Rejected, Device/s found in Non-Compliant State'
-                    status = 'Rejected'
-                    section_status = 7
-                    message = 'Your request {id} has been rejected because Non-Compliant Device Found in it.'.format(id=reg_details.id)
-                else:
-                    sections_comment = sections_comment + ' Approved'
-                    status = 'Approved'
-                    message = 'Your request {id} has been Approved'.format(id=reg_details.id)
-
-                if status == 'Approved':
-                    # checkout device quota
-                    imeis = DeRegDetails.get_normalized_imeis(reg_details)
-                    user_quota = DeviceQuotaModel.get(reg_details.user_id)
-                    current_quota = user_quota.reg_quota
-                    user_quota.reg_quota = current_quota - len(imeis)
-                    DeviceQuotaModel.commit_quota_changes(user_quota)
-                    imeis = DeRegDetails.get_normalized_imeis(reg_details)
-
-                    Utilities.de_register_imeis(imeis)
-
-                    for section in auto_approved_sections:
-                        DeRegDetails.add_comment(section, sections_comment, reg_details.user_id, 'Auto Reviewed'
-                                                 , section_status, reg_details.id)
-
-                sr._SubmitReview__generate_notification(user_id=reg_details.user_id, request_id=reg_details.id,
-                                                        request_type='de-registration', request_status=section_status,
-                                                        message=message)
-
-                reg_details.summary = json.dumps({'summary': result})
-                reg_details.report = result.get('compliant_report_name')
-                reg_details.update_report_status('Processed')
-                reg_details.update_status(status)
-                reg_details.report_allowed = True
-                reg_details.save()
-                db.session.commit()
-                # create log
-                log = EsLog.auto_review(reg_details, "De-Registration Request", 'Post', status)
-                EsLog.insert_log(log)
-                return True
+        section_status = 6
+        sections_comment = "Auto"
+        auto_approved_sections = ['device_quota', 'device_description', 'imei_classification',
+                                  'imei_registration']
+
+        if result:
+            if result['non_compliant'] != 0 or result['stolen'] != 0 or result['compliant_active'] != 0 \
+                    or result['provisional_non_compliant'] != 0:
+                sections_comment = sections_comment + ' Rejected, Device/s found in Non-Compliant State'
+                status = 'Rejected'
+                section_status = 7
+                message = 'Your request {id} has been rejected because Non-Compliant Device Found in it.'.format(id=reg_details.id)
             else:
-                reg_details.update_processing_status('Failed')
-                reg_details.update_report_status('Failed')
-                reg_details.update_status('Failed')
-                db.session.commit()
-                log = EsLog.auto_review(reg_details, "De-Registration Request", 'Post',
-                                        Status.get_status_type(reg_details.status))
-                EsLog.insert_log(log)
-
-        except Exception as e: # pragma: no cover
-            app.logger.exception(e)
-            db.session.rollback()
+                sections_comment = sections_comment + ' Approved'
+                status = 'Approved'
+                message = 'Your request {id} has been Approved'.format(id=reg_details.id)
+
+            if status == 'Approved':
+                # checkout device quota
+                imeis = DeRegDetails.get_normalized_imeis(reg_details)
+                user_quota = DeviceQuotaModel.get(reg_details.user_id)
+                user_quota.reg_quota = user_quota.reg_quota - len(imeis)
+                db.session.add(user_quota)
+
+                ApprovedImeis.bulk_de_register_imeis(imeis)
+
+                for section in auto_approved_sections:
+                    DeRegComments.add(section, sections_comment, reg_details.user_id, 'Auto Reviewed',
+                                      section_status, reg_details.id)
+
+            db.session.add(Notification(reg_details.user_id, reg_details.id, 'de-registration', section_status,
+                                        message))
+
+            reg_details.summary = json.dumps({'summary': result})
+            reg_details.report = result.get('compliant_report_name')
+            reg_details.update_report_status('Processed')
+            reg_details.update_status(status)
+            reg_details.report_allowed = True
+            reg_details.save()
+            reviewed = True
+        else:
             reg_details.update_processing_status('Failed')
+            reg_details.update_report_status('Failed')
             reg_details.update_status('Failed')
-            message = 'Your request {id} has failed please re-initiate device request'.format(id=reg_details.id)
-            sr._SubmitReview__generate_notification(user_id=reg_details.user_id, request_id=reg_details.id,
-                                                    request_type='registration', request_status=7,
-                                                    message=message)
-            db.session.commit()
-            # create log
-            log = EsLog.auto_review(reg_details, "De-Registration Request", 'Post',
-                                    Status.get_status_type(reg_details.status))
-            EsLog.insert_log(log)
+            reg_details.save()
+            status = Status.get_status_type(reg_details.status)
+            reviewed = False
+        db.session.commit()
+
+        # create log, the decision is already committed
+        try:
+            EsLog.insert_log(EsLog.auto_review(reg_details, "De-Registration Request", 'Post', status))
+        except Exception as e:  # pragma: no cover
+            app.logger.exception(e)
+        return reviewed
 
     def save(self):
         """Save the current state of the model."""
@@ -259,7 +228,7 @@ class DeRegDevice(db.Model):
         """Clear old devices of the request."""
         # device_ids = map(lambda device: device.id, old_devices)
         stmt = cls.__table__.delete().where(cls.id.in_(old_devices))
-        res = db.engine.execute(stmt)
+        res = db.session.execute(stmt)
         res.close()
 
     @classmethod
@@ -13,6 +13,8 @@ Redistribution and use in source and binary forms, with or without modification,
 
 NO EXPRESS OR IMPLIED LICENSES TO ANY PARTY'S PATENT RIGHTS ARE GRANTED BY THIS LICENSE. THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 """
+from sqlalchemy import text
+
 from app import db
 
 
@@ -36,11 +38,11 @@ class DeRegImei(db.Model):
     def create_index(cls, engine):
         """ Create Indexes for De-Registration imeis table. """
 
-        # dereg_imei = db.Index('dereg_imei_index', cls.imei)
-        # dereg_imei.create(bind=engine)
+        dereg_imei = db.Index('dereg_imei_index', cls.imei, postgresql_concurrently=True)
+        dereg_imei.create(bind=engine)
 
-        # dereg_imei_norm = db.Index('dereg_norm_imei_index', cls.norm_imei)
-        # dereg_imei_norm.create(bind=engine)
+        dereg_imei_norm = db.Index('dereg_norm_imei_index', cls.norm_imei, postgresql_concurrently=True)
+        dereg_imei_norm.create(bind=engine)
 
     @classmethod
     def get_deregimei_list(cls, device_id, imeis):
@@ -61,3 +63,12 @@ class DeRegImei(db.Model):
         """Get an IMEI."""
         imei = DeRegImei.query.filter_by(imei=imei).first()
         return imei
+
+    @staticmethod
+    def get_request_imeis(dereg_details_id):
+        """Return imeis of all the devices of a de-registration request."""
+        query = text("""SELECT deregimei.imei
+                          FROM deregimei
+                          JOIN deregdevice ON deregdevice.id = deregimei.device_id
+                         WHERE deregdevice.dereg_details_id = :dereg_details_id""")
+        return [row[0] for row in db.session.execute(query, {'dereg_details_id': dereg_details_id})]
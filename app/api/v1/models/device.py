@@ -13,10 +13,12 @@ Redistribution and use in source and binary forms, with or without modification,
 
 NO EXPRESS OR IMPLIED LICENSES TO ANY PARTY'S PATENT RIGHTS ARE GRANTED BY THIS LICENSE. THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 """
-import ast
-import threading
+from itertools import chain
+
+from sqlalchemy import text
 
 from app import db
+from app.api.v1.helpers.pipeline import RequestPipeline
 from app.api.v1.helpers.utilities import Utilities
 from app.api.v1.models.approvedimeis import ApprovedImeis
 from app.api.v1.models.imeidevice import ImeiDevice
@@ -48,226 +50,116 @@ class Device(db.Model):
         # reg_tac.create(bind=engine)
 
     @classmethod
-    def async_bulk_create(cls, reg_details, reg_device_id, app):  # pragma: no cover
-        """Create devices async."""
-        with app.app_context():
-            from app import db
-            try:
-                filename = reg_details.file
-                tracking_id = reg_details.tracking_id
-                args = {'imei_per_device': reg_details.imei_per_device, 'device_count': reg_details.device_count}
-                response = Utilities.process_reg_file(filename, tracking_id, args)
-                imeis = []
-                for device_imeis in response:
-                    tac = Utilities.get_imei_tac(device_imeis[0])
-                    device = cls(tac, reg_details.id, reg_device_id)
-                    db.session.add(device)
-                    db.session.flush()
-                    imeis = imeis + device_imeis
-                    for imei in device_imeis:
-                        imei_device = ImeiDevice(imei, device.id)
-                        db.session.add(imei_device)
-                        imei_object = ApprovedImeis.query.filter_by(imei=imei[:14]).first()
-                        if not imei_object:
-                            approved_imei = ApprovedImeis(imei[:14], reg_details.id, 'pending', 'add')
-                            db.session.add(approved_imei)
-                        elif imei_object and imei_object.status == 'removed':
-                            imei_object.status = 'pending'
-                            imei_object.delta_status = 'add'
-                            imei_object.removed = False
-                            imei_object.request_id = reg_details.id
-                            db.session.add(imei_object)
-                db.session.commit()
-                reg_details.update_processing_status('Processed')
-                db.session.commit()
-                task_id = Utilities.generate_summary(imeis, reg_details.tracking_id)
-                app.logger.info('task with task_id: {0} initiated'.format(task_id))
-                if task_id:
-                    Utilities.pool_summary_request(task_id, reg_details, app)
-                else:
-                    reg_details.update_report_status('Failed')
-                    app.logger.info('task with task_id: {0} failed'.format(task_id))
-                    db.session.commit()
-
-                if app.config['AUTOMATE_IMEI_CHECK']:
-                    if Device.auto_approve(task_id, reg_details, imeis, app):
-                        print("Auto Approved/Rejected Registration Application Id:" + str(reg_details.id))
-
-            except Exception as e:
-                app.logger.exception(e)
-                db.session.rollback()
-                reg_details.update_processing_status('Failed')
-                reg_details.update_report_status('Failed')
-                db.session.commit()
-
-    @classmethod
-    def sync_bulk_create(cls, reg_details, reg_device_id, app, ussd=None):
-        """Create devices in bulk."""
-        try:
-            flatten_imeis = []
-
-            if ussd is None:
-                imeis_lists = ast.literal_eval(reg_details.imeis)
-            else:
-                imeis_lists = []
-                ims = reg_details.imeis
-                imeis_lists.append(list(ims.strip('}{').split(",")))
-
-            for device_imeis in imeis_lists:
-
-                device = cls(device_imeis[0][:8], reg_details.id, reg_device_id)
-                device.save()
-
-                for imei in device_imeis:
-                    flatten_imeis.append(imei)
-                    imei_device = ImeiDevice(imei, device.id)
-                    db.session.add(imei_device)
-                    imei_object = ApprovedImeis.query.filter_by(imei=imei[:14]).first()
-                    if not imei_object:
-                        approved_imei = ApprovedImeis(imei[:14], reg_details.id, 'pending', 'add')
-                        db.session.add(approved_imei)
-                    elif imei_object and imei_object.status == 'removed':
-                        imei_object.status = 'pending'
-                        imei_object.removed = False
-                        imei_object.request_id = reg_details.id
-                        db.session.add(imei_object)
-            reg_details.update_processing_status('Processed')
-            reg_details.update_report_status('Processing')
-            db.session.commit()
-
-            task_id = Utilities.generate_summary(flatten_imeis, reg_details.tracking_id)
-
-            if task_id:
-                Utilities.pool_summary_request(task_id, reg_details, app)
-            else:
-                reg_details.update_report_status('Failed')
-                db.session.commit()
-                exit()
-
-            if app.config['AUTOMATE_IMEI_CHECK'] or ussd:
-                if Device.auto_approve(task_id, reg_details, flatten_imeis, app):
-                    app.logger.info("Auto Approved/Rejected Registration Application Id:" + str(reg_details.id))
-
-        except Exception as e:  # pragma: no cover
-            reg_details.update_processing_status('Failed')
-            reg_details.update_report_status('Failed')
-            app.logger.exception(e)
-            db.session.commit()
+    def bulk_create_devices(cls, reg_details, reg_device_id, devices):
+        """Create devices of a request along with their imeis in bulk, returns number of imeis.
+
+        Device ids are reserved from the sequence upfront so that devices and imeis can both be
+        loaded with COPY, approved imeis are then resolved with a single set based statement.
+        Devices are only iterated so lazily decoded DeviceImeis are streamed instead of materialized.
+        """
+        if len(devices) == 0:
+            return 0
+        connection = db.session.connection()
+        ids_query = text("""SELECT nextval(pg_get_serial_sequence('device', 'id'))
+                               FROM generate_series(1, :count)""")
+        device_ids = [row[0] for row in connection.execute(ids_query, count=len(devices))]
+        Utilities.copy_rows(cls.__tablename__, ['id', 'tac', 'reg_details_id', 'reg_device_id'],
+                            ((device_id, Utilities.get_imei_tac(device_imeis[0]), reg_details.id, reg_device_id)
+                             for device_id, device_imeis in zip(device_ids, devices)))
+        count = ImeiDevice.bulk_copy(zip(device_ids, devices))
+        ApprovedImeis.bulk_upsert_request_imeis(
+            (Utilities.get_normalized_imei(imei) for imei in chain.from_iterable(devices)), reg_details.id)
+        return count
 
     @staticmethod
-    def auto_approve(task_id, reg_details, flatten_imeis, app):
-        from app.api.v1.resources.reviewer import SubmitReview
+    def auto_approve(result, reg_details, app):
+        """Auto approve/reject a registration request based on its compliance summary.
+
+        The decision (quota, comments, status and notification) is committed at once by ReviewDecision.start
+        along with the pending changes of the caller, imeis of the request are changed by the review task.
+        Errors are raised to the caller.
+        """
+        from app.api.v1.helpers.reviewdecision import ReviewDecision
         from app.api.v1.models.devicequota import DeviceQuota as DeviceQuotaModel
         from app.api.v1.models.eslog import EsLog
-        from app.api.v1.models.status import Status
+        from app.api.v1.models.notification import Notification
+        from app.api.v1.models.regcomments import RegComments
         import json
-        sr = SubmitReview()
-        try:
-                result = Utilities.check_request_status(task_id)
-                duplicate_imeis = RegDetails.get_duplicate_imeis(reg_details)
-                res = RegDetails.get_imeis_count(reg_details.user_id)
+        duplicate_imeis = RegDetails.get_duplicate_imeis(reg_details)
+        sections_comment = "Auto"
+        section_status = 6
+        auto_approved_sections = ['device_quota', 'device_description', 'imei_classification',
+                                  'imei_registration']
+
+        if result:
+            if result['non_compliant'] != 0 or result['stolen'] != 0 or result['compliant_active'] != 0 \
+                    or result['provisional_non_compliant'] != 0 or result['provisional_compliant'] != 0:
+                sections_comment = sections_comment + ' Rejected, Device/Devices found in Non-Compliant States'
+                status = 'Rejected'
+                section_status = 7
+                message = 'Your request {id} has been rejected'.format(id=reg_details.id)
+            else:
+                sections_comment = sections_comment + ' Approved'
+                status = 'Approved'
+                message = 'Your request {id} has been Approved'.format(id=reg_details.id)
+
+            if duplicate_imeis:
+                Utilities.generate_imeis_file(duplicate_imeis, reg_details.tracking_id, 'duplicated_imeis')
+                reg_details.duplicate_imeis_file = '{upload_dir}/{tracking_id}/{file}'.format(
+                    upload_dir=app.config['DRS_UPLOADS'],
+                    tracking_id=reg_details.tracking_id,
+                    file='duplicated_imeis.txt'
+                )
                 sections_comment = "Auto"
-                section_status = 6
-                auto_approved_sections = ['device_quota', 'device_description', 'imei_classification',
-                                          'imei_registration']
-
-                if result:
-                    flatten_imeis = Utilities.bulk_normalize(flatten_imeis)
-
-                    if result['non_compliant'] != 0 or result['stolen'] != 0 or result['compliant_active'] != 0 \
-                            or result['provisional_non_compliant'] != 0 or result['provisional_compliant'] != 0:
-                        sections_comment = sections_comment + ' Rejected, Device/Devices found in Non-Compliant States'
-                        status = 'Rejected'
-                        section_status = 7
-                        message = 'Your request {id} has been rejected'.format(id=reg_details.id)
-                    else:
-                        sections_comment = sections_comment + ' Approved'
-                        status = 'Approved'
-                        message = 'Your request {id} has been Approved'.format(id=reg_details.id)
-
-                    if duplicate_imeis:
-                        res.update({'duplicated': len(RegDetails.get_duplicate_imeis(reg_details))})
-                        Utilities.generate_imeis_file(duplicate_imeis, reg_details.tracking_id, 'duplicated_imeis')
-                        reg_details.duplicate_imeis_file = '{upload_dir}/{tracking_id}/{file}'.format(
-                            upload_dir=app.config['DRS_UPLOADS'],
-                            tracking_id=reg_details.tracking_id,
-                            file='duplicated_imeis.txt'
-                        )
-                        sections_comment = "Auto"
-                        status = 'Rejected'
-                        sections_comment = sections_comment + ' Rejected, Duplicate IMEIS Found, Please check duplicate file'
-                        section_status = 7
-                        message = 'Your request {id} has been rejected because duplicate imeis found!'.format(id=reg_details.id)
-
-                    if status == 'Approved':
-                        # checkout device quota
-                        imeis = RegDetails.get_normalized_imeis(reg_details)
-                        user_quota = DeviceQuotaModel.get(reg_details.user_id)
-                        current_quota = user_quota.reg_quota
-                        user_quota.reg_quota = current_quota - len(imeis)
-                        DeviceQuotaModel.commit_quota_changes(user_quota)
-                        sr._SubmitReview__update_to_approved_imeis(flatten_imeis)
-                    else:
-                        sr._SubmitReview__change_rejected_imeis_status(flatten_imeis)
-
-                    for section in auto_approved_sections:
-                        RegDetails.add_comment(section, sections_comment, reg_details.user_id, 'Auto Reviewed',
-                                               section_status, reg_details.id)
-
-                    reg_details.summary = json.dumps({'summary': result})
-                    reg_details.report = result.get('compliant_report_name')
-                    reg_details.update_report_status('Processed')
-                    reg_details.report_allowed = True
-                    reg_details.update_status(status)
-
-                    sr._SubmitReview__generate_notification(user_id=reg_details.user_id, request_id=reg_details.id,
-                                                 request_type='registration', request_status=section_status,
-                                                 message=message)
-
-                    reg_details.save()
-                    db.session.commit()
-
-                    # create log
-                    log = EsLog.auto_review(reg_details, "Registration Request", 'Post', status)
-                    EsLog.insert_log(log)
-
-        except Exception as e:  # pragma: no cover
-            db.session.rollback()
-            reg_details.update_processing_status('Failed')
-            reg_details.update_status('Failed')
-            message = 'Your request {id} has failed please re-initiate device request'.format(id=reg_details.id)
-            sr._SubmitReview__generate_notification(user_id=reg_details.user_id, request_id=reg_details.id,
-                                                    request_type='registration', request_status=7,
-                                                    message=message)
-            db.session.commit()
-            app.logger.exception(e)
-            # create log
-            log = EsLog.auto_review(reg_details, "Registration Request", 'Post',
-                                    Status.get_status_type(reg_details.status))
-            EsLog.insert_log(log)
-
-        return True
+                status = 'Rejected'
+                sections_comment = sections_comment + ' Rejected, Duplicate IMEIS Found, Please check duplicate file'
+                section_status = 7
+                message = 'Your request {id} has been rejected because duplicate imeis found!'.format(id=reg_details.id)
+
+            if status == 'Approved':
+                # checkout device quota
+                imeis_count = ImeiDevice.count_request_imeis(reg_details.id)
+                user_quota = DeviceQuotaModel.get(reg_details.user_id)
+                user_quota.reg_quota = user_quota.reg_quota - imeis_count
+                db.session.add(user_quota)
+
+            for section in auto_approved_sections:
+                RegComments.add(section, sections_comment, reg_details.user_id, 'Auto Reviewed', section_status,
+                                reg_details.id)
+
+            reg_details.summary = json.dumps({'summary': result})
+            reg_details.report = result.get('compliant_report_name')
+            reg_details.update_report_status('Processed')
+            reg_details.report_allowed = True
+            reg_details.update_status(status)
+            db.session.add(Notification(reg_details.user_id, reg_details.id, 'registration', section_status, message))
+            reg_details.save()
+
+            ReviewDecision.start(reg_details.id, 'approve' if status == 'Approved' else 'reject', background=True)
+
+            # create log, the decision is already committed
+            try:
+                EsLog.insert_log(EsLog.auto_review(reg_details, "Registration Request", 'Post', status))
+            except Exception as e:  # pragma: no cover
+                app.logger.exception(e)
 
     @classmethod
     def create(cls, reg_details, reg_device_id, ussd=None):
-        """Create a new device for a request."""
+        """Create a new device for a request.
+
+        Devices are created by the request pipeline, for the requests not imported from a file devices
+        are persisted before returning and the remaining stages are queued.
+        """
         from app import app
         try:
-            reg_details.update_processing_status('Processing')
-            db.session.commit()
-            cls.bulk_delete(reg_details)
-            ApprovedImeis.bulk_delete_imeis(reg_details)
-
-            if reg_details.import_type == 'file':
-                thread = threading.Thread(daemon=True, target=cls.async_bulk_create,
-                                          args=(reg_details, reg_device_id, app))
-                thread.start()
-            else:
-                cls.sync_bulk_create(reg_details, reg_device_id, app, ussd)
-
+            auto_review = bool(app.config['AUTOMATE_IMEI_CHECK'] or ussd)
+            RequestPipeline.start(reg_details, 'registration', auto_review=auto_review, ussd=bool(ussd),
+                                  eager=reg_details.import_type != 'file')
         except Exception as e:  # pragma: no cover
             app.logger.exception(e)
+            db.session.rollback()
             reg_details.update_processing_status('Failed')
+            reg_details.update_report_status('Failed')
             db.session.commit()
 
     def save(self):
@@ -285,10 +177,10 @@ class Device(db.Model):
         device = cls.query.filter_by(reg_details_id=reg_id).first()
         return device
 
-    @classmethod
-    def bulk_delete(cls, regdetails):
-        """Delete devices of a request in bulk."""
-        device_ids = map(lambda device: device.id, regdetails.devices)
-        stmt = cls.__table__.delete().where(cls.id.in_(device_ids))
-        res = db.engine.execute(stmt)
-        res.close()
+    @staticmethod
+    def delete_request_devices(reg_details_id):
+        """Delete devices along with their imeis and approved imeis of a request."""
+        db.session.execute(text("""DELETE FROM approvedimeis WHERE request_id = :request_id"""),
+                           {'request_id': reg_details_id})
+        db.session.execute(text("""DELETE FROM device WHERE reg_details_id = :request_id"""),
+                           {'request_id': reg_details_id})
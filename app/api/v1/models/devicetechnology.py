@@ -61,7 +61,7 @@ class DeviceTechnology(db.Model):
         """Delete devices technologies."""
         ids = map(lambda x: x.id, reg_device.device_technologies)
         stmt = cls.__table__.delete().where(cls.id.in_(ids))
-        res = db.engine.execute(stmt)
+        res = db.session.execute(stmt)
         res.close()
 
     @classmethod
@@ -14,7 +14,7 @@ Redistribution and use in source and binary forms, with or without modification,
 NO EXPRESS OR IMPLIED LICENSES TO ANY PARTY'S PATENT RIGHTS ARE GRANTED BY THIS LICENSE. THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 """
 from app import db
-from functools import lru_cache
+from app.api.v1.helpers.lookupcache import LookupCache
 
 
 class DeviceType(db.Model):
@@ -25,20 +25,18 @@ class DeviceType(db.Model):
     description = db.Column(db.String(20))
 
     @staticmethod
-    @lru_cache(maxsize=32)
     def get_device_type_id(device_type):
         """Return a device type's id."""
-        type_object = DeviceType.query.filter_by(description=device_type).first()
+        type_object = LookupCache.lookup(DeviceType, 'description', device_type)
         return type_object.id
 
     @staticmethod
-    @lru_cache(maxsize=32)
     def get_device_type_by_id(type_id):
         """Return a device type by id."""
-        type_object = DeviceType.query.filter_by(id=type_id).first()
+        type_object = LookupCache.lookup(DeviceType, 'id', type_id)
         return type_object.description
 
     @staticmethod
     def get_device_types():
         """Returns all device types."""
-        return DeviceType.query.all()
+        return LookupCache.rows(DeviceType)
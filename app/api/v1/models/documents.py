@@ -14,7 +14,7 @@ Redistribution and use in source and binary forms, with or without modification,
 NO EXPRESS OR IMPLIED LICENSES TO ANY PARTY'S PATENT RIGHTS ARE GRANTED BY THIS LICENSE. THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 """
 from app import db
-from functools import lru_cache
+from app.api.v1.helpers.lookupcache import LookupCache
 
 
 class Documents(db.Model):
@@ -27,10 +27,9 @@ class Documents(db.Model):
     required = db.Column(db.Boolean, nullable=False)
 
     @staticmethod
-    @lru_cache(maxsize=32)
     def get_label_by_id(document_id):
         """Return document label by id."""
-        document = Documents.query.filter_by(id=document_id).first()
+        document = LookupCache.lookup(Documents, 'id', document_id)
         if document:
             return document.label
         return document
@@ -46,15 +45,14 @@ class Documents(db.Model):
         return Documents.query.filter_by(type=doc_type, label=label).first()
 
     @staticmethod
-    @lru_cache(maxsize=32)
     def get_documents(doc_type):
         """Return documents by request type."""
         doc_type = 1 if doc_type == 'registration' else 2
-        return Documents.query.filter_by(type=doc_type).all()
+        return [document for document in LookupCache.rows(Documents) if document.type == doc_type]
 
     @staticmethod
-    # @lru_cache(maxsize=32)
     def get_required_docs(doc_type):
         """Return list of required documents by document type."""
         doc_type = 1 if doc_type == 'registration' else 2
-        return Documents.query.filter_by(type=doc_type, required=True).all()
+        return [document for document in LookupCache.rows(Documents)
+                if document.type == doc_type and document.required]
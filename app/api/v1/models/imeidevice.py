@@ -13,6 +13,8 @@ Redistribution and use in source and binary forms, with or without modification,
 
 NO EXPRESS OR IMPLIED LICENSES TO ANY PARTY'S PATENT RIGHTS ARE GRANTED BY THIS LICENSE. THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 """
+from sqlalchemy import text
+
 from app import db
 from app.api.v1.models.regdetails import RegDetails
 from app.api.v1.helpers.utilities import Utilities
@@ -43,6 +45,9 @@ class ImeiDevice(db.Model):
         reg_normalized_imei = db.Index('reg_normalized_imei_index', cls.normalized_imei, postgresql_concurrently=True)
         reg_normalized_imei.create(bind=engine)
 
+        reg_imei_device = db.Index('reg_imei_device_index', cls.device_id, postgresql_concurrently=True)
+        reg_imei_device.create(bind=engine)
+
     @classmethod
     def create(cls, imei, device_id):
         """Create an imei device."""
@@ -72,6 +77,38 @@ class ImeiDevice(db.Model):
         insertion_object = []
         for imei in imeis:
             insertion_object.append({'imei': imei, 'normalized_imei':  imei[0:14], 'device_id': device_id})
-        res = db.engine.execute(ImeiDevice.__table__.insert(), insertion_object)
+        res = db.session.execute(ImeiDevice.__table__.insert(), insertion_object)
         res.close()
 
+    @staticmethod
+    def bulk_copy(device_imeis):
+        """Insert imeis of many devices in bulk using COPY, expects iterable of (device_id, imeis)."""
+        rows = ((imei, imei[0:14], device_id) for device_id, imeis in device_imeis for imei in imeis)
+        return Utilities.copy_rows(ImeiDevice.__tablename__, ['imei', 'normalized_imei', 'device_id'], rows)
+
+    @staticmethod
+    def get_normalized_imeis(reg_details_id):
+        """Return normalized imeis of all the devices of a registration request."""
+        query = text("""SELECT imeidevice.normalized_imei
+                          FROM imeidevice
+                          JOIN device ON device.id = imeidevice.device_id
+                         WHERE device.reg_details_id = :reg_details_id""")
+        return [row[0] for row in db.session.execute(query, {'reg_details_id': reg_details_id})]
+
+    @staticmethod
+    def count_request_imeis(reg_details_id):
+        """Return number of imeis of all the devices of a registration request."""
+        query = text("""SELECT count(*)
+                          FROM imeidevice
+                          JOIN device ON device.id = imeidevice.device_id
+                         WHERE device.reg_details_id = :reg_details_id""")
+        return db.session.execute(query, {'reg_details_id': reg_details_id}).scalar()
+
+    @staticmethod
+    def get_request_imeis(reg_details_id):
+        """Return imeis of all the devices of a registration request."""
+        query = text("""SELECT imeidevice.imei
+                          FROM imeidevice
+                          JOIN device ON device.id = imeidevice.device_id
+                         WHERE device.reg_details_id = :reg_details_id""")
+        return [row[0] for row in db.session.execute(query, {'reg_details_id': reg_details_id})]
@@ -0,0 +1,53 @@
+"""
+DRS Imei Tally Model package.
+Copyright (c) 2018-2020 Qualcomm Technologies, Inc.
+All rights reserved.
+Redistribution and use in source and binary forms, with or without modification, are permitted (subject to the limitations in the disclaimer below) provided that the following conditions are met:
+
+    Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+    Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+    Neither the name of Qualcomm Technologies, Inc. nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+    The origin of this software must not be misrepresented; you must not claim that you wrote the original software. If you use this software in a product, an acknowledgment is required by displaying the trademark/log as per the details provided here: https://www.qualcomm.com/documents/dirbs-logo-and-brand-guidelines
+    Altered source versions must be plainly marked as such, and must not be misrepresented as being the original software.
+    This notice may not be removed or altered from any source distribution.
+
+NO EXPRESS OR IMPLIED LICENSES TO ANY PARTY'S PATENT RIGHTS ARE GRANTED BY THIS LICENSE. THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+from app import db
+
+
+class ImeiTally(db.Model):
+    """Database model for imeitally table, imei counts of the requests of each user by review state.
+
+    Rows are maintained by triggers on the request tables (see scripts/db/tallies.py) whenever status of
+    a request changes, so quota checks do not aggregate all the requests of a user.
+    """
+    __tablename__ = 'imeitally'
+
+    # request type -> tally columns of pending, registered and not registered imeis
+    COLUMNS = {
+        'registration': ('reg_pending', 'reg_registered', 'reg_not_registered'),
+        'de_registration': ('dereg_pending', 'dereg_registered', 'dereg_not_registered')
+    }
+
+    user_id = db.Column(db.String(64), primary_key=True)
+    reg_pending = db.Column(db.BigInteger, nullable=False, default=0)
+    reg_registered = db.Column(db.BigInteger, nullable=False, default=0)
+    reg_not_registered = db.Column(db.BigInteger, nullable=False, default=0)
+    dereg_pending = db.Column(db.BigInteger, nullable=False, default=0)
+    dereg_registered = db.Column(db.BigInteger, nullable=False, default=0)
+    dereg_not_registered = db.Column(db.BigInteger, nullable=False, default=0)
+
+    @classmethod
+    def get_counts(cls, user_id, request_type):
+        """Return imei counts of the user for the request type, None if the user has no tally."""
+        columns = [getattr(cls, column) for column in cls.COLUMNS[request_type]]
+        tally = db.session.query(*columns).filter(cls.user_id == user_id).first()
+        if tally is None:
+            return None
+        pending, registered, not_registered = tally
+        return {
+            'pending_registration': pending,
+            'registered': registered,
+            'not_registered': not_registered
+        }
@@ -0,0 +1,49 @@
+"""
+DRS List Watermark Model package.
+Copyright (c) 2018-2020 Qualcomm Technologies, Inc.
+All rights reserved.
+Redistribution and use in source and binary forms, with or without modification, are permitted (subject to the limitations in the disclaimer below) provided that the following conditions are met:
+
+    Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+    Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+    Neither the name of Qualcomm Technologies, Inc. nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+    The origin of this software must not be misrepresented; you must not claim that you wrote the original software. If you use this software in a product, an acknowledgment is required by displaying the trademark/log as per the details provided here: https://www.qualcomm.com/documents/dirbs-logo-and-brand-guidelines
+    Altered source versions must be plainly marked as such, and must not be misrepresented as being the original software.
+    This notice may not be removed or altered from any source distribution.
+
+NO EXPRESS OR IMPLIED LICENSES TO ANY PARTY'S PATENT RIGHTS ARE GRANTED BY THIS LICENSE. THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+from sqlalchemy import text
+
+from app import db
+
+
+class ListWatermark(db.Model):
+    """Database model for listwatermark table, holds the point up to which changes are exported per list."""
+    __tablename__ = 'listwatermark'
+
+    name = db.Column(db.String(64), primary_key=True)
+    watermark = db.Column(db.DateTime, nullable=False)
+    updated_at = db.Column(db.DateTime, default=db.func.now(), onupdate=db.func.now())
+
+    def __init__(self, name, watermark):
+        """Constructor."""
+        self.name = name
+        self.watermark = watermark
+
+    @staticmethod
+    def get(name):
+        """Return watermark of a list, None if the list was never exported."""
+        list_watermark = ListWatermark.query.filter_by(name=name).first()
+        return list_watermark.watermark if list_watermark else None
+
+    @staticmethod
+    def advance(name, watermark):
+        """Move watermark of a list forward within the current transaction, it never moves back."""
+        query = text("""INSERT INTO listwatermark (name, watermark, updated_at)
+                             VALUES (:name, :watermark, now())
+                        ON CONFLICT (name)
+                        DO UPDATE SET watermark = GREATEST(listwatermark.watermark, EXCLUDED.watermark),
+                                      updated_at = now()""")
+        res = db.session.execute(query, {'name': name, 'watermark': watermark})
+        res.close()
@@ -27,6 +27,7 @@ from app.api.v1.models.regdocuments import RegDocuments
 from app.api.v1.models.devicequota import DeviceQuota
 from app.api.v1.models.status import Status
 from app.api.v1.models.approvedimeis import ApprovedImeis
+from app.api.v1.models.imeitally import ImeiTally
 from app.api.v1.schema.regdetails import RegistrationDetailsSchema
 
 
@@ -34,6 +35,10 @@ class RegDetails(db.Model):
     """Database model for regdetails table."""
     __tablename__ = 'regdetails'
 
+    # status id -> dashboard report key of the user counts
+    DASHBOARD_STATUSES = [(1, 'new_requests'), (2, 'awaiting_document'), (3, 'pending_review'), (4, 'in_review'),
+                          (5, 'information_requested'), (6, 'approved'), (7, 'rejected')]
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.String(64), nullable=False)
     user_name = db.Column(db.String)
@@ -100,6 +105,9 @@ class RegDetails(db.Model):
         reg_request_status = db.Index('reg_request_status_index', cls.status, postgresql_concurrently=True)
         reg_request_status.create(bind=engine)
 
+        reg_user_id = db.Index('reg_user_id_index', cls.user_id, postgresql_concurrently=True)
+        reg_user_id.create(bind=engine)
+
         # reg_processing_status = db.Index('reg_processing_status_index', cls.processing_status)
         # reg_processing_status.create(bind=engine)
 
@@ -371,6 +379,10 @@ class RegDetails(db.Model):
     @staticmethod
     def get_imeis_count(user_id):
         """Method to return total imeis count of user requests."""
+        imeis_count = ImeiTally.get_counts(user_id, 'registration')
+        if imeis_count is not None:
+            return imeis_count
+
         query = """SELECT status, SUM(device_count * imei_per_device) AS imei_count
                      FROM public.regdetails
                     WHERE user_id='{0}' GROUP BY status""".format(user_id)
@@ -438,33 +450,23 @@ class RegDetails(db.Model):
         """ Fetch all the registration reports data"""
 
         if user_type != 'reviewer':
-            total_count = cls.query.filter_by(user_id=user_id).count()
-            new_request = cls.query.filter_by(user_id=user_id).filter_by(status=1).count()
-            awaiting_document = cls.query.filter_by(user_id=user_id).filter_by(status=2).count()
-            pending_review = cls.query.filter_by(user_id=user_id).filter_by(status=3).count()
-            in_review = cls.query.filter_by(user_id=user_id).filter_by(status=4).count()
-            information_requested = cls.query.filter_by(user_id=user_id).filter_by(status=5).count()
-            approved = cls.query.filter_by(user_id=user_id).filter_by(status=6).count()
-            rejected = cls.query.filter_by(user_id=user_id).filter_by(status=7).count()
+            status_counts = dict(db.session.query(cls.status, db.func.count(cls.id))
+                                 .filter(cls.user_id == user_id).group_by(cls.status).all())
             latest_req = cls.query.filter_by(user_id=user_id).filter_by(status=3).filter_by(report_status=10)\
-                             .order_by(cls.created_at.desc()).all()[:10]
+                .order_by(cls.created_at.desc()).limit(10).all()
             latest_requests = RegistrationDetailsSchema().dump(latest_req, many=True).data
-            return {
-                "total_requests": total_count,
-                "new_requests": new_request,
-                "awaiting_document": awaiting_document,
-                "pending_review": pending_review,
-                "in_review": in_review,
-                "information_requested": information_requested,
-                "approved": approved,
-                "rejected": rejected,
-                "latest_request": latest_requests
-            }
+            report = {'total_requests': sum(status_counts.values())}
+            for status, key in cls.DASHBOARD_STATUSES:
+                report[key] = status_counts.get(status, 0)
+            report['latest_request'] = latest_requests
+            return report
         else:
-            review_count = cls.query.filter_by(reviewer_id=user_id).filter_by(status=4).count()
-            pending_review_count = cls.query.filter_by(status=3).filter_by(reviewer_id=None).count()
+            review_count, pending_review_count = db.session.query(
+                db.func.count(cls.id).filter(db.and_(cls.status == 4, cls.reviewer_id == user_id)),
+                db.func.count(cls.id).filter(db.and_(cls.status == 3, cls.reviewer_id.is_(None)))
+            ).filter(cls.status.in_([3, 4])).one()
             pending_review_req = cls.query.filter_by(status=3).filter_by(report_status=10)\
-                .filter_by(reviewer_id=None).order_by(cls.created_at.desc()).all()[:10]
+                .filter_by(reviewer_id=None).order_by(cls.created_at.desc()).limit(10).all()
             pending_review_requests = RegistrationDetailsSchema().dump(pending_review_req, many=True).data
             return {
                 "in_review_count": review_count,
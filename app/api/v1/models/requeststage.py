@@ -0,0 +1,72 @@
+"""
+DRS Request Stage Model package.
+Copyright (c) 2018-2020 Qualcomm Technologies, Inc.
+All rights reserved.
+Redistribution and use in source and binary forms, with or without modification, are permitted (subject to the limitations in the disclaimer below) provided that the following conditions are met:
+
+    Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+    Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+    Neither the name of Qualcomm Technologies, Inc. nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+    The origin of this software must not be misrepresented; you must not claim that you wrote the original software. If you use this software in a product, an acknowledgment is required by displaying the trademark/log as per the details provided here: https://www.qualcomm.com/documents/dirbs-logo-and-brand-guidelines
+    Altered source versions must be plainly marked as such, and must not be misrepresented as being the original software.
+    This notice may not be removed or altered from any source distribution.
+
+NO EXPRESS OR IMPLIED LICENSES TO ANY PARTY'S PATENT RIGHTS ARE GRANTED BY THIS LICENSE. THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+from app import db
+
+
+class RequestStage(db.Model):
+    """Database model for requeststage table, tracks processing stages of a request by its tracking id."""
+    __tablename__ = 'requeststage'
+
+    STAGES = ['parsed', 'persisted', 'classified', 'reported', 'reviewed']
+
+    tracking_id = db.Column(db.String(64), primary_key=True)
+    request_type = db.Column(db.String(20), nullable=False)
+    request_id = db.Column(db.Integer, nullable=False)
+    stage = db.Column(db.String(20), nullable=True)
+    auto_review = db.Column(db.Boolean, default=False)
+    ussd = db.Column(db.Boolean, default=False)
+    updated_at = db.Column(db.DateTime, default=db.func.now(), onupdate=db.func.now())
+
+    def __init__(self, tracking_id, request_type, request_id, auto_review=False, ussd=False):
+        """Constructor."""
+        self.tracking_id = tracking_id
+        self.request_type = request_type
+        self.request_id = request_id
+        self.auto_review = auto_review
+        self.ussd = ussd
+
+    @staticmethod
+    def get(tracking_id):
+        """Return stage of a request by tracking id."""
+        return RequestStage.query.filter_by(tracking_id=str(tracking_id)).first()
+
+    @classmethod
+    def begin(cls, tracking_id, request_type, request_id, auto_review=False, ussd=False):
+        """Start processing of a request from the first stage, previous progress is discarded."""
+        request_stage = cls.get(tracking_id)
+        if request_stage is None:
+            request_stage = cls(str(tracking_id), request_type, request_id)
+            db.session.add(request_stage)
+        request_stage.request_type = request_type
+        request_stage.request_id = request_id
+        request_stage.auto_review = auto_review
+        request_stage.ussd = ussd
+        request_stage.stage = None
+        db.session.flush()
+        return request_stage
+
+    def is_completed(self, stage):
+        """Check if the given stage or any later stage is already completed."""
+        if self.stage is None:
+            return False
+        return self.STAGES.index(self.stage) >= self.STAGES.index(stage)
+
+    def complete(self, stage):
+        """Mark a stage as completed, stage is only moved forward."""
+        if not self.is_completed(stage):
+            self.stage = stage
+            db.session.add(self)
+            db.session.flush()
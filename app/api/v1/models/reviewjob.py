@@ -0,0 +1,64 @@
+"""
+DRS Review Job Model package.
+Copyright (c) 2018-2020 Qualcomm Technologies, Inc.
+All rights reserved.
+Redistribution and use in source and binary forms, with or without modification, are permitted (subject to the limitations in the disclaimer below) provided that the following conditions are met:
+
+    Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+    Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+    Neither the name of Qualcomm Technologies, Inc. nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+    The origin of this software must not be misrepresented; you must not claim that you wrote the original software. If you use this software in a product, an acknowledgment is required by displaying the trademark/log as per the details provided here: https://www.qualcomm.com/documents/dirbs-logo-and-brand-guidelines
+    Altered source versions must be plainly marked as such, and must not be misrepresented as being the original software.
+    This notice may not be removed or altered from any source distribution.
+
+NO EXPRESS OR IMPLIED LICENSES TO ANY PARTY'S PATENT RIGHTS ARE GRANTED BY THIS LICENSE. THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+from app import db
+
+
+class ReviewJob(db.Model):
+    """Database model for reviewjob table, progress of applying a review decision to imeis of a request."""
+    __tablename__ = 'reviewjob'
+
+    STATES = ['queued', 'running', 'completed', 'failed']
+
+    request_id = db.Column(db.Integer, primary_key=True)
+    decision = db.Column(db.String(20), nullable=False)
+    state = db.Column(db.String(20), nullable=False)
+    total = db.Column(db.Integer, nullable=False, default=0)
+    processed = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=db.func.now(), onupdate=db.func.now())
+
+    def __init__(self, request_id, decision, total):
+        """Constructor."""
+        self.request_id = request_id
+        self.decision = decision
+        self.state = 'queued'
+        self.total = total
+        self.processed = 0
+
+    @staticmethod
+    def get(request_id):
+        """Return review job of a request."""
+        return ReviewJob.query.filter_by(request_id=request_id).first()
+
+    @classmethod
+    def begin(cls, request_id, decision, total):
+        """Queue a review decision of a request, previous progress of the request is discarded."""
+        review_job = cls.get(request_id)
+        if review_job is None:
+            review_job = cls(request_id, decision, total)
+            db.session.add(review_job)
+        review_job.decision = decision
+        review_job.state = 'queued'
+        review_job.total = total
+        review_job.processed = 0
+        db.session.flush()
+        return review_job
+
+    def advance(self, state, processed=0):
+        """Move the job to a state adding the number of imeis processed since the last call."""
+        self.state = state
+        self.processed += processed
+        db.session.add(self)
+        db.session.flush()
@@ -14,7 +14,7 @@ Redistribution and use in source and binary forms, with or without modification,
 NO EXPRESS OR IMPLIED LICENSES TO ANY PARTY'S PATENT RIGHTS ARE GRANTED BY THIS LICENSE. THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 """
 from app import db
-from functools import lru_cache
+from app.api.v1.helpers.lookupcache import LookupCache
 
 
 class Status(db.Model):
@@ -25,19 +25,17 @@ class Status(db.Model):
     description = db.Column(db.String(30), nullable=False)
 
     @staticmethod
-    @lru_cache(maxsize=32)
     def get_status_id(status_description):
         """Return id of a status."""
-        status = Status.query.filter_by(description=status_description).first()
+        status = LookupCache.lookup(Status, 'description', status_description)
         if status:
             return status.id
         return status
 
     @staticmethod
-    @lru_cache(maxsize=32)
     def get_status_type(status_id):
         """Return type of status."""
-        status = Status.query.filter_by(id=status_id).first()
+        status = LookupCache.lookup(Status, 'id', status_id)
         if status:
             return status.description
         return status
@@ -45,4 +43,4 @@ class Status(db.Model):
     @staticmethod
     def get_status_types():
         """Return all status types."""
-        return Status.query.all()
+        return LookupCache.rows(Status)
@@ -14,7 +14,7 @@ Redistribution and use in source and binary forms, with or without modification,
 NO EXPRESS OR IMPLIED LICENSES TO ANY PARTY'S PATENT RIGHTS ARE GRANTED BY THIS LICENSE. THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 """
 from app import db
-from functools import lru_cache
+from app.api.v1.helpers.lookupcache import LookupCache
 
 
 class Technologies(db.Model):
@@ -25,34 +25,27 @@ class Technologies(db.Model):
     description = db.Column(db.String(10), nullable=False)
 
     @staticmethod
-    @lru_cache(maxsize=32)
     def get_technology_id(technology_type):
         """Return a technology id."""
-        technology = Technologies.query.filter_by(description=technology_type).first()
+        technology = LookupCache.lookup(Technologies, 'description', technology_type)
         if technology:
             return technology.id
         return technology
 
     @staticmethod
-    @lru_cache(maxsize=32)
     def get_technologies():
         """Return all the supported technologies."""
-        return Technologies.query.all()
+        return LookupCache.rows(Technologies)
 
     @staticmethod
-    @lru_cache(maxsize=32)
     def get_technologies_names():
         """Return name of all supported technologies."""
-        technologies = Technologies.query.all()
-        if technologies:
-            return list(map(lambda x: x.description, technologies))
-        return []
+        return list(map(lambda x: x.description, LookupCache.rows(Technologies)))
 
     @staticmethod
-    @lru_cache(maxsize=32)
     def get_technology_by_id(technology_id):
         """Return technology by id."""
-        technology = Technologies.query.filter_by(id=technology_id).first()
+        technology = LookupCache.lookup(Technologies, 'id', technology_id)
         if technology:
             return technology.description
         return technology
@@ -87,7 +87,6 @@ class DeRegDeviceRoutes(Resource):
             else:
                 old_devices = list(map(lambda x: x.id, dereg.devices))
                 created = DeRegDevice.bulk_create(args, dereg)
-                device_id_tac_map = Utilities.get_id_tac_map(created)
                 devices = device_schema.dump(created, many=True)
                 dereg_status = 'Pending Review' if app.config['AUTOMATE_IMEI_CHECK'] else 'Awaiting Documents'
                 dereg.update_status(dereg_status)
@@ -95,7 +94,7 @@ class DeRegDeviceRoutes(Resource):
                 log = EsLog.new_device_serialize(devices.data, 'Device Deregistration Request', regdetails=dereg,
                                                  imeis=imeis_list, reg_status=dereg_status, method='Post', dereg=True)
                 EsLog.insert_log(log)
-                DeRegDevice.bulk_insert_imeis(device_id_tac_map, imei_tac_map, old_devices, imeis_list, dereg)
+                DeRegDevice.bulk_insert_imeis(old_devices, dereg)
                 response = {'devices': devices.data, 'dreg_id': dereg.id}
                 return Response(json.dumps(response), status=CODES.get("OK"),
                                 mimetype=MIME_TYPES.get("APPLICATION_JSON"))
@@ -146,7 +145,6 @@ class DeRegDeviceRoutes(Resource):
                 if processing_required:
                     old_devices = list(map(lambda x: x.id, dereg.devices))
                     created = DeRegDevice.bulk_create(args, dereg)
-                    device_id_tac_map = Utilities.get_id_tac_map(created)
                     devices = device_schema.dump(created, many=True)
                     status = Status.get_status_type(dereg.status)
                     db.session.commit()
@@ -157,7 +155,7 @@ class DeRegDeviceRoutes(Resource):
                                                      dereg=True, reg_status=status)
                     EsLog.insert_log(log)
 
-                    DeRegDevice.bulk_insert_imeis(device_id_tac_map, imei_tac_map, old_devices, imeis_list, dereg)
+                    DeRegDevice.bulk_insert_imeis(old_devices, dereg)
                     response = {'devices': devices.data, 'dreg_id': dereg.id}
                 else:
                     response = {'devices': [], 'dreg_id': dereg.id}
@@ -23,6 +23,7 @@ from flask_babel import lazy_gettext as _
 
 from app import app, db
 from app.api.v1.helpers.error_handlers import REG_NOT_FOUND_MSG
+from app.api.v1.helpers.filecache import DeviceImeis
 from app.api.v1.helpers.response import MIME_TYPES, CODES
 from app.api.v1.helpers.utilities import Utilities
 from app.api.v1.models.regdetails import RegDetails
@@ -86,6 +87,8 @@ class RegistrationRoutes(Resource):
                     return Response(json.dumps(imei_file), status=CODES.get("UNPROCESSABLE_ENTITY"),
                                     mimetype=MIME_TYPES.get("APPLICATION_JSON"))
                 imei_file = Utilities.process_reg_file(file_name, tracking_id, args)
+                if isinstance(imei_file, DeviceImeis):
+                    imei_file = imei_file.tolist()
                 if isinstance(imei_file, list):
                     response = RegDetails.create(args, tracking_id)
                 else:
@@ -172,6 +175,8 @@ class RegistrationRoutes(Resource):
                     return Response(json.dumps(imei_file), status=CODES.get("UNPROCESSABLE_ENTITY"),
                                     mimetype=MIME_TYPES.get("APPLICATION_JSON"))
                 imei_file = Utilities.process_reg_file(file.filename, tracking_id, args)
+                if isinstance(imei_file, DeviceImeis):
+                    imei_file = imei_file.tolist()
                 if isinstance(imei_file, list):
                     response = RegDetails.update(args, reg_details, True)
                 else:
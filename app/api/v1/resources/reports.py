@@ -15,6 +15,8 @@ NO EXPRESS OR IMPLIED LICENSES TO ANY PARTY'S PATENT RIGHTS ARE GRANTED BY THIS
 """
 import json
 import os
+import threading
+import time
 
 from flask import Response, send_file
 from flask_restful import Resource
@@ -69,7 +71,7 @@ class ImeiReport(MethodResource):
                 else:
                     report_name = 'user_report-{}'.format(req.report)
                 report = os.path.join(app.config['DRS_UPLOADS'], req.tracking_id, report_name)
-                return send_file(report)
+                return self.send_report(report)
             else:
                 return Response(app.json_encoder.encode(REPORT_NOT_ALLOWED_MSG),
                                 status=CODES.get("UNPROCESSABLE_ENTITY"),
@@ -92,16 +94,27 @@ class ImeiReport(MethodResource):
                 else:
                     report_name = 'user_report-{}'.format(req.report)
                 report = os.path.join(app.config['DRS_UPLOADS'], req.tracking_id, report_name)
-                return send_file(report)
+                return self.send_report(report)
             else:
                 return Response(app.json_encoder.encode(REPORT_NOT_ALLOWED_MSG),
                                 status=CODES.get("UNPROCESSABLE_ENTITY"),
                                 mimetype=MIME_TYPES.get("APPLICATION_JSON"))
 
+    @staticmethod
+    def send_report(report):
+        """Send report file, compressed reports are sent as gzip attachments."""
+        if report.endswith('.gz'):
+            return send_file(report, mimetype='application/gzip', as_attachment=True)
+        return send_file(report)
+
 
 class GetDashBoardReports(MethodResource):
     """Class for returning dashboard reports."""
 
+    # (user_id, user_type) -> (expiry time, dashboard report)
+    cache = {}
+    cache_lock = threading.Lock()
+
     @doc(description='Get Dashboard Reports', tags=['Dashboard'])
     @marshal_with(SuccessResponse, code=200, description='On success(Report generated successfully)')
     @marshal_with(ErrorResponse, code=500, description='On error(Un-Identified Error)')
@@ -118,6 +131,18 @@ class GetDashBoardReports(MethodResource):
 
         user_id = kwargs.get('user_id')
         user_type = kwargs.get('user_type')
+        response_data = self.cached_report(user_id, user_type)
+        if response_data is None:
+            response_data = self.dashboard_report(user_id, user_type)
+            self.cache_report(user_id, user_type, response_data)
+
+        response = Response(json.dumps(response_data), status=CODES.get("OK"),
+                            mimetype=MIME_TYPES.get("APPLICATION_JSON"))
+        return response
+
+    @staticmethod
+    def dashboard_report(user_id, user_type):
+        """Build the dashboard report of the user."""
         response_data = {
             "user_id": user_id,
             "user_type": user_type
@@ -133,10 +158,28 @@ class GetDashBoardReports(MethodResource):
         elif user_type == UserTypes.EXPORTER.value:
             de_registraton_info = DeRegDetails.get_dashboard_report(user_id, user_type)
             response_data['de-registration'] = de_registraton_info
-
-        response = Response(json.dumps(response_data), status=CODES.get("OK"),
-                            mimetype=MIME_TYPES.get("APPLICATION_JSON"))
-        return response
+        return response_data
+
+    @classmethod
+    def cached_report(cls, user_id, user_type):
+        """Return the cached dashboard report of the user if it has not expired."""
+        with cls.cache_lock:
+            cached = cls.cache.get((user_id, user_type))
+        if cached is None or cached[0] < time.monotonic():
+            return None
+        return cached[1]
+
+    @classmethod
+    def cache_report(cls, user_id, user_type, response_data):
+        """Cache the dashboard report of the user for DASHBOARD_CACHE_TTL seconds, expired reports are evicted."""
+        ttl = app.config.get('DASHBOARD_CACHE_TTL', 0)
+        if ttl <= 0:
+            return
+        now = time.monotonic()
+        with cls.cache_lock:
+            for key in [key for key, (expiry, _) in cls.cache.items() if expiry < now]:
+                cls.cache.pop(key, None)
+            cls.cache[(user_id, user_type)] = (now + ttl, response_data)
 
 
 class SetImeiReportPermissions(MethodResource):
@@ -22,13 +22,11 @@ from flask_babel import gettext as _
 
 from app import app, db
 from app.api.v1.helpers.error_handlers import REG_NOT_FOUND_MSG, DEREG_NOT_FOUND_MSG
+from app.api.v1.helpers.pipeline import RequestPipeline
 from app.api.v1.helpers.response import MIME_TYPES, CODES
-from app.api.v1.helpers.utilities import Utilities
 from app.api.v1.models.deregdetails import DeRegDetails
 from app.api.v1.models.deregdevice import DeRegDevice
-from app.api.v1.models.device import Device
 from app.api.v1.models.regdetails import RegDetails
-from app.api.v1.models.regdevice import RegDevice
 from app.api.v1.models.status import Status
 from app.api.v1.schema.deregdevice import DeRegDeviceSchema
 
@@ -52,8 +50,7 @@ class RegistrationProcessRestart(Resource):
             processing_required = processing_failed or report_failed
 
             if processing_required:  # pragma: no cover
-                reg_device = RegDevice.get_device_by_registration_id(reg_details.id)
-                Device.create(reg_details, reg_device.id)
+                RequestPipeline.resume(reg_details, 'registration')
                 response = {'message': 'Request performed successfully.'}
             else:
                 response = app.json_encoder.encode({'message': _('This request cannot be processed')})
@@ -95,11 +92,8 @@ class DeRegistrationProcessRestart(Resource):
                 dereg_devices_data = DeRegDeviceSchema().dump(dereg_devices, many=True).data
                 dereg_devices_ids = list(map(lambda x: x['id'], dereg_devices_data))
                 args = {'devices': dereg_devices_data}
-                imei_tac_map = Utilities.extract_imeis_tac_map(args, dereg)
-                imeis_list = Utilities.extract_imeis(imei_tac_map)
-                created = DeRegDevice.bulk_create(args, dereg)
-                device_id_tac_map = Utilities.get_id_tac_map(created)
-                DeRegDevice.bulk_insert_imeis(device_id_tac_map, imei_tac_map, dereg_devices_ids, imeis_list, dereg)
+                DeRegDevice.bulk_create(args, dereg)
+                DeRegDevice.bulk_insert_imeis(dereg_devices_ids, dereg)
                 response = {'message': 'Request performed successfully.'}
             else:
                 response = app.json_encoder.encode({'message': _('This request cannot be processed')})
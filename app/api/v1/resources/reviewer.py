@@ -15,7 +15,6 @@ NO EXPRESS OR IMPLIED LICENSES TO ANY PARTY'S PATENT RIGHTS ARE GRANTED BY THIS
 """
 # pylint: disable=too-many-nested-blocks
 import json
-import datetime
 
 from flask import Response
 from sqlalchemy.exc import SQLAlchemyError
@@ -25,21 +24,24 @@ from flask_babel import lazy_gettext as _
 from app import app, GLOBAL_CONF
 from app.api.v1.models.regdetails import RegDetails
 from app.api.v1.helpers.utilities import Utilities
+from app.api.v1.helpers.reviewdecision import ReviewDecision
 from app.api.v1.models.notification import Notification
 from app.api.v1.models.deregdetails import DeRegDetails
 from app.api.v1.models.regdevice import RegDevice
 from app.api.v1.models.deregdevice import DeRegDevice
+from app.api.v1.models.imeidevice import ImeiDevice
 from app.api.v1.models.devicetype import DeviceType
 from app.api.v1.models.technologies import Technologies
-from app.api.v1.models.approvedimeis import ApprovedImeis
 from app.api.v1.models.devicequota import DeviceQuota as DeviceQuotaModel
 from app.api.v1.models.documents import Documents as ReqDocument
 from app.api.v1.models.association import ImeiAssociation
+from app.api.v1.models.reviewjob import ReviewJob
 from app.api.v1.schema.common import RequestStatusTypes
 from app.api.v1.schema.reviewer import UpdateReviewerArgs, SuccessResponse, SubmitSuccessResponse, ErrorResponse, \
     SectionReviewArgs, DeviceQuota as DeviceQuotaSchema, DeviceQuotaArgs, RequestTypes, DevicesDescription, \
     IMEIRegStatus, IMEIRegStatusArgs, Documents, DocumentsApiArgs, DeviceDescriptionArgs, Sections as SectionSchema, \
-    SectionsArgs, SectionTypes, IMEIClassification as IMEIClassificationSchema, UnAssignReviewerArgs, SubmitReviewArgs
+    SectionsArgs, SectionTypes, IMEIClassification as IMEIClassificationSchema, UnAssignReviewerArgs, SubmitReviewArgs, \
+    ReviewJob as ReviewJobSchema
 from app.api.v1.models.eslog import EsLog
 from app.api.v1.models.status import Status
 
@@ -727,48 +729,6 @@ class SubmitReview(MethodResource):
             app.logger.exception(e)
             return False
 
-    def __update_to_approved_imeis(self, imeis):
-        """Method to update pending imeis to approved in the table"""
-        imei_status = 'whitelist'
-        imei_delta_status = 'update'
-        updated_imeis = []
-
-        for imei in imeis:
-            if ApprovedImeis.exists(imei):
-                imei_ = ApprovedImeis.get_imei(imei)
-                imei_.status = imei_status
-
-                # fix: DDRS-286
-                # if an imei was in pending and exported to core then update the status
-                # else keep the delta status as add because if an imei was not exported at
-                # first and is now going in the list then core import will throw an error
-                # of not existence
-                if imei_.exported:
-                    imei_.delta_status = imei_delta_status
-                    updated_imeis.append(imei_)
-        ApprovedImeis.bulk_insert_imeis(updated_imeis)
-
-    def __change_rejected_imeis_status(self, imeis):
-        """Method to change the status of imeis which are provisionally registered."""
-        changed_imeis = []
-        time_now = datetime.datetime.now()
-        for imei in imeis:
-            provisional_imei = ApprovedImeis.get_imei(imei)
-            if (provisional_imei.status == 'pending' or not provisional_imei.status == 'removed') and (
-                    provisional_imei.exported_at is None or time_now > provisional_imei.exported_at):
-                if provisional_imei.status != 'whitelist':
-                    if provisional_imei.exported:
-                        provisional_imei.delta_status = 'remove'
-                        provisional_imei.status = 'removed'
-                        changed_imeis.append(provisional_imei)
-                    else:
-                        provisional_imei.delta_status = 'remove'
-                        provisional_imei.status = 'removed'
-                        provisional_imei.removed = True
-                        changed_imeis.append(provisional_imei)
-
-        ApprovedImeis.bulk_insert_imeis(changed_imeis)
-
     @doc(description='Submit a request after final review', tags=['Reviewers'])
     @marshal_with(SubmitSuccessResponse, code=201, description='On success (Case status updated)')
     @marshal_with(ErrorResponse, code=422, description='On Error (Bad Argument formats)')
@@ -814,8 +774,7 @@ class SubmitReview(MethodResource):
                             RegDetails.commit_case_changes(request)
 
                             # change imei status
-                            imeis = RegDetails.get_normalized_imeis(request)
-                            self.__change_rejected_imeis_status(imeis)
+                            ReviewDecision.start(request.id, 'reject')
 
                             # generate notification
                             message = 'Your request {id} has been rejected'.format(id=request.id)
@@ -862,14 +821,14 @@ class SubmitReview(MethodResource):
                             RegDetails.commit_case_changes(request)
 
                             # checkout device quota
-                            imeis = RegDetails.get_normalized_imeis(request)
+                            imeis_count = ImeiDevice.count_request_imeis(request.id)
                             user_quota = DeviceQuotaModel.get(request.user_id)
                             current_quota = user_quota.reg_quota
-                            user_quota.reg_quota = current_quota - len(imeis)
+                            user_quota.reg_quota = current_quota - imeis_count
                             DeviceQuotaModel.commit_quota_changes(user_quota)
 
                             # add imeis to approved imeis table
-                            self.__update_to_approved_imeis(imeis)
+                            ReviewDecision.start(request.id, 'approve')
 
                             # generate notification
                             message = 'Your request {id} has been approved'.format(id=request.id)
@@ -1107,6 +1066,34 @@ class SubmitReview(MethodResource):
                                 status=204, mimetype='application/json')
 
 
+class ReviewProgress(MethodResource):
+    """Class for handling progress route of the submitted reviews."""
+
+    @doc(description='Get progress of approving/rejecting imeis of a submitted review', tags=['Reviewers'])
+    @marshal_with(ReviewJobSchema, code=200, description='On success')
+    @marshal_with(ErrorResponse, code=422, description='On Error (Bad Argument formats)')
+    @marshal_with(ErrorResponse, code=204, description='On Error (Requested content does not exist)')
+    @use_kwargs(SectionsArgs().fields_dict, locations=['query'])
+    def get(self, **kwargs):
+        """GET method handler, returns progress of the review job of a registration request."""
+        for key, value in kwargs.items():
+            if value is None:
+                res = {'error': ['{0} is required'.format(key)]}
+                return Response(json.dumps(ErrorResponse().dump(res).data),
+                                status=422, mimetype='application/json')
+
+        request_id = kwargs.get('request_id')
+        review_job = None
+        if kwargs.get('request_type') == RequestTypes.REG_REQUEST.value:
+            review_job = ReviewJob.get(request_id)
+        if review_job is None:
+            res = {'error': ['no review job found for request {id}'.format(id=request_id)]}
+            return Response(json.dumps(ErrorResponse().dump(res).data),
+                            status=204, mimetype='application/json')
+        return Response(json.dumps(ReviewJobSchema().dump(review_job).data),
+                        status=200, mimetype='application/json')
+
+
 class IMEIClassification(MethodResource):
     """Class for handling IMEI Classifications Route."""
 
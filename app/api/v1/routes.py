@@ -30,7 +30,8 @@ from app.api.v1.resources.common import BaseRoutes, ServerConfigs, Files
 from app.api.v1.resources.version import Version
 from app.api.v1.resources.health import HealthCheck
 from app.api.v1.resources.reviewer import AssignReviewer, ReviewSection, DeviceQuota, DeviceDescription, \
-  IMEIRegistrationStatus, RequestDocuments, Sections, SubmitReview, IMEIClassification, UnAssignReviewer
+  IMEIRegistrationStatus, RequestDocuments, Sections, SubmitReview, IMEIClassification, UnAssignReviewer, \
+  ReviewProgress
 from app.common.apidoc import ApiDocs
 from app.api.v1.resources.reports import ImeiReport, GetDashBoardReports, SetImeiReportPermissions
 from app.api.v1.resources.regdetails import RegSectionRoutes
@@ -75,6 +76,7 @@ api.add_resource(IMEIRegistrationStatus, '/review/imeis-status')
 api.add_resource(RequestDocuments, '/review/documents')
 api.add_resource(Sections, '/review/sections')
 api.add_resource(SubmitReview, '/review/submit-review')
+api.add_resource(ReviewProgress, '/review/submit-review/progress')
 api.add_resource(IMEIClassification, '/review/imei-classification')
 
 # restart process if failed
@@ -138,7 +140,7 @@ docs = apidoc.init_doc()
 def register_docs():
     """Method to register routes for docs."""
     for route in [AssignReviewer, DeviceQuota, ReviewSection, DeviceDescription, IMEIRegistrationStatus,
-                  RequestDocuments, Files, Sections, SubmitReview, IMEIClassification, UnAssignReviewer,
-                  ServerConfigs, Notification, HealthCheck, Version, DeassociateImeis, AssociateImeis,
-                  AssociateDuplicate]:
+                  RequestDocuments, Files, Sections, SubmitReview, ReviewProgress, IMEIClassification,
+                  UnAssignReviewer, ServerConfigs, Notification, HealthCheck, Version, DeassociateImeis,
+                  AssociateImeis, AssociateDuplicate]:
         docs.register(route)
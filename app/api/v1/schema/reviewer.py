@@ -348,6 +348,16 @@ class SubmitReviewArgs(Schema):
         return self._declared_fields
 
 
+class ReviewJob(Schema):
+    """Response schema for progress of a submitted review."""
+
+    request_id = fields.Integer(required=True)
+    decision = fields.String(required=True)
+    state = fields.String(required=True)
+    total = fields.Integer(required=True)
+    processed = fields.Integer(required=True)
+
+
 class Section(Schema):
     """Response schema for each section in sections schema."""
 
@@ -73,16 +73,36 @@ class ConfigApp:
         database_config = self.config.get('database')
         celery_config = self.config.get('celery')
         conditions = self.config.get('conditions')
+        core_client_config = self.config.get('core_client') or {}
+        compliance_report_config = self.config.get('compliance_report') or {}
+        dashboard_config = self.config.get('dashboard') or {}
+        review_config = self.config.get('review') or {}
 
         self.app.config['DRS_UPLOADS'] = global_config.get('upload_directory')  # file upload dir
         self.app.config['MAX_WORKERS'] = lists_config.get('max_workers')
         self.app.config['DRS_LISTS'] = lists_config.get('path')  # lists dir
         self.app.config['DDCDS_LISTS'] = lists_config.get('ddcds_path')  # ddcds lists dir
+        self.app.config['LIST_ARTIFACTS'] = bool(lists_config.get('artifacts', False))
+        self.app.config['LIST_PART_ROWS'] = int(lists_config.get('max_part_rows', 1000000))
+        self.app.config['LIST_COMPRESS_LEVEL'] = int(lists_config.get('compress_level', 6))
         self.app.config['STRICT_HTTPS'] = self.config.get('server')['restrict_https']
         self.app.config['CORE_BASE_URL'] = global_config.get('dirbs_base_url')
         self.app.config['BASE_URL'] = global_config.get('base_url')
         self.app.config['API_VERSION'] = global_config.get('core_api_v2')
         self.app.config['API_VERSION_V1'] = global_config.get('core_api_v1')
+        self.app.config['CORE_MAX_IN_FLIGHT'] = int(core_client_config.get('max_in_flight', 10))
+        self.app.config['CORE_MIN_BATCH_SIZE'] = int(core_client_config.get('min_batch_size', 100))
+        self.app.config['CORE_MAX_BATCH_SIZE'] = int(core_client_config.get('max_batch_size', 1000))
+        self.app.config['CORE_TARGET_LATENCY'] = float(core_client_config.get('target_latency', 2))
+        self.app.config['CORE_MAX_RETRIES'] = int(core_client_config.get('max_retries', 10))
+        self.app.config['CORE_BACKOFF_BASE'] = float(core_client_config.get('backoff_base', 0.5))
+        self.app.config['CORE_BACKOFF_CAP'] = float(core_client_config.get('backoff_cap', 30))
+        self.app.config['CORE_TIMEOUT'] = float(core_client_config.get('timeout', 60))
+        self.app.config['REPORT_COMPRESS'] = bool(compliance_report_config.get('compress', False))
+        self.app.config['REPORT_BUFFER_SIZE'] = int(compliance_report_config.get('buffer_size', 1048576))
+        self.app.config['DASHBOARD_CACHE_TTL'] = float(dashboard_config.get('cache_ttl', 0))
+        self.app.config['REVIEW_BACKGROUND_THRESHOLD'] = int(review_config.get('background_threshold', 10000))
+        self.app.config['REVIEW_BATCH_SIZE'] = int(review_config.get('batch_size', 50000))
         self.app.config['BABEL_DEFAULT_LOCALE'] = global_config.get('default_language')
         self.app.config['SUPPORTED_LANGUAGES'] = global_config.get('supported_languages')
         self.app.config['SQLALCHEMY_DATABASE_URI'] = self.database_uri()
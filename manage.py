@@ -23,6 +23,7 @@ from app.api.v1.models import *  # pylint: disable=wildcard-import
 from app import app, db
 from scripts.db import CreateDatabase
 from scripts.db import Seed
+from scripts.db import ReconcileTallies
 from scripts.listgen import ListGenerator
 from scripts.listgen_ddcds import ListGenerationFull
 from scripts.listgen_ddcds import ListGenerationDelta
@@ -34,6 +35,7 @@ manager = Manager(app)
 manager.add_command('db', MigrateCommand)
 manager.add_command('install-db', CreateDatabase(db))
 manager.add_command('seed-db', Seed(db))
+manager.add_command('reconcile-tallies', ReconcileTallies(db))
 manager.add_command('genlist', ListGenerator(db))
 manager.add_command('genlist-ddcds-full', ListGenerationFull)
 manager.add_command('genlist-ddcds-delta', ListGenerationDelta)
@@ -0,0 +1,157 @@
+"""
+List artifacts module for scripts
+
+Copyright (c) 2018-2020 Qualcomm Technologies, Inc.
+All rights reserved.
+Redistribution and use in source and binary forms, with or without modification, are permitted (subject to the limitations in the disclaimer below) provided that the following conditions are met:
+
+    Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+    Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+    Neither the name of Qualcomm Technologies, Inc. nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+    The origin of this software must not be misrepresented; you must not claim that you wrote the original software. If you use this software in a product, an acknowledgment is required by displaying the trademark/log as per the details provided here: https://www.qualcomm.com/documents/dirbs-logo-and-brand-guidelines
+    Altered source versions must be plainly marked as such, and must not be misrepresented as being the original software.
+    This notice may not be removed or altered from any source distribution.
+
+NO EXPRESS OR IMPLIED LICENSES TO ANY PARTY'S PATENT RIGHTS ARE GRANTED BY THIS LICENSE. THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+import csv
+import gzip
+import hashlib
+import io
+import json
+import os
+import shutil
+from datetime import datetime
+
+
+class HashingFile:
+    """Binary file wrapper which computes SHA-256 and size of the bytes written through it."""
+
+    def __init__(self, file):
+        """Constructor."""
+        self.file = file
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data):
+        """Write data to the file."""
+        self.sha256.update(data)
+        self.size += len(data)
+        return self.file.write(data)
+
+    def flush(self):
+        """Flush the file."""
+        self.file.flush()
+
+
+class ListArtifact:
+    """Writer of a list as gzip compressed, size bounded csv part files along with a manifest.
+
+    Every part holds at most max_rows records after the csv header so parts can be imported in parallel.
+    Parts and the manifest with row counts, SHA-256 of the parts and the watermark of the list are written
+    into a temporary directory which is renamed to the name of the list once it is complete.
+    """
+
+    MANIFEST = 'manifest.json'
+
+    def __init__(self, dir_path, name, header, max_rows=1000000, compresslevel=6):
+        """Constructor."""
+        self.path = os.path.join(dir_path, name)
+        self.tmp_path = self.path + '.tmp'
+        self.name = name
+        self.header = header
+        self.max_rows = max_rows
+        self.compresslevel = compresslevel
+        self.parts = []
+        self.rows = 0
+        self.part = None
+        os.makedirs(self.tmp_path)
+
+    def __enter__(self):
+        """Enter context of the artifact."""
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Remove the incomplete artifact on failure."""
+        if exc_type is not None:
+            self.abort()
+
+    def open_part(self):
+        """Start a new part file."""
+        file_name = 'part-{0:05d}.csv.gz'.format(len(self.parts))
+        raw = open(os.path.join(self.tmp_path, file_name), 'wb')
+        hashing = HashingFile(raw)
+        compressed = gzip.GzipFile(fileobj=hashing, mode='wb', compresslevel=self.compresslevel, mtime=0)
+        text = io.TextIOWrapper(compressed, encoding='utf-8', newline='')
+        self.part = {'file': file_name, 'rows': 0, 'streams': (text, compressed, raw), 'hashing': hashing}
+        csv.writer(text, lineterminator='\n').writerow(self.header)
+
+    def close_part(self):
+        """Finish the current part file and record it for the manifest."""
+        if self.part is None:
+            return
+        for stream in self.part['streams']:
+            stream.close()
+        self.parts.append({'file': self.part['file'], 'rows': self.part['rows'],
+                           'bytes': self.part['hashing'].size, 'sha256': self.part['hashing'].sha256.hexdigest()})
+        self.part = None
+
+    def write_record(self, record):
+        """Write a single csv record including its line terminator."""
+        if self.part is None or self.part['rows'] >= self.max_rows:
+            self.close_part()
+            self.open_part()
+        self.part['streams'][0].write(record)
+        self.part['rows'] += 1
+        self.rows += 1
+
+    def write_csv(self, csv_file):
+        """Write csv records read from a text file without header, quoted new lines are kept in a record."""
+        record = []
+        quoted = False
+        for line in csv_file:
+            record.append(line)
+            if line.count('"') % 2:
+                quoted = not quoted
+            if not quoted:
+                self.write_record(''.join(record))
+                record = []
+        if record:
+            self.write_record(''.join(record))
+
+    def writerows(self, rows):
+        """Write rows of values as csv records."""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator='\n')
+        for row in rows:
+            writer.writerow(row)
+            self.write_record(buffer.getvalue())
+            buffer.seek(0)
+            buffer.truncate()
+
+    def commit(self, watermark=None):
+        """Complete the artifact with its manifest, returns path of the artifact directory."""
+        self.close_part()
+        manifest = {
+            'list': self.name,
+            'created_at': datetime.now().isoformat(),
+            'watermark': watermark.isoformat() if watermark is not None else None,
+            'columns': self.header,
+            'rows': self.rows,
+            'compression': 'gzip',
+            'parts': self.parts
+        }
+        with open(os.path.join(self.tmp_path, self.MANIFEST), 'w') as manifest_file:
+            json.dump(manifest, manifest_file, indent=2)
+        os.rename(self.tmp_path, self.path)
+        return self.path
+
+    def abort(self):
+        """Discard the artifact."""
+        if self.part is not None:
+            for stream in self.part['streams']:
+                stream.close()
+            self.part = None
+        for path in [self.tmp_path, self.path]:
+            if os.path.isdir(path):
+                shutil.rmtree(path)
@@ -22,6 +22,7 @@ from sqlalchemy.exc import SQLAlchemyError
 from scripts.common import ScriptLogger
 from scripts.db.indexer import Indexer
 from scripts.db.views import Views
+from scripts.db.tallies import ImeiTallies
 from scripts.db.seeders import Seed
 
 
@@ -45,6 +46,15 @@ class CreateDatabase(Command):
             self.logger.exception(e)
             sys.exit(1)
 
+    def _create_tallies(self):
+        """Method to create triggers maintaining imei tallies of the users."""
+        try:
+            self.logger.info(ImeiTallies(self.db).create())
+        except SQLAlchemyError as e:
+            self.logger.error('an unknown error occured during creating tallies, see the logs below for details')
+            self.logger.exception(e)
+            sys.exit(1)
+
     def __create_indexes(self):
         """Method to perform database indexing."""
         db_indexer = Indexer(self.db)
@@ -60,6 +70,7 @@ class CreateDatabase(Command):
                     self.logger.info(db_indexer.index_imei_device(conn))
                     self.logger.info(db_indexer.index_reg_device(conn))
                     self.logger.info(db_indexer.index_reg_details(conn))
+                    self.logger.info(db_indexer.index_search_tables(conn))
 
                 except SQLAlchemyError as e:
                     self.logger.error('an unknown error occured during indexing, see the logs below for details')
@@ -72,5 +83,29 @@ class CreateDatabase(Command):
         self.logger.info('creating views/materialized views on database')
         self._create_views()
 
+        self.logger.info('creating imei tallies on database')
+        self._create_tallies()
+
         self.logger.info('creating indexes on database tables/views')
         self.__create_indexes()
+
+
+class ReconcileTallies(Command):
+    """Class to rebuild imei tallies of the users from their requests."""
+
+    def __init__(self, db):
+        """Constructor"""
+        super().__init__()
+        self.db = db
+        self.logger = ScriptLogger('db_operations').get_logger()
+
+    # method id overridden so disable pylint warning
+    def run(self):  # pylint: disable=method-hidden
+        """Overridden method."""
+        self.logger.info('reconciling imei tallies with the requests')
+        try:
+            self.logger.info(ImeiTallies(self.db).rebuild())
+        except SQLAlchemyError as e:
+            self.logger.error('an unknown error occured during reconciling tallies, see the logs below for details')
+            self.logger.exception(e)
+            sys.exit(1)
@@ -13,6 +13,7 @@ Redistribution and use in source and binary forms, with or without modification,
 
 NO EXPRESS OR IMPLIED LICENSES TO ANY PARTY'S PATENT RIGHTS ARE GRANTED BY THIS LICENSE. THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 """
+from sqlalchemy import text
 from sqlalchemy.exc import SQLAlchemyError
 
 from app.api.v1.models.approvedimeis import ApprovedImeis
@@ -28,6 +29,14 @@ from app.api.v1.models.device import Device
 class Indexer:
     """Class for indexing the database tables and views."""
 
+    # free text columns of the search tables which are searched by a part of their value
+    SEARCH_TEXT_COLUMNS = {
+        'search_registration': ['tracking_id', 'user_name', 'status', 'brand', 'model_name', 'model_num',
+                                'operating_system', 'device_type', 'technologies'],
+        'search_deregistration': ['tracking_id', 'user_name', 'status', 'brand', 'model_name', 'model_num',
+                                  'operating_system', 'device_type', 'technologies']
+    }
+
     def __init__(self, db):
         """Constructor."""
         self.db = db
@@ -140,6 +149,23 @@ class Indexer:
         except SQLAlchemyError as e:
             raise e
 
+    def index_search_tables(self, conn):
+        """Method to create trigram indexes on free text columns of the search tables.
+
+        Substring (I)LIKE filters of search can use GIN indexes with trigram operators, the pg_trgm
+        extension is created when missing.
+        """
+
+        try:
+            conn.execute(text('CREATE EXTENSION IF NOT EXISTS pg_trgm'))
+            for table, columns in self.SEARCH_TEXT_COLUMNS.items():
+                for column in columns:
+                    conn.execute(text("""CREATE INDEX CONCURRENTLY IF NOT EXISTS {0}_{1}_trgm
+                                                  ON {0} USING gin ({1} gin_trgm_ops)""".format(table, column)))
+            return "Search tables indexed successfully"
+        except SQLAlchemyError as e:
+            raise e
+
     def index_reg_documents(self):
         """ Skeleton method for indexing
             Reg-Documents table"""
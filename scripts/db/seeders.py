@@ -21,6 +21,7 @@ from sqlalchemy.exc import SQLAlchemyError
 
 from app.api.v1.models import technologies, documents, status, devicetype
 from app import ConfigParser, app
+from app.api.v1.helpers.lookupcache import LookupCache
 
 
 class Seed(Command):
@@ -61,10 +62,12 @@ class Seed(Command):
             if data[0] > 0:
                 self.db.engine.execute("TRUNCATE table technologies RESTART IDENTITY CASCADE")
                 self.db.session.bulk_save_objects(objects)
+                LookupCache.invalidate()
                 self.db.session.commit()
                 return "Technologies seeding successful."
             else:
                 self.db.session.bulk_save_objects(objects)
+                LookupCache.invalidate()
                 self.db.session.commit()
                 return "Technologies seeding successful."
         except SQLAlchemyError as e:
@@ -96,10 +99,12 @@ class Seed(Command):
             if data[0] > 0:
                 self.db.engine.execute("TRUNCATE table documents RESTART IDENTITY CASCADE")
                 self.db.session.bulk_save_objects(objects)
+                LookupCache.invalidate()
                 self.db.session.commit()
                 return "Documents seeding successful."
             else:
                 self.db.session.bulk_save_objects(objects)
+                LookupCache.invalidate()
                 self.db.session.commit()
                 return "Documents seeding successful."
         except SQLAlchemyError as e:
@@ -123,10 +128,12 @@ class Seed(Command):
             if data[0] > 0:
                 self.db.engine.execute("TRUNCATE table devicetype RESTART IDENTITY CASCADE")
                 self.db.session.bulk_save_objects(objects)
+                LookupCache.invalidate()
                 self.db.session.commit()
                 return "Device Types seeding successful."
             else:
                 self.db.session.bulk_save_objects(objects)
+                LookupCache.invalidate()
                 self.db.session.commit()
                 return "Device Types seeding successful."
         except SQLAlchemyError as e:
@@ -153,10 +160,12 @@ class Seed(Command):
             if data[0] > 0:
                 self.db.engine.execute("TRUNCATE table status RESTART IDENTITY CASCADE")
                 self.db.session.bulk_save_objects(objects)
+                LookupCache.invalidate()
                 self.db.session.commit()
                 return "Status seeding successful."
             else:
                 self.db.session.bulk_save_objects(objects)
+                LookupCache.invalidate()
                 self.db.session.commit()
                 return "Status seeding successful."
         except SQLAlchemyError as e:
@@ -0,0 +1,164 @@
+"""
+DRS Imei Tallies package.
+Copyright (c) 2018-2020 Qualcomm Technologies, Inc.
+All rights reserved.
+Redistribution and use in source and binary forms, with or without modification, are permitted (subject to the limitations in the disclaimer below) provided that the following conditions are met:
+
+    Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+    Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+    Neither the name of Qualcomm Technologies, Inc. nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+    The origin of this software must not be misrepresented; you must not claim that you wrote the original software. If you use this software in a product, an acknowledgment is required by displaying the trademark/log as per the details provided here: https://www.qualcomm.com/documents/dirbs-logo-and-brand-guidelines
+    Altered source versions must be plainly marked as such, and must not be misrepresented as being the original software.
+    This notice may not be removed or altered from any source distribution.
+
+NO EXPRESS OR IMPLIED LICENSES TO ANY PARTY'S PATENT RIGHTS ARE GRANTED BY THIS LICENSE. THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+
+class ImeiTallies:
+    """Class for maintaining imeitally table, imei counts of the requests of each user.
+
+    Statement level triggers on the request tables recompute tallies of the users whose requests changed
+    status or imei counts, in the same transaction as the change.
+    """
+
+    TALLY_COLUMNS = ['reg_pending', 'reg_registered', 'reg_not_registered',
+                     'dereg_pending', 'dereg_registered', 'dereg_not_registered']
+
+    TALLY_QUERY = """SELECT user_id,
+                            coalesce(sum(reg_pending), 0),
+                            coalesce(sum(reg_registered), 0),
+                            coalesce(sum(reg_not_registered), 0),
+                            coalesce(sum(dereg_pending), 0),
+                            coalesce(sum(dereg_registered), 0),
+                            coalesce(sum(dereg_not_registered), 0)
+                       FROM (SELECT user_id,
+                                    sum(device_count * imei_per_device) FILTER (WHERE status IN (3, 4))
+                                        AS reg_pending,
+                                    sum(device_count * imei_per_device) FILTER (WHERE status = 6) AS reg_registered,
+                                    sum(device_count * imei_per_device) FILTER (WHERE status = 7)
+                                        AS reg_not_registered,
+                                    0 AS dereg_pending,
+                                    0 AS dereg_registered,
+                                    0 AS dereg_not_registered
+                               FROM regdetails
+                                    {reg_where}
+                           GROUP BY user_id
+                          UNION ALL
+                             SELECT deregdetails.user_id,
+                                    0, 0, 0,
+                                    sum(deregdevice.device_count) FILTER (WHERE deregdetails.status IN (3, 4)),
+                                    sum(deregdevice.device_count) FILTER (WHERE deregdetails.status = 6),
+                                    sum(deregdevice.device_count) FILTER (WHERE deregdetails.status = 7)
+                               FROM deregdetails
+                          LEFT JOIN deregdevice ON deregdevice.dereg_details_id = deregdetails.id
+                                    {dereg_where}
+                           GROUP BY deregdetails.user_id) AS tallies
+                   GROUP BY user_id"""
+
+    # source table -> (query returning users of the changed rows, columns the tallies depend on)
+    TALLY_SOURCES = {
+        'regdetails': ('SELECT {rows}.user_id FROM {rows}', ['user_id', 'status', 'device_count', 'imei_per_device']),
+        'deregdetails': ('SELECT {rows}.user_id FROM {rows}', ['user_id', 'status']),
+        'deregdevice': ('SELECT deregdetails.user_id FROM {rows} '
+                        'JOIN deregdetails ON deregdetails.id = {rows}.dereg_details_id',
+                        ['dereg_details_id', 'device_count'])
+    }
+
+    def __init__(self, db):
+        """Constructor."""
+        self.db = db
+
+    @classmethod
+    def tally_query(cls, where=None):
+        """Return query computing tallies of all the users, or of the users matched by the where clause."""
+        if where is None:
+            return cls.TALLY_QUERY.format(reg_where='', dereg_where='')
+        return cls.TALLY_QUERY.format(reg_where='WHERE regdetails.{0}'.format(where),
+                                      dereg_where='WHERE deregdetails.{0}'.format(where))
+
+    @classmethod
+    def tally_queries(cls):
+        """Return queries creating the refresh function of the tallies and triggers on its source tables."""
+        columns = ', '.join(cls.TALLY_COLUMNS)
+        queries = ["""CREATE OR REPLACE FUNCTION public.refresh_imeitally(user_ids character varying[])
+                      RETURNS void AS $$
+                      BEGIN
+                          IF coalesce(array_length(user_ids, 1), 0) = 0 THEN
+                              RETURN;
+                          END IF;
+                          -- tallies are never deleted here so locking them serializes concurrent refreshes
+                          INSERT INTO imeitally (user_id, {0})
+                               SELECT DISTINCT unnest(user_ids) AS user_id, 0, 0, 0, 0, 0, 0 ORDER BY user_id
+                          ON CONFLICT (user_id) DO NOTHING;
+                          PERFORM 1 FROM imeitally WHERE user_id = ANY(user_ids) ORDER BY user_id FOR UPDATE;
+                          UPDATE imeitally
+                             SET ({0}) = ({1})
+                            FROM (SELECT DISTINCT unnest(user_ids) AS user_id) AS users
+                       LEFT JOIN ({2}) AS tallies (user_id, {0}) ON tallies.user_id = users.user_id
+                           WHERE imeitally.user_id = users.user_id;
+                      END $$ LANGUAGE plpgsql""".format(
+                          columns, ', '.join('coalesce(tallies.{0}, 0)'.format(column)
+                                             for column in cls.TALLY_COLUMNS),
+                          cls.tally_query('user_id = ANY(user_ids)'))]
+        for table, (source, depends_on) in cls.TALLY_SOURCES.items():
+            changed = """SELECT new_rows.id
+                           FROM new_rows
+                           JOIN old_rows ON old_rows.id = new_rows.id
+                          WHERE ROW({0}) IS DISTINCT FROM ROW({1})""".format(
+                              ', '.join('new_rows.{0}'.format(column) for column in depends_on),
+                              ', '.join('old_rows.{0}'.format(column) for column in depends_on))
+            queries.append("""CREATE OR REPLACE FUNCTION public.imeitally_{0}() RETURNS trigger AS $$
+                              BEGIN
+                                  IF TG_OP = 'INSERT' THEN
+                                      PERFORM refresh_imeitally(ARRAY({1}));
+                                  ELSIF TG_OP = 'DELETE' THEN
+                                      PERFORM refresh_imeitally(ARRAY({2}));
+                                  ELSE
+                                      PERFORM refresh_imeitally(ARRAY({1} WHERE new_rows.id IN ({3})
+                                                                      UNION
+                                                                      {2} WHERE old_rows.id IN ({3})));
+                                  END IF;
+                                  RETURN NULL;
+                              END $$ LANGUAGE plpgsql""".format(table, source.format(rows='new_rows'),
+                                                                source.format(rows='old_rows'), changed))
+            for operation, transition in [('insert', 'NEW TABLE AS new_rows'),
+                                          ('update', 'NEW TABLE AS new_rows OLD TABLE AS old_rows'),
+                                          ('delete', 'OLD TABLE AS old_rows')]:
+                trigger = 'imeitally_{0}_{1}'.format(table, operation)
+                queries.append('DROP TRIGGER IF EXISTS {0} ON {1}'.format(trigger, table))
+                queries.append("""CREATE TRIGGER {0} AFTER {1} ON {2} REFERENCING {3}
+                                  FOR EACH STATEMENT EXECUTE PROCEDURE imeitally_{2}()""".format(
+                                      trigger, operation.upper(), table, transition))
+        return queries + cls.rebuild_queries()
+
+    @classmethod
+    def rebuild_queries(cls):
+        """Return queries recomputing tallies of all the users."""
+        return ['LOCK TABLE public.imeitally IN EXCLUSIVE MODE',
+                'DELETE FROM public.imeitally',
+                'INSERT INTO public.imeitally (user_id, {0}) {1}'.format(', '.join(cls.TALLY_COLUMNS),
+                                                                          cls.tally_query()),
+                'ANALYZE public.imeitally']
+
+    def execute(self, queries):
+        """Execute queries in a single transaction."""
+        try:
+            with self.db.engine.begin() as conn:
+                for query in queries:
+                    conn.execute(text(query))
+        except SQLAlchemyError as e:
+            self.db.session.rollback()
+            raise e
+
+    def create(self):
+        """Method to create triggers maintaining the tallies and compute tallies of all the users."""
+        self.execute(self.tally_queries())
+        return 'imei tallies created successfully'
+
+    def rebuild(self):
+        """Method to reconcile tallies of all the users with their requests."""
+        self.execute(self.rebuild_queries())
+        return 'imei tallies rebuilt successfully'
@@ -19,72 +19,61 @@ from sqlalchemy.exc import SQLAlchemyError
 
 
 class Views:
-    """Class for creating/migrating views into the database."""
+    """Class for creating/migrating search tables into the database.
 
-    def __init__(self, db):
-        """Constructor."""
-        self.db = db
-
-    def create_registration_view(self):
-        """Method to create registration view for search function."""
-        query = text("""CREATE OR REPLACE VIEW public.search_registration
-                            AS SELECT regdetails.id,
-                                      regdetails.tracking_id, 
-                                      regdetails.created_at, 
-                                      regdetails.updated_at, 
-                                      regdetails.user_name, 
-                                      regdetails.device_count::character varying AS device_count, 
-                                      regdetails.imei_per_device::character varying AS imei_per_device, 
-                                      regdetails.m_location,
-                                      regdetails.processing_status,
-                                      regdetails.report_status, 
-                                      status.description AS status,
-                                      regdevice.brand,
-                                      regdevice.model_name,
-                                      regdevice.operating_system,
-                                      devicetype.description AS device_type,
-                                      string_agg(DISTINCT imeidevice.imei::text, ', '::text) AS imeis,
-                                      1::smallint AS request_type,
-                                      regdetails.reviewer_id,
-                                      regdetails.reviewer_name,
-                                      regdetails.user_id,
-                                      regdetails.report,
-                                      regdevice.model_num,
-                                      string_agg(DISTINCT technologies.description::text, ', '::text) AS technologies 
-                                 FROM regdetails 
-                                JOIN status ON status.id = regdetails.status 
-                                LEFT JOIN device ON device.reg_details_id = regdetails.id 
-                                LEFT JOIN regdevice ON regdevice.id = device.reg_device_id 
-                                LEFT JOIN devicetechnology ON devicetechnology.reg_device_id = regdevice.id 
-                                LEFT JOIN technologies ON technologies.id = devicetechnology.technology_id 
-                                LEFT JOIN devicetype ON devicetype.id = regdevice.device_types_id 
-                                LEFT JOIN imeidevice ON imeidevice.device_id = device.id 
-                            GROUP BY regdetails.id, 
-                                     status.description, 
-                                     regdetails.tracking_id, 
-                                     regdetails.updated_at, 
-                                     regdetails.user_name, 
-                                     regdetails.device_count, 
-                                     regdetails.imei_per_device, 
-                                     regdetails.m_location, 
-                                     regdevice.brand, 
-                                     regdevice.model_name, 
-                                     regdevice.operating_system, 
-                                     devicetype.description,
-                                     regdetails.report,
-                                     regdevice.model_num;""")
+    search_registration and search_deregistration are kept as tables rather than views. Statement level
+    triggers on the source tables recompute rows of the changed requests only, so searching does not
+    aggregate imeis of every request in the system.
+    """
 
-        try:
-            self.db.engine.execute(query)
-            return 'registration view created successfully'
-        except SQLAlchemyError as e:
-            self.db.session.rollback()
-            raise e
+    REGISTRATION_QUERY = """SELECT regdetails.id,
+                                   regdetails.tracking_id,
+                                   regdetails.created_at,
+                                   regdetails.updated_at,
+                                   regdetails.user_name,
+                                   regdetails.device_count::character varying AS device_count,
+                                   regdetails.imei_per_device::character varying AS imei_per_device,
+                                   regdetails.m_location,
+                                   regdetails.processing_status,
+                                   regdetails.report_status,
+                                   status.description AS status,
+                                   regdevice.brand,
+                                   regdevice.model_name,
+                                   regdevice.operating_system,
+                                   devicetype.description AS device_type,
+                                   string_agg(DISTINCT imeidevice.imei::text, ', '::text) AS imeis,
+                                   1::smallint AS request_type,
+                                   regdetails.reviewer_id,
+                                   regdetails.reviewer_name,
+                                   regdetails.user_id,
+                                   regdetails.report,
+                                   regdevice.model_num,
+                                   string_agg(DISTINCT technologies.description::text, ', '::text) AS technologies
+                              FROM regdetails
+                              JOIN status ON status.id = regdetails.status
+                         LEFT JOIN device ON device.reg_details_id = regdetails.id
+                         LEFT JOIN regdevice ON regdevice.id = device.reg_device_id
+                         LEFT JOIN devicetechnology ON devicetechnology.reg_device_id = regdevice.id
+                         LEFT JOIN technologies ON technologies.id = devicetechnology.technology_id
+                         LEFT JOIN devicetype ON devicetype.id = regdevice.device_types_id
+                         LEFT JOIN imeidevice ON imeidevice.device_id = device.id
+                             {where}
+                          GROUP BY regdetails.id,
+                                   status.description,
+                                   regdetails.tracking_id,
+                                   regdetails.updated_at,
+                                   regdetails.user_name,
+                                   regdetails.device_count,
+                                   regdetails.imei_per_device,
+                                   regdetails.m_location,
+                                   regdevice.brand,
+                                   regdevice.model_name,
+                                   regdevice.operating_system,
+                                   devicetype.description,
+                                   regdetails.report,
+                                   regdevice.model_num"""
 
-    def create_de_registration_view(self):
-        """Method to create de-registration view for search function."""
-        query = text("""CREATE OR REPLACE VIEW public.search_deregistration
-                            AS SELECT deregdetails.id,
+    DE_REGISTRATION_QUERY = """SELECT deregdetails.id,
                                       deregdetails.tracking_id,
                                       deregdetails.created_at,
                                       deregdetails.updated_at,
@@ -104,27 +93,192 @@ class Views:
                                       deregdetails.user_id,
                                       deregdetails.report,
                                       deregdevice.model_num,
-                                      deregdevice.technology AS technologies 
-                                 FROM deregdetails 
-                                JOIN status ON status.id = deregdetails.status 
-                                LEFT JOIN deregdevice ON deregdevice.dereg_details_id = deregdetails.id 
-                                LEFT JOIN deregimei ON deregimei.device_id = deregdevice.id 
-                            GROUP BY deregdetails.id, 
-                                     status.description, 
-                                     deregdetails.tracking_id, 
-                                     deregdetails.updated_at, 
-                                     deregdetails.user_name, 
-                                     deregdetails.device_count, 
-                                     deregdevice.brand, 
-                                     deregdevice.model_name, 
-                                     deregdevice.operating_system, 
-                                     deregdevice.device_type,
-                                     deregdetails.report,
-                                     deregdevice.model_num,
-                                     deregdevice.technology;""")
+                                      deregdevice.technology AS technologies
+                                 FROM deregdetails
+                                 JOIN status ON status.id = deregdetails.status
+                            LEFT JOIN deregdevice ON deregdevice.dereg_details_id = deregdetails.id
+                            LEFT JOIN deregimei ON deregimei.device_id = deregdevice.id
+                                {where}
+                             GROUP BY deregdetails.id,
+                                      status.description,
+                                      deregdetails.tracking_id,
+                                      deregdetails.updated_at,
+                                      deregdetails.user_name,
+                                      deregdetails.device_count,
+                                      deregdevice.brand,
+                                      deregdevice.model_name,
+                                      deregdevice.operating_system,
+                                      deregdevice.device_type,
+                                      deregdetails.report,
+                                      deregdevice.model_num,
+                                      deregdevice.technology"""
+
+    # queries returning ids of the requests affected by changed rows of each source table
+    REGISTRATION_SOURCES = {
+        'regdetails': 'SELECT id FROM {rows}',
+        'device': 'SELECT reg_details_id FROM {rows}',
+        'regdevice': 'SELECT device.reg_details_id FROM {rows} JOIN device ON device.reg_device_id = {rows}.id',
+        'devicetechnology': 'SELECT device.reg_details_id FROM {rows} '
+                            'JOIN device ON device.reg_device_id = {rows}.reg_device_id',
+        'imeidevice': 'SELECT device.reg_details_id FROM {rows} JOIN device ON device.id = {rows}.device_id'
+    }
+
+    DE_REGISTRATION_SOURCES = {
+        'deregdetails': 'SELECT id FROM {rows}',
+        'deregdevice': 'SELECT dereg_details_id FROM {rows}',
+        'deregimei': 'SELECT deregdevice.dereg_details_id FROM {rows} '
+                     'JOIN deregdevice ON deregdevice.id = {rows}.device_id'
+    }
+
+    # columns of the search tables which only depend on the details table (and status), as column: expression
+    REGISTRATION_DETAILS_COLUMNS = [
+        ('tracking_id', 'regdetails.tracking_id'),
+        ('created_at', 'regdetails.created_at'),
+        ('updated_at', 'regdetails.updated_at'),
+        ('user_name', 'regdetails.user_name'),
+        ('device_count', 'regdetails.device_count::character varying'),
+        ('imei_per_device', 'regdetails.imei_per_device::character varying'),
+        ('m_location', 'regdetails.m_location'),
+        ('processing_status', 'regdetails.processing_status'),
+        ('report_status', 'regdetails.report_status'),
+        ('status', 'status.description'),
+        ('reviewer_id', 'regdetails.reviewer_id'),
+        ('reviewer_name', 'regdetails.reviewer_name'),
+        ('user_id', 'regdetails.user_id'),
+        ('report', 'regdetails.report')
+    ]
+
+    DE_REGISTRATION_DETAILS_COLUMNS = [
+        ('tracking_id', 'deregdetails.tracking_id'),
+        ('created_at', 'deregdetails.created_at'),
+        ('updated_at', 'deregdetails.updated_at'),
+        ('user_name', 'deregdetails.user_name'),
+        ('device_count', 'deregdetails.device_count::character varying'),
+        ('processing_status', 'deregdetails.processing_status'),
+        ('report_status', 'deregdetails.report_status'),
+        ('status', 'status.description'),
+        ('reviewer_id', 'deregdetails.reviewer_id'),
+        ('reviewer_name', 'deregdetails.reviewer_name'),
+        ('user_id', 'deregdetails.user_id'),
+        ('report', 'deregdetails.report')
+    ]
+
+    # imeis of a request of the search table row, recomputed only when imeis of the request change
+    REGISTRATION_IMEIS = """SELECT string_agg(DISTINCT imeidevice.imei::text, ', '::text)
+                              FROM device
+                              JOIN imeidevice ON imeidevice.device_id = device.id
+                             WHERE device.reg_details_id = {table}.id"""
+
+    DE_REGISTRATION_IMEIS = """SELECT string_agg(DISTINCT deregimei.imei::text, ', '::text)
+                                 FROM deregdevice
+                                 JOIN deregimei ON deregimei.device_id = deregdevice.id
+                                WHERE deregdevice.dereg_details_id = {table}.id"""
+
+    SEARCH_INDEXES = ['id', 'user_id', 'status', 'updated_at', 'tracking_id']
+
+    def __init__(self, db):
+        """Constructor."""
+        self.db = db
+
+    @classmethod
+    def search_table_queries(cls, name, query, details_table, sources, details_columns, imei_table, imeis_query):
+        """Return queries creating a search table, its refresh functions and triggers on its source tables.
+
+        Rows of changed requests are rebuilt as a whole on inserts and deletes, updates of the details table
+        only refresh its columns in place and changes of imeis only re-aggregate the imeis of the request, so
+        status changes do not re-aggregate every imei of the request. Existing contents of the table are
+        rebuilt, which also converts the table from a former view.
+        """
+        lock = 'PERFORM 1 FROM {0} WHERE id = ANY(request_ids) ORDER BY id FOR NO KEY UPDATE;'.format(details_table)
+        queries = ["""DO $$
+                      BEGIN
+                          IF EXISTS (SELECT 1 FROM pg_views WHERE schemaname = 'public' AND viewname = '{0}') THEN
+                              DROP VIEW public.{0};
+                          END IF;
+                      END $$""".format(name),
+                   'CREATE TABLE IF NOT EXISTS public.{0} AS {1} WITH NO DATA'.format(name, query.format(where='')),
+                   """CREATE OR REPLACE FUNCTION public.refresh_{0}(request_ids integer[]) RETURNS void AS $$
+                      BEGIN
+                          -- serialize refreshes of the same requests so concurrent ones do not duplicate rows
+                          {1}
+                          DELETE FROM {0} WHERE id = ANY(request_ids);
+                          INSERT INTO {0} {2};
+                      END $$ LANGUAGE plpgsql""".format(name, lock,
+                                                        query.format(where='WHERE {0}.id = ANY(request_ids)'.format(
+                                                            details_table))),
+                   """CREATE OR REPLACE FUNCTION public.refresh_{0}_details(request_ids integer[]) RETURNS void AS $$
+                      BEGIN
+                          {1}
+                          UPDATE {0}
+                             SET {2}
+                            FROM {3}
+                            JOIN status ON status.id = {3}.status
+                           WHERE {3}.id = ANY(request_ids)
+                             AND {0}.id = {3}.id;
+                      END $$ LANGUAGE plpgsql""".format(name, lock,
+                                                        ', '.join('{0} = {1}'.format(column, expression)
+                                                                  for column, expression in details_columns),
+                                                        details_table),
+                   """CREATE OR REPLACE FUNCTION public.refresh_{0}_imeis(request_ids integer[]) RETURNS void AS $$
+                      BEGIN
+                          {1}
+                          UPDATE {0}
+                             SET imeis = ({2})
+                           WHERE {0}.id = ANY(request_ids);
+                      END $$ LANGUAGE plpgsql""".format(name, lock, imeis_query.format(table=name))]
+        for table, source in sources.items():
+            refresh = 'refresh_{0}_imeis'.format(name) if table == imei_table else 'refresh_{0}'.format(name)
+            update_refresh = 'refresh_{0}_details'.format(name) if table == details_table else refresh
+            queries.append("""CREATE OR REPLACE FUNCTION public.{0}_{1}() RETURNS trigger AS $$
+                              BEGIN
+                                  IF TG_OP = 'INSERT' THEN
+                                      PERFORM {4}(ARRAY({2}));
+                                  ELSIF TG_OP = 'DELETE' THEN
+                                      PERFORM {4}(ARRAY({3}));
+                                  ELSE
+                                      PERFORM {5}(ARRAY({2} UNION {3}));
+                                  END IF;
+                                  RETURN NULL;
+                              END $$ LANGUAGE plpgsql""".format(name, table, source.format(rows='new_rows'),
+                                                                source.format(rows='old_rows'), refresh,
+                                                                update_refresh))
+            for operation, transition in [('insert', 'NEW TABLE AS new_rows'),
+                                          ('update', 'NEW TABLE AS new_rows OLD TABLE AS old_rows'),
+                                          ('delete', 'OLD TABLE AS old_rows')]:
+                trigger = '{0}_{1}_{2}'.format(name, table, operation)
+                queries.append('DROP TRIGGER IF EXISTS {0} ON {1}'.format(trigger, table))
+                queries.append("""CREATE TRIGGER {0} AFTER {1} ON {2} REFERENCING {3}
+                                  FOR EACH STATEMENT EXECUTE PROCEDURE {4}_{2}()""".format(
+                                      trigger, operation.upper(), table, transition, name))
+        for column in cls.SEARCH_INDEXES:
+            queries.append('CREATE INDEX IF NOT EXISTS {0}_{1} ON public.{0} ({1})'.format(name, column))
+        queries.append('TRUNCATE public.{0}'.format(name))
+        queries.append('INSERT INTO public.{0} {1}'.format(name, query.format(where='')))
+        queries.append('ANALYZE public.{0}'.format(name))
+        return queries
+
+    def create_search_table(self, queries):
+        """Execute queries of a search table in a single transaction."""
         try:
-            self.db.engine.execute(query)
-            return 'de-registration view created successfully'
+            with self.db.engine.begin() as conn:
+                for query in queries:
+                    conn.execute(text(query))
         except SQLAlchemyError as e:
             self.db.session.rollback()
             raise e
+
+    def create_registration_view(self):
+        """Method to create registration search table for search function."""
+        self.create_search_table(self.search_table_queries('search_registration', self.REGISTRATION_QUERY,
+                                                           'regdetails', self.REGISTRATION_SOURCES,
+                                                           self.REGISTRATION_DETAILS_COLUMNS, 'imeidevice',
+                                                           self.REGISTRATION_IMEIS))
+        return 'registration search table created successfully'
+
+    def create_de_registration_view(self):
+        """Method to create de-registration search table for search function."""
+        self.create_search_table(self.search_table_queries('search_deregistration', self.DE_REGISTRATION_QUERY,
+                                                           'deregdetails', self.DE_REGISTRATION_SOURCES,
+                                                           self.DE_REGISTRATION_DETAILS_COLUMNS, 'deregimei',
+                                                           self.DE_REGISTRATION_IMEIS))
+        return 'de-registration search table created successfully'
@@ -16,27 +16,59 @@ NO EXPRESS OR IMPLIED LICENSES TO ANY PARTY'S PATENT RIGHTS ARE GRANTED BY THIS
 """
 import os
 import sys
-import csv
+import glob
+import shutil
 import datetime
-
-from queue import Queue
-import numpy
+import multiprocessing
 
 from flask_script import Command, Option  # pylint: disable=deprecated-module
+from sqlalchemy import create_engine
 
 from app import app
 from app.api.v1.models.approvedimeis import ApprovedImeis
-from scripts.common import ScriptLogger
-from scripts.listgen.worker import IMEIWorker
+from app.api.v1.models.listwatermark import ListWatermark
+from scripts.common import ListArtifact, ScriptLogger
+
+
+def export_part(args):
+    """Write a shard of the registration list to its part file, runs in a worker process.
+
+    The worker opens its own single connection and reads the shard from the snapshot exported by the
+    list generator, so all the parts are consistent with the imeis flagged by the generator.
+    """
+    snapshot, list_type, since, (first_id, last_id), part_path = args
+    engine = create_engine(app.config['SQLALCHEMY_DATABASE_URI'], pool_size=1, max_overflow=0)
+    try:
+        with engine.connect() as connection:
+            connection = connection.execution_options(isolation_level='REPEATABLE READ')
+            with connection.begin():
+                connection.execute("SET TRANSACTION SNAPSHOT '{0}'".format(snapshot))
+                ApprovedImeis.select_export(list_type, first_id, last_id, since, connection=connection)
+                ApprovedImeis.cache_metadata(connection=connection)
+                with open(part_path, 'w') as part:
+                    ApprovedImeis.copy_exported(list_type, part, header=False, connection=connection)
+    finally:
+        engine.dispose()
+    return part_path
 
 
 class ListGenerator(Command):
     """Registration List generator.
 
+    Imeis of the list are selected and flagged as exported by set based statements in a single
+    transaction, delta list holds the imeis changed since the watermark of the previous list which is
+    advanced in the same transaction. The ids of the selected imeis are split into contiguous shards which are written to part
+    files by a pool of worker processes reading the snapshot of that transaction, the parts are then
+    concatenated in order into the list. Metadata is resolved once per request and the csv is streamed by
+    the database with COPY so the rows of the list are never held in memory.
     """
 
+    WATERMARK = 'registration_list'
+
     option_list = [
-        Option('--list', '-l', dest='param', help='Type of list to generate (full or delta)', default='delta')
+        Option('--list', '-l', dest='param', help='Type of list to generate (full or delta)', default='delta'),
+        Option('--workers', '-w', dest='workers', type=int, default=None,
+               help='Number of worker processes, overrides lists.max_workers')
     ]
 
     def __init__(self, db):
@@ -60,130 +92,91 @@ class ListGenerator(Command):
         return '{0}_registration_list_{1}.csv'.format(self.list_type,
                                                       self.current_time_stamp.strftime('%Y_%m_%d_%H_%M_%S_%f'))
 
-    def _get_details_query(self, request_id):
-        """Property Method to return appropriate query for imei make, model, brand etc information."""
-        return """SELECT brand, model_name, model_num, device_type, technologies
-                    FROM search_registration
-                   WHERE id='{0}'""".format(request_id)
-
-    @property
-    def _column_names(self):
-        """Method to define column names for csv file."""
-        if self.list_type == 'delta':
-            return ['APPROVED_IMEI',
-                    'make',
-                    'model',
-                    'status',
-                    'model_number',
-                    'brand_name',
-                    'device_type',
-                    'radio_interface',
-                    'change_type']
-        return ['APPROVED_IMEI',
-                'make',
-                'model',
-                'status',
-                'model_number',
-                'brand_name',
-                'device_type',
-                'radio_interface']
-
-    def generate(self, param):
+    def export_parts(self, param, since, list_path, workers):
+        """Write shards of the selected imeis to part files in parallel, returns the part files in order."""
+        snapshot = ApprovedImeis.export_snapshot()
+        shards = ApprovedImeis.export_shards(workers)
+        parts = ['{0}.part{1}'.format(list_path, index) for index in range(len(shards))]
+        self.logger.info('using {0} worker processes for {1} parts'.format(min(workers, len(shards)), len(parts)))
+        with multiprocessing.get_context('fork').Pool(min(workers, len(shards))) as pool:
+            pool.map(export_part, [(snapshot, param, since, shard, part) for shard, part in zip(shards, parts)])
+        return parts
+
+    def write_output(self, param, parts, list_path, watermark):
+        """Concatenate part files in order into the list, or into a list artifact when enabled.
+
+        Returns path of the list file or of the artifact directory.
+        """
+        if app.config['LIST_ARTIFACTS']:
+            with ListArtifact(self.dir_path, os.path.splitext(os.path.basename(list_path))[0],
+                              ApprovedImeis.export_columns(param), app.config['LIST_PART_ROWS'],
+                              app.config['LIST_COMPRESS_LEVEL']) as artifact:
+                for part in parts:
+                    with open(part, newline='') as part_file:
+                        artifact.write_csv(part_file)
+                return artifact.commit(watermark)
+        with open(list_path + '.tmp', 'w') as reglist:
+            reglist.write(','.join(ApprovedImeis.export_columns(param)) + '\n')
+            for part in parts:
+                with open(part) as part_file:
+                    shutil.copyfileobj(part_file, reglist)
+        os.replace(list_path + '.tmp', list_path)
+        return list_path
+
+    @staticmethod
+    def remove_output(list_path):
+        """Remove list file or artifact which was written for a failed list generation."""
+        artifact_path = os.path.splitext(list_path)[0]
+        for path in [list_path + '.tmp', list_path]:
+            if os.path.exists(path):
+                os.remove(path)
+        for path in [artifact_path + '.tmp', artifact_path]:
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+
+    def generate(self, param, workers):
         """Method to generate the list."""
         self.logger.info('checking valid directory for list generation')
         if os.path.isdir(self.dir_path):
-            imeis = self.calc_imeis_to_export(param)
-            if imeis:
-                self.logger.info('generating {0} registration list'.format(param))
-                with open('{path}/{file_name}'.format(path=self.dir_path, file_name=self._csv_file_name),
-                          'w') as reglist:
-                    writer = csv.DictWriter(reglist, fieldnames=self._column_names)
-                    writer.writeheader()
-                    writer.writerows(imeis)
-                self.logger.info('{0} list [{1}] generated'.format(param, self._csv_file_name))
-            else:
-                self.logger.info('no imeis to export, exiting .....')
-                sys.exit(0)
+            list_path = os.path.join(self.dir_path, self._csv_file_name)
+            try:
+                # flags and parts of the list must be computed from the same snapshot of approved imeis
+                self.db.session.connection(execution_options={'isolation_level': 'REPEATABLE READ'})
+                watermark = ApprovedImeis.change_horizon()
+                since = ListWatermark.get(self.WATERMARK) if param == 'delta' else None
+                self.logger.info('calculating imeis for {0} registration list changed since {1}'.format(
+                    param, since))
+                imeis = ApprovedImeis.select_export(param, since=since)
+                if not imeis:
+                    ListWatermark.advance(self.WATERMARK, watermark)
+                    self.db.session.commit()
+                    self.logger.info('no imeis to export, exiting .....')
+                    sys.exit(0)
+                self.logger.info('generating {0} registration list of {1} imeis'.format(param, imeis))
+                parts = self.export_parts(param, since, list_path, workers)
+                ApprovedImeis.mark_exported(self.current_time_stamp, watermark)
+                ListWatermark.advance(self.WATERMARK, watermark)
+                output = self.write_output(param, parts, list_path, watermark)
+                self.db.session.commit()
+            except Exception:
+                self.db.session.rollback()
+                self.remove_output(list_path)
+                raise
+            finally:
+                for part in glob.glob(list_path + '.part*'):
+                    os.remove(part)
+            self.logger.info('{0} list [{1}] generated'.format(param, os.path.basename(output)))
         else:
             self.logger.error('Error: please specify directory in config for lists')
             self.logger.info('exiting .......')
             sys.exit(0)
 
-    def _get_imei_details(self, imei_norm):
-        """Property Method to return imei details."""
-        imei_details = self.db.engine.execute(self._get_details_query(imei_norm.request_id))
-        res_dict = {}
-        for row in imei_details:
-            for column, value in row.items():
-                res_dict.update({column: value})
-        if self.list_type == 'delta':
-            return {
-                'APPROVED_IMEI': imei_norm.imei,
-                'make': res_dict.get('brand'),
-                'model': res_dict.get('model_name'),
-                'status': imei_norm.status,
-                'model_number': res_dict.get('model_num'),
-                'brand_name': res_dict.get('brand'),
-                'device_type': res_dict.get('device_type'),
-                'radio_interface': res_dict.get('technologies', ''),
-                'change_type': imei_norm.delta_status
-            }
-        return {
-            'APPROVED_IMEI': imei_norm.imei,
-            'make': res_dict.get('brand'),
-            'model': res_dict.get('model_name'),
-            'status': imei_norm.status,
-            'model_number': res_dict.get('model_num'),
-            'brand_name': res_dict.get('brand'),
-            'device_type': res_dict.get('device_type'),
-            'radio_interface': res_dict.get('technologies', '')
-        }
-
-    def calc_imeis_to_export(self, param):
-        """Method to calculate imeis that needs to be exported."""
-        recs_to_export = []
-        recs_to_update = []
-
-        self.logger.info('calculating imeis for {0} registration list'.format(param))
-        imei_records = ApprovedImeis.imei_to_export()
-        if imei_records:
-            self.logger.info('{0} imei records to analyze for export'.format(len(imei_records)))
-            max_workers = app.config['MAX_WORKERS']
-            self.logger.info('using {0} thread workers for calculation'.format(max_workers))
-            self.logger.info('spliting imeis into {0} batches'.format(max_workers))
-            imei_records = numpy.array_split(imei_records, max_workers)
-            self.logger.info('splited imeis into {0} batches'.format(len(imei_records)))
-
-            input_queue = Queue()
-            output_queue = Queue()
-
-            for worker in range(max_workers):  # pylint: disable=unused-variable
-                imei_worker = IMEIWorker(in_queue=input_queue, out_queue=output_queue)
-                imei_worker.daemon = True
-                imei_worker.start()
-
-            for imei_record in imei_records:
-                input_queue.put((imei_record, param))
-
-            input_queue.join()
-            for i in range(max_workers):  # pylint: disable=unused-variable
-                rec_update, rec_export = output_queue.get()
-                if rec_update:
-                    recs_to_update.extend(rec_update)
-                if rec_export:
-                    recs_to_export.extend(rec_export)
-            ApprovedImeis.bulk_insert_imeis(recs_to_update)
-            return recs_to_export
-        else:
-            self.logger.info('no records founds to export, exiting...')
-            sys.exit(0)
-
     # noinspection PyMethodOverriding
-    def run(self, param):  # pylint: disable=method-hidden,arguments-differ,
+    def run(self, param, workers):  # pylint: disable=method-hidden,arguments-differ,
         """Overloaded method of the super class."""
         if param in ['delta', 'full']:
             self.list_type = param
-            self.generate(param)
+            self.generate(param, max(1, workers or app.config['MAX_WORKERS'] or 1))
             return 'List generation successful'
         else:
             return 'Wrong command line argument, available options are: full, delta'
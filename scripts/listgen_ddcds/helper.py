@@ -1,72 +1,86 @@
 import os
 import sys
+import csv
 
-import pandas as pd
 from datetime import datetime
-from collections import OrderedDict
 
-from app import app
+from app import app, db
 from app.api.v1.models.association import ImeiAssociation
+from scripts.common import ListArtifact
 
 
 class Helper:
 
-    def __init__(self, logger):
+    COLUMNS = {
+        'full': ['uid', 'imei'],
+        'delta': ['uid', 'imei', 'change_type']
+    }
+
+    def __init__(self, logger, chunk_size=10000):
         """Constructor"""
         self.dir_path = app.config['DDCDS_LISTS']
         self.current_time_stamp = datetime.now().strftime("%m-%d-%YT%H%M%S")
         self.logger = logger
+        self.chunk_size = chunk_size
 
-    def get_imeis(self):
-        try:
-            case_list = []
-            self.logger.info("Extracting IMEIs to export...")
-            for row in ImeiAssociation.get_all_imeis():
-                case_list.append(dict((col, val) for col, val in row.items()))
-            return case_list
-        except Exception as e:
-            self.logger.critical("Exception occurred while extracting IMEIs from db.")
-            self.logger.exception(e)
+    def export_list(self, list_type, name):
+        """Stream a DDCDS list into a csv file and mark its IMEIs as exported, returns number of IMEIs.
 
-    def add_to_delta_list(self, full_list, imei, status):
-        try:
-            delta_dict = OrderedDict()
-            delta_dict['uid'] = imei['uid']
-            delta_dict['imei'] = imei['imei']
-            delta_dict['change_type'] = status
-            full_list.append(delta_dict)
-            return full_list
-        except Exception as e:
-            self.logger.critical("Exception occurred while adding IMEIs to list.")
-            self.logger.exception(e)
+        IMEIs are read in chunks through a server side cursor and each chunk is marked as exported with a
+        single update, the list file is put in place right before the transaction is committed.
+        """
+        self.logger.info("Checking if list directory exists...")
+        if not os.path.isdir(self.dir_path):
+            self.logger.error('Error: please specify directory in config for lists')
+            self.logger.info('exiting .......')
+            sys.exit(0)
 
-    def add_to_full_list(self, full_list, imei):
+        columns = self.COLUMNS[list_type]
+        if app.config['LIST_ARTIFACTS']:
+            return self.export_artifact(list_type, name + self.current_time_stamp, columns)
+        list_path = os.path.join(self.dir_path, name + self.current_time_stamp + '.csv')
+        count = 0
         try:
-            full_dict = OrderedDict()
-            full_dict['uid'] = imei['uid']
-            full_dict['imei'] = imei['imei']
-            full_list.append(full_dict)
-            return full_list
-        except Exception as e:
-            self.logger.critical("Exception occurred while adding IMEIs to list.")
-            self.logger.exception(e)
-
+            with open(list_path + '.tmp', 'w', newline='') as list_file:
+                writer = csv.writer(list_file, lineterminator=os.linesep)
+                writer.writerow(columns)
+                for rows in ImeiAssociation.iter_export(list_type, self.chunk_size):
+                    writer.writerows([row[column] for column in columns] for row in rows)
+                    ImeiAssociation.bulk_mark_exported([row['id'] for row in rows])
+                    count += len(rows)
+                    self.logger.info("{0} IMEIs added to list and marked as exported...".format(count))
+            if count:
+                os.replace(list_path + '.tmp', list_path)
+                self.logger.info("List " + os.path.basename(list_path) + " has been saved successfully.")
+            else:
+                os.remove(list_path + '.tmp')
+            db.session.commit()
+            return count
+        except Exception:
+            db.session.rollback()
+            for path in [list_path + '.tmp', list_path]:
+                if os.path.exists(path):
+                    os.remove(path)
+            raise
 
-    def upload_list(self, list, name):
+    def export_artifact(self, list_type, name, columns):
+        """Stream a DDCDS list into a partitioned list artifact, returns number of IMEIs."""
+        count = 0
         try:
-            self.logger.info("Checking if list directory exists...")
-            if os.path.isdir(self.dir_path):
-                full_list = pd.DataFrame(list)
-                report_name = name + self.current_time_stamp + '.csv'
-                self.logger.info("Saving list to specified directory...")
-                full_list.to_csv(os.path.join(self.dir_path, report_name), sep=',', index=False)
-                self.logger.info("List " + report_name + " has been saved successfully.")
-                sys.exit(0)
-            else:
-                self.logger.error('Error: please specify directory in config for lists')
-                self.logger.info('exiting .......')
-                sys.exit(0)
-        except Exception as e:
-            self.logger.critical("Exception occurred while uploading delta list")
-            self.logger.exception(e)
-            self.logger.exception("Exception occurred while uploading list.")
\ No newline at end of file
+            with ListArtifact(self.dir_path, name, columns, app.config['LIST_PART_ROWS'],
+                              app.config['LIST_COMPRESS_LEVEL']) as artifact:
+                for rows in ImeiAssociation.iter_export(list_type, self.chunk_size):
+                    artifact.writerows([row[column] for column in columns] for row in rows)
+                    ImeiAssociation.bulk_mark_exported([row['id'] for row in rows])
+                    count += len(rows)
+                    self.logger.info("{0} IMEIs added to list and marked as exported...".format(count))
+                if count:
+                    artifact.commit()
+                    self.logger.info("List " + name + " has been saved successfully.")
+                else:
+                    artifact.abort()
+                db.session.commit()
+            return count
+        except Exception:
+            db.session.rollback()
+            raise
@@ -1,5 +1,4 @@
 import sys
-from app.api.v1.models.association import ImeiAssociation
 from scripts.listgen_ddcds.helper import Helper
 
 
@@ -11,20 +10,10 @@ class DeltaListGeneration:
 
     def generate_delta_list(self):
         try:
-            delta_list = []
-            imeis = Helper(self.logger).get_imeis()
             self.logger.info("Adding IMEIs to list and marking them as exported...")
-            for i in imeis:
-                if not i.get('exported') and i.get('end_date') is None:
-                    delta_list = Helper(self.logger).add_to_delta_list(delta_list, i, "add")
-                    ImeiAssociation.mark_exported(i.get('id'))
-                elif i.get('exported') and i.get('end_date'):
-                    if i.get('exported_at') < i.get('end_date'):
-                        delta_list = Helper(self.logger).add_to_delta_list(delta_list, i, "remove")
-                        ImeiAssociation.update_export_date(i.get('id'))
+            exported = Helper(self.logger).export_list("delta", "ddcds-delta-list")
             self.logger.info("Checking if generated list contains IMEIs...")
-            if len(delta_list):
-                Helper(self.logger).upload_list(delta_list, "ddcds-delta-list")
+            if exported:
                 self.logger.info("List has been generated and uploaded successfully.")
                 self.logger.info("exiting...")
                 sys.exit(0)
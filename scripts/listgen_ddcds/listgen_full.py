@@ -1,5 +1,4 @@
 import sys
-from app.api.v1.models.association import ImeiAssociation
 from scripts.listgen_ddcds.helper import Helper
 
 
@@ -11,16 +10,10 @@ class FullListGeneration:
 
     def generate_full_list(self):
         try:
-            full_list = []
-            imeis = Helper(self.logger).get_imeis()
             self.logger.info("Adding IMEIs to list and marking them as exported...")
-            for i in imeis:
-                if i.get('end_date') is None:
-                    full_list = Helper(self.logger).add_to_full_list(full_list, i)
-                    ImeiAssociation.mark_exported(i.get('id'))
+            exported = Helper(self.logger).export_list("full", "ddcds-full-list")
             self.logger.info("Checking if generated list contains IMEIs...")
-            if len(full_list):
-                Helper(self.logger).upload_list(full_list, "ddcds-full-list")
+            if exported:
                 self.logger.info("List has been generated and uploaded successfully.")
                 self.logger.info("exiting...")
                 sys.exit(0)
@@ -21,6 +21,7 @@ from sqlalchemy import text
 
 from scripts.db.seeders import Seed
 from scripts.db.views import Views
+from scripts.db.tallies import ImeiTallies
 from app.api.v1.models.regdetails import RegDetails
 from app.api.v1.models.deregdetails import DeRegDetails
 from app.api.v1.models.regdevice import RegDevice
@@ -48,6 +49,7 @@ def create_views(db):
     db_views = Views(db)
     db_views.create_registration_view()
     db_views.create_de_registration_view()
+    ImeiTallies(db).create()
 
 
 # noinspection SqlDialectInspection,SqlNoDataSourceInspection
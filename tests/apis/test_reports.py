@@ -18,6 +18,7 @@ import os
 import json
 import copy
 
+from app.api.v1.resources.reports import GetDashBoardReports
 from tests._helpers import create_dummy_devices, create_dummy_documents, \
     create_processed_dummy_request, create_assigned_dummy_request, create_dummy_request
 from tests.apis.test_registration_request_apis import REQUEST_DATA as REG_REQ_DATA
@@ -79,6 +80,51 @@ def test_dashboard_reports_for_reviewer(flask_app, db):  # pylint: disable=unuse
     assert data['de-registration']['latest_pending_requests'][0]['id'] == de_reg_request.id
 
 
+def test_dashboard_reports_status_counts(flask_app, db):  # pylint: disable=unused-argument
+    """Verify that the dashboard report counts the requests of an importer per status."""
+
+    request_data = copy.deepcopy(REG_REQUEST_DATA)
+    request_data['user_id'] = 'dashboard-count-user'
+    create_dummy_request(request_data, 'Registration', 'Pending Review')
+    create_dummy_request(request_data, 'Registration', 'Pending Review')
+    create_dummy_request(request_data, 'Registration', 'Approved')
+
+    url = "{0}?user_id={1}&user_type={2}".format(DASHBOARD_API, 'dashboard-count-user', IMPORTER_USER)
+    rv = flask_app.get(url)
+    assert rv.status_code == 200
+    data = json.loads(rv.data.decode('utf-8'))['registration']
+    assert data['total_requests'] == 3
+    assert data['pending_review'] == 2
+    assert data['approved'] == 1
+    assert data['new_requests'] == 0
+    assert data['rejected'] == 0
+    assert 'de-registration' not in json.loads(rv.data.decode('utf-8'))
+
+
+def test_dashboard_reports_cache(flask_app, app, db):  # pylint: disable=unused-argument
+    """Verify that the dashboard report of a user is served from the cache until it expires."""
+
+    request_data = copy.deepcopy(REG_REQUEST_DATA)
+    request_data['user_id'] = 'dashboard-cache-user'
+    create_dummy_request(request_data, 'Registration')
+    url = "{0}?user_id={1}&user_type={2}".format(DASHBOARD_API, 'dashboard-cache-user', IMPORTER_USER)
+
+    app.config['DASHBOARD_CACHE_TTL'] = 60
+    try:
+        rv = flask_app.get(url)
+        assert json.loads(rv.data.decode('utf-8'))['registration']['total_requests'] == 1
+        create_dummy_request(request_data, 'Registration')
+        rv = flask_app.get(url)
+        assert json.loads(rv.data.decode('utf-8'))['registration']['total_requests'] == 1
+    finally:
+        app.config['DASHBOARD_CACHE_TTL'] = 0
+        with GetDashBoardReports.cache_lock:
+            GetDashBoardReports.cache.clear()
+
+    rv = flask_app.get(url)
+    assert json.loads(rv.data.decode('utf-8'))['registration']['total_requests'] == 2
+
+
 def test_registration_set_imei_report_permissions_not_assigned_request(flask_app, db):  # pylint: disable=unused-argument
     """Verify that POST method to test dashboard reports for reviewer user"""
 
@@ -25,6 +25,7 @@ from app.api.v1.models.devicequota import DeviceQuota
 
 # api urls
 SUBMIT_REVIEW_API = 'api/v1/review/submit-review'
+REVIEW_PROGRESS_API = 'api/v1/review/submit-review/progress'
 
 
 def test_invalid_input_params(flask_app):
@@ -358,9 +359,12 @@ def test_registration_request_rejected_section(flask_app, db):  # pylint: disabl
     assert response['request_id'] == request_id
     assert response['message'] == 'case {0} updated successfully'.format(request_id)
     assert response['request_type'] == 'registration_request'
-    imei = ApprovedImeis.get_imei('23010403010533')
-    assert imei.status == 'pending'
-    assert imei.delta_status == 'add'
+    # imei was never exported so it is dropped
+    assert ApprovedImeis.get_imei('23010403010533') is None
+    imei = ApprovedImeis.query.filter_by(imei='23010403010533', request_id=request_id).one()
+    assert imei.status == 'removed'
+    assert imei.delta_status == 'remove'
+    assert imei.removed
     assert Notification.exist_users('assign-rev23442342-user-1')
 
 
@@ -1040,3 +1044,57 @@ def test_get_method_not_allowed(flask_app):
     assert rv.status_code == 405
     data = json.loads(rv.data.decode('utf-8'))
     assert data.get('message') == 'method not allowed'
+
+
+def test_registration_request_approval_progress(flask_app, app, db):  # pylint: disable=unused-argument
+    """Verify that imeis of an approved request are whitelisted in batches and progress is reported."""
+    headers = {'Content-Type': 'application/json'}
+    data = {
+        'device_count': 1,
+        'imei_per_device': 2,
+        'imeis': "[['94310813016100', '94310813016101']]",
+        'm_location': 'local',
+        'user_name': 'reg req progress rev user',
+        'user_id': 'reg-req-progress-rev-user'
+    }
+    request = create_assigned_dummy_request(data, 'Registration', 'reg-req-progress-rev', 'reg req progress rev')
+    request_id = request.id
+    device_data = {
+        'brand': 'samsung',
+        'operating_system': 'android',
+        'model_name': 's9',
+        'model_num': '30jjd',
+        'device_type': 'Smartphone',
+        'technologies': '2G,3G,4G',
+        'reg_id': request.id
+    }
+    create_dummy_devices(device_data, 'Registration', request)
+    DeviceQuota.create('reg-req-progress-rev-user', 'individual')
+    for section in ['device_quota', 'device_description', 'imei_classification', 'imei_registration',
+                    'approval_documents']:
+        RegComments.add(section, 'test comment on section', 'reg-req-progress-rev', 'reg req progress rev', 6,
+                        request_id)
+
+    url = '{0}?request_id={1}&request_type=registration_request'.format(REVIEW_PROGRESS_API, request_id)
+    rv = flask_app.get(url)
+    assert rv.status_code == 204
+
+    app.config['REVIEW_BATCH_SIZE'] = 1
+    try:
+        body_data = {
+            'request_id': request_id,
+            'request_type': 'registration_request',
+            'reviewer_id': 'reg-req-progress-rev'
+        }
+        rv = flask_app.put(SUBMIT_REVIEW_API, data=json.dumps(body_data), headers=headers)
+        assert rv.status_code == 201
+    finally:
+        app.config['REVIEW_BATCH_SIZE'] = 50000
+
+    rv = flask_app.get(url)
+    assert rv.status_code == 200
+    data = json.loads(rv.data.decode('utf-8'))
+    assert data == {'request_id': request_id, 'decision': 'approve', 'state': 'completed', 'total': 2,
+                    'processed': 2}
+    for imei in ['94310813016100', '94310813016101']:
+        assert ApprovedImeis.get_imei(imei).status == 'whitelist'
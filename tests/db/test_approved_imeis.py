@@ -13,6 +13,10 @@ Redistribution and use in source and binary forms, with or without modification,
 
 NO EXPRESS OR IMPLIED LICENSES TO ANY PARTY'S PATENT RIGHTS ARE GRANTED BY THIS LICENSE. THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 """
+import csv
+import datetime
+import io
+
 from sqlalchemy import text
 
 from app.api.v1.models.approvedimeis import ApprovedImeis
@@ -149,3 +153,64 @@ def test_imeis_to_export(db, session):  # pylint: disable=unused-argument
     assert imeis_to_export
     for imei in imeis_to_export:
         assert imei.removed is False
+
+
+def test_bulk_upsert_request_imeis(db, session):  # pylint: disable=unused-argument
+    """Verify that bulk_upsert_request_imeis() adds new, revives removed and skips present imeis."""
+    new_imei = '35678900001234'
+    removed_imei = '35678900002345'
+    present_imei = '35678900003456'
+    request_id = 2376399
+    ApprovedImeis.bulk_insert_imeis([
+        ApprovedImeis(removed_imei, 1234, 'removed', 'remove'),
+        ApprovedImeis(present_imei, 1234, 'whitelist', 'add')
+    ])
+    ApprovedImeis.bulk_upsert_request_imeis([new_imei, removed_imei, present_imei, new_imei], request_id)
+
+    for imei_norm, expected in [(new_imei, (request_id, 'pending', 'add')),
+                                (removed_imei, (request_id, 'pending', 'add')),
+                                (present_imei, (1234, 'whitelist', 'add'))]:
+        imei_data = session.execute(text("""SELECT *
+                                              FROM public.approvedimeis
+                                             WHERE imei='{0}'""".format(imei_norm))).fetchall()
+        assert len(imei_data) == 1
+        assert (imei_data[0].request_id, imei_data[0].status, imei_data[0].delta_status) == expected
+        assert not imei_data[0].removed
+
+
+def test_export_registration_list(db, session):  # pylint: disable=unused-argument
+    """Verify that imeis of the registration lists are selected, written and flagged in a single pass."""
+    exported_at = datetime.datetime.now()
+    ApprovedImeis.bulk_insert_imeis([
+        ApprovedImeis('35678900004567', 2376400, 'whitelist', 'add'),
+        ApprovedImeis('35678900005678', 2376400, 'removed', 'remove')
+    ])
+    imeis = ApprovedImeis.select_export('delta')
+    assert imeis >= 2
+    shards = ApprovedImeis.export_shards(2)
+    assert len(shards) == 2
+    assert shards[0][0] <= shards[0][1] < shards[1][0] <= shards[1][1]
+    ApprovedImeis.cache_metadata()
+    output = io.StringIO()
+    ApprovedImeis.copy_exported('delta', output)
+    rows = {row['APPROVED_IMEI']: row for row in csv.DictReader(io.StringIO(output.getvalue()))}
+    assert rows['35678900004567']['status'] == 'whitelist'
+    assert rows['35678900004567']['change_type'] == 'add'
+    assert rows['35678900005678']['change_type'] == 'remove'
+    assert ApprovedImeis.mark_exported(exported_at, exported_at) == imeis
+
+    imei_data = session.execute(text("""SELECT imei, exported, exported_at, removed
+                                          FROM public.approvedimeis
+                                         WHERE imei IN ('35678900004567', '35678900005678')
+                                      ORDER BY imei""")).fetchall()
+    assert [(imei.exported, imei.exported_at, imei.removed) for imei in imei_data] == \
+        [(True, exported_at, False), (True, exported_at, True)]
+
+    # exported imeis are part of the next delta list only when changed again
+    assert ApprovedImeis.select_export('delta') == 0
+    assert ApprovedImeis.select_export('delta', since=exported_at) == 0
+    session.execute(text("""UPDATE approvedimeis
+                               SET updated_at = :updated_at
+                             WHERE imei = '35678900004567'"""),
+                    {'updated_at': exported_at + datetime.timedelta(seconds=1)})
+    assert ApprovedImeis.select_export('delta', since=exported_at) == 1
@@ -0,0 +1,40 @@
+"""
+DRS IMEI Association Unit tests.
+Copyright (c) 2018-2021 Qualcomm Technologies, Inc.
+All rights reserved.
+Redistribution and use in source and binary forms, with or without modification, are permitted (subject to the limitations in the disclaimer below) provided that the following conditions are met:
+
+    Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+    Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+    Neither the name of Qualcomm Technologies, Inc. nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+    The origin of this software must not be misrepresented; you must not claim that you wrote the original software. If you use this software in a product, an acknowledgment is required by displaying the trademark/log as per the details provided here: https://www.qualcomm.com/documents/dirbs-logo-and-brand-guidelines
+    Altered source versions must be plainly marked as such, and must not be misrepresented as being the original software.
+    This notice may not be removed or altered from any source distribution.
+
+NO EXPRESS OR IMPLIED LICENSES TO ANY PARTY'S PATENT RIGHTS ARE GRANTED BY THIS LICENSE. THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+from app.api.v1.models.association import ImeiAssociation
+
+
+def test_export_ddcds_lists(db, session):  # pylint: disable=unused-argument
+    """Verify that the DDCDS lists are streamed in chunks and marked as exported in bulk."""
+    for imei in ['35282004100001', '35282004100002', '35282004100003']:
+        ImeiAssociation(imei, '4410377898999').add()
+
+    def exported(list_type):
+        rows = [row for chunk in ImeiAssociation.iter_export(list_type, chunk_size=2) for row in chunk]
+        return {row['imei']: row['change_type'] for row in rows if row['uid'] == '4410377898999'}
+
+    assert exported('full') == dict.fromkeys(['35282004100001', '35282004100002', '35282004100003'])
+    assert exported('delta') == dict.fromkeys(['35282004100001', '35282004100002', '35282004100003'], 'add')
+
+    for chunk in ImeiAssociation.iter_export('delta', chunk_size=2):
+        ImeiAssociation.bulk_mark_exported([row['id'] for row in chunk])
+    assert exported('delta') == {}
+
+    # de-associations are part of the delta list once they are later than the export
+    session.execute("""UPDATE associatedimeis
+                          SET exported_at = exported_at - interval '1 minute', end_date = now()
+                        WHERE imei = '35282004100002'""")
+    assert exported('delta') == {'35282004100002': 'remove'}
+    assert '35282004100002' not in exported('full')
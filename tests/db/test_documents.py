@@ -14,6 +14,7 @@ Redistribution and use in source and binary forms, with or without modification,
 
 NO EXPRESS OR IMPLIED LICENSES TO ANY PARTY'S PATENT RIGHTS ARE GRANTED BY THIS LICENSE. THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 """
+from app.api.v1.helpers.lookupcache import LookupCache
 from app.api.v1.models.documents import Documents
 
 
@@ -25,6 +26,7 @@ def test_get_label_by_id(session):
     ]
     session.bulk_save_objects(docs)
     session.commit()
+    LookupCache.invalidate()
     assert Documents.get_label_by_id(111) == 'shp doc'
     assert Documents.get_label_by_id(211) == 'ath doc'
     assert Documents.get_label_by_id(2334242323322) is None
@@ -38,6 +40,7 @@ def test_get_document_by_id(session):
     ]
     session.bulk_save_objects(docs)
     session.commit()
+    LookupCache.invalidate()
     assert Documents.get_document_by_id(1110)
     assert Documents.get_document_by_id(2110)
     assert Documents.get_document_by_id(79897777879) is None
@@ -51,6 +54,7 @@ def test_get_document_by_name(session):
     ]
     session.bulk_save_objects(docs)
     session.commit()
+    LookupCache.invalidate()
     assert Documents.get_document_by_name('shp doc', 1)
     assert Documents.get_document_by_name('ath doc', 2)
     assert Documents.get_document_by_name('88668', 1) is None
@@ -66,6 +70,7 @@ def test_get_documents(session):
     ]
     session.bulk_save_objects(docs)
     session.commit()
+    LookupCache.invalidate()
     docs_1 = Documents.get_documents('registration')
     assert docs_1
     for doc in docs_1:
@@ -87,6 +92,7 @@ def test_required_docs(session):
     ]
     session.bulk_save_objects(docs)
     session.commit()
+    LookupCache.invalidate()
     docs = Documents.get_required_docs('registration')
     for doc in docs:
         assert doc.required
@@ -0,0 +1,60 @@
+"""
+DRS Imei Tally Unit tests.
+Copyright (c) 2018-2021 Qualcomm Technologies, Inc.
+All rights reserved.
+Redistribution and use in source and binary forms, with or without modification, are permitted (subject to the limitations in the disclaimer below) provided that the following conditions are met:
+
+    Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+    Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+    Neither the name of Qualcomm Technologies, Inc. nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+    The origin of this software must not be misrepresented; you must not claim that you wrote the original software. If you use this software in a product, an acknowledgment is required by displaying the trademark/log as per the details provided here: https://www.qualcomm.com/documents/dirbs-logo-and-brand-guidelines
+    Altered source versions must be plainly marked as such, and must not be misrepresented as being the original software.
+    This notice may not be removed or altered from any source distribution.
+
+NO EXPRESS OR IMPLIED LICENSES TO ANY PARTY'S PATENT RIGHTS ARE GRANTED BY THIS LICENSE. THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+from sqlalchemy import text
+
+from app.api.v1.models.imeitally import ImeiTally
+from app.api.v1.models.regdetails import RegDetails
+from scripts.db.tallies import ImeiTallies
+from tests._helpers import create_dummy_request
+
+REQUEST_DATA = {
+    'device_count': 2,
+    'imei_per_device': 1,
+    'imeis': "[['86834403380390', '86834403380391']]",
+    'm_location': 'local',
+    'user_name': 'imei tally user',
+    'user_id': 'imei-tally-user'
+}
+
+
+def test_imei_tally_status_transitions(db, session):  # pylint: disable=unused-argument
+    """Verify that imei tallies of a user follow status changes of the user's requests."""
+    assert ImeiTally.get_counts('imei-tally-user', 'registration') is None
+
+    request = create_dummy_request(dict(REQUEST_DATA), 'Registration')
+    assert ImeiTally.get_counts('imei-tally-user', 'registration') == {
+        'pending_registration': 2, 'registered': 0, 'not_registered': 0}
+    assert ImeiTally.get_counts('imei-tally-user', 'de_registration') == {
+        'pending_registration': 0, 'registered': 0, 'not_registered': 0}
+
+    request.update_status('Approved')
+    create_dummy_request(dict(REQUEST_DATA), 'Registration', 'Rejected')
+    assert RegDetails.get_imeis_count('imei-tally-user') == {
+        'pending_registration': 0, 'registered': 2, 'not_registered': 2}
+
+
+def test_imei_tally_rebuild(db, session):  # pylint: disable=unused-argument
+    """Verify that rebuilding the tallies reconciles them with the requests."""
+    request_data = dict(REQUEST_DATA, user_id='imei-tally-rebuild-user')
+    create_dummy_request(request_data, 'Registration', 'In Review')
+    session.execute(text("""UPDATE imeitally
+                               SET reg_pending = 100
+                             WHERE user_id = 'imei-tally-rebuild-user'"""))
+    assert ImeiTally.get_counts('imei-tally-rebuild-user', 'registration')['pending_registration'] == 100
+
+    for query in ImeiTallies.rebuild_queries():
+        session.execute(text(query))
+    assert ImeiTally.get_counts('imei-tally-rebuild-user', 'registration')['pending_registration'] == 2
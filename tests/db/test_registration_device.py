@@ -15,3 +15,90 @@ Redistribution and use in source and binary forms, with or without modification,
 NO EXPRESS OR IMPLIED LICENSES TO ANY PARTY'S PATENT RIGHTS ARE GRANTED BY THIS LICENSE. THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 """
 
+import json
+import uuid
+
+from app.api.v1.helpers.pipeline import RequestPipeline
+from app.api.v1.models.devicequota import DeviceQuota
+from app.api.v1.models.imeidevice import ImeiDevice
+from app.api.v1.models.regdetails import RegDetails
+from app.api.v1.models.requeststage import RequestStage
+from app.api.v1.models.reviewjob import ReviewJob
+from app.api.v1.models.status import Status
+from tests._helpers import create_registration, create_dummy_devices
+
+REQUEST_DATA = {
+    'device_count': 1,
+    'imei_per_device': 2,
+    'imeis': "[['86834403015010', '868344030150111']]",
+    'm_location': 'local',
+    'user_name': 'test-abc',
+    'user_id': '17102'
+}
+
+DEVICE_DATA = {
+    'brand': 'samsung',
+    'operating_system': 'android',
+    'model_name': 's9',
+    'model_num': '30jjd',
+    'device_type': 'Smartphone',
+    'technologies': '2G,3G,4G'
+}
+
+
+def test_get_normalized_imeis(db, session):  # pylint: disable=unused-argument
+    """Verify that normalized imeis of a request are returned from imeidevice table."""
+    request = create_registration(REQUEST_DATA, uuid.uuid4())
+    device_data = dict(DEVICE_DATA, reg_id=request.id)
+    request = create_dummy_devices(device_data, 'Registration', request)
+    imeis = ImeiDevice.get_normalized_imeis(request.id)
+    assert sorted(imeis) == ['86834403015010', '86834403015011']
+    assert sorted(imeis) == sorted(RegDetails.get_normalized_imeis(request))
+    assert ImeiDevice.get_normalized_imeis(-1) == []
+    assert ImeiDevice.count_request_imeis(request.id) == 2
+    assert ImeiDevice.count_request_imeis(-1) == 0
+
+
+def test_request_stages(db, session):  # pylint: disable=unused-argument
+    """Verify that devices of a webpage request are persisted eagerly and completed stages are skipped."""
+    request = create_registration(REQUEST_DATA, uuid.uuid4())
+    device_data = dict(DEVICE_DATA, reg_id=request.id)
+    request = create_dummy_devices(device_data, 'Registration', request)
+    request_stage = RequestStage.get(request.tracking_id)
+    assert request_stage.request_type == 'registration'
+    assert request_stage.request_id == request.id
+    assert request_stage.stage == 'persisted'
+    assert request_stage.is_completed('parsed')
+    assert not request_stage.is_completed('classified')
+
+    RequestPipeline.execute(request.tracking_id, 'persisted')
+    assert sorted(ImeiDevice.get_request_imeis(request.id)) == ['86834403015010', '868344030150111']
+
+    request_stage = RequestStage.begin(request.tracking_id, 'registration', request.id)
+    assert request_stage.stage is None
+    assert not request_stage.is_completed('parsed')
+
+
+def test_review_stage_redelivery(db, session):  # pylint: disable=unused-argument
+    """Verify that the review stage is committed with the decision and a redelivered stage is skipped."""
+    request = create_registration(dict(REQUEST_DATA, user_id='review-stage-user'), uuid.uuid4())
+    device_data = dict(DEVICE_DATA, reg_id=request.id)
+    request = create_dummy_devices(device_data, 'Registration', request)
+    quota = DeviceQuota.get('review-stage-user') or DeviceQuota.create('review-stage-user', 'individual')
+    reg_quota = quota.reg_quota
+    summary = {'non_compliant': 0, 'stolen': 0, 'compliant_active': 0, 'provisional_non_compliant': 0,
+               'provisional_compliant': 0, 'compliant_report_name': 'report.tsv'}
+    request.summary = json.dumps({'summary': summary})
+    request_stage = RequestStage.get(request.tracking_id)
+    request_stage.auto_review = True
+    request_stage.complete('reported')
+    session.commit()
+
+    RequestPipeline.execute(request.tracking_id, 'reviewed')
+    assert RequestStage.get(request.tracking_id).is_completed('reviewed')
+    assert ReviewJob.get(request.id).decision == 'approve'
+    assert Status.get_status_type(RegDetails.get_by_id(request.id).status) == 'Approved'
+    assert DeviceQuota.get('review-stage-user').reg_quota == reg_quota - 2
+
+    RequestPipeline.execute(request.tracking_id, 'reviewed')
+    assert DeviceQuota.get('review-stage-user').reg_quota == reg_quota - 2
@@ -0,0 +1,97 @@
+"""
+DRS Search Tables Unit tests.
+Copyright (c) 2018-2021 Qualcomm Technologies, Inc.
+All rights reserved.
+Redistribution and use in source and binary forms, with or without modification, are permitted (subject to the limitations in the disclaimer below) provided that the following conditions are met:
+
+    Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+    Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+    Neither the name of Qualcomm Technologies, Inc. nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+    The origin of this software must not be misrepresented; you must not claim that you wrote the original software. If you use this software in a product, an acknowledgment is required by displaying the trademark/log as per the details provided here: https://www.qualcomm.com/documents/dirbs-logo-and-brand-guidelines
+    Altered source versions must be plainly marked as such, and must not be misrepresented as being the original software.
+    This notice may not be removed or altered from any source distribution.
+
+NO EXPRESS OR IMPLIED LICENSES TO ANY PARTY'S PATENT RIGHTS ARE GRANTED BY THIS LICENSE. THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+from sqlalchemy import text
+
+from app.api.v1.helpers.pagination import Pagination
+from app.api.v1.helpers.search_registration import SearchRegistraion
+from app.api.v1.models.imeidevice import ImeiDevice
+from app.api.v1.models.status import Status
+from tests._helpers import create_assigned_dummy_request, create_dummy_devices
+
+REQUEST_DATA = {
+    'device_count': 1,
+    'imei_per_device': 1,
+    'imeis': "[['86834403380290']]",
+    'm_location': 'local',
+    'user_name': 'search table user',
+    'user_id': 'search-table-user'
+}
+
+DEVICE_DATA = {
+    'brand': 'Xiaomi',
+    'operating_system': 'android',
+    'model_name': 'Mi 8',
+    'model_num': 'Mi 8',
+    'device_type': 'Smartphone',
+    'technologies': ['2G', '3G']
+}
+
+
+def get_search_rows(session, request_id):
+    """Return rows of a registration request in the search table."""
+    return session.execute(text("""SELECT *
+                                     FROM search_registration
+                                    WHERE id = :request_id"""), {'request_id': request_id}).fetchall()
+
+
+def test_search_registration_refresh(db, session):  # pylint: disable=unused-argument
+    """Verify that the search table follows changes of a request, its device and imeis."""
+    request = create_assigned_dummy_request(dict(REQUEST_DATA), 'Registration', 'search-reviewer', 'reviewer')
+    rows = get_search_rows(session, request.id)
+    assert len(rows) == 1
+    assert rows[0].status == Status.get_status_type(request.status)
+    assert rows[0].brand is None
+
+    device_data = dict(DEVICE_DATA, reg_id=request.id)
+    request = create_dummy_devices(device_data, 'Registration', request)
+    rows = get_search_rows(session, request.id)
+    assert len(rows) == 1
+    assert rows[0].brand == 'Xiaomi'
+    assert rows[0].technologies == '2G, 3G'
+    assert rows[0].imeis is None
+
+    device_id = session.execute(text('SELECT id FROM device WHERE reg_details_id = :request_id'),
+                                {'request_id': request.id}).scalar()
+    ImeiDevice.bulk_copy([(device_id, ['86834403380290'])])
+    request.update_status('Approved')
+    rows = get_search_rows(session, request.id)
+    assert len(rows) == 1
+    assert rows[0].status == 'Approved'
+    assert rows[0].brand == 'Xiaomi'
+    assert rows[0].technologies == '2G, 3G'
+    assert rows[0].imeis == '86834403380290'
+    imei_query = text('SELECT id FROM search_registration WHERE {0}'.format(
+        SearchRegistraion.IMEI_FILTER.format(imeis=':imeis')))
+    assert session.execute(imei_query, {'imeis': ['86834403380290', '86834403380291']}).scalar() == request.id
+    assert session.execute(imei_query, {'imeis': ['8683440338029011']}).fetchall() == []
+
+    session.execute(text('DELETE FROM imeidevice WHERE device_id = :device_id'), {'device_id': device_id})
+    assert get_search_rows(session, request.id)[0].imeis is None
+
+
+def test_search_pagination(db, session):  # pylint: disable=unused-argument
+    """Verify that pages queried from the database match pages of the whole search result."""
+    for _ in range(3):
+        create_assigned_dummy_request(dict(REQUEST_DATA), 'Registration', 'search-reviewer', 'reviewer')
+    query = "SELECT id, updated_at FROM search_registration WHERE user_id = 'search-table-user'"
+    rows = [dict(row.items()) for row in session.execute(text(query + ' ORDER BY updated_at DESC, id DESC'))]
+    assert len(rows) >= 3
+
+    for start, limit in [(1, 2), (2, 2), (len(rows), 10)]:
+        assert Pagination.get_paginated_query(query, '/search', start, limit, 'updated_at DESC, id DESC') == \
+            Pagination.get_paginated_list(rows, '/search', start, limit)
+    paginated_data = Pagination.get_paginated_query(query, '/search', len(rows) + 1, 2, 'updated_at DESC, id DESC')
+    assert paginated_data == {'start': len(rows) + 1, 'limit': 2, 'count': len(rows)}
@@ -14,6 +14,8 @@ Redistribution and use in source and binary forms, with or without modification,
 
 NO EXPRESS OR IMPLIED LICENSES TO ANY PARTY'S PATENT RIGHTS ARE GRANTED BY THIS LICENSE. THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 """
+from app.api.v1.helpers.lookupcache import LookupCache
+from app.api.v1.models.lookupversion import LookupVersion
 from app.api.v1.models.status import Status
 
 
@@ -29,6 +31,7 @@ def test_get_status_id(session):
     ]
     session.bulk_save_objects(statuses)
     session.commit()
+    LookupCache.invalidate()
     assert Status.get_status_id('ABCD') == 111
     assert Status.get_status_id('BCDE') == 112
     assert Status.get_status_id('GHIJK') == 133
@@ -47,6 +50,7 @@ def test_get_status_type(session):
     ]
     session.bulk_save_objects(statuses)
     session.commit()
+    LookupCache.invalidate()
     assert Status.get_status_type(115) == 'ABCD'
     assert Status.get_status_type(116) == 'BCDE'
     assert Status.get_status_type(122) == 'GHIJK'
@@ -62,5 +66,36 @@ def test_get_status_types(session):
     ]
     session.bulk_save_objects(statuses)
     session.commit()
+    LookupCache.invalidate()
     res = Status.get_status_types()
     assert res
+
+
+def test_status_lookup_cache(session):
+    """Verify that statuses are served from the lookup cache until it is invalidated."""
+    LookupCache.invalidate()
+    assert Status.get_status_id('Cached Status') is None
+    version = LookupCache.version
+    session.bulk_save_objects([Status(id=1001, description='Cached Status')])
+    session.commit()
+    assert Status.get_status_id('Cached Status') is None
+    assert LookupCache.version == version
+
+    LookupCache.invalidate()
+    assert Status.get_status_id('Cached Status') == 1001
+    assert Status.get_status_type(1001) == 'Cached Status'
+
+
+def test_status_lookup_cache_version(session):
+    """Verify that the lookup cache is reloaded when another process moves the version in the database."""
+    LookupCache.invalidate()
+    assert Status.get_status_id('Shared Status') is None
+    session.bulk_save_objects([Status(id=1002, description='Shared Status')])
+    version = LookupVersion.bump()
+    session.commit()
+    assert LookupVersion.get() == version
+    assert Status.get_status_id('Shared Status') is None
+
+    LookupCache.checked_at -= LookupCache.CHECK_INTERVAL
+    assert Status.get_status_id('Shared Status') == 1002
+    assert LookupCache.version == version
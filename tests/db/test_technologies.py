@@ -14,6 +14,7 @@ Redistribution and use in source and binary forms, with or without modification,
 
 NO EXPRESS OR IMPLIED LICENSES TO ANY PARTY'S PATENT RIGHTS ARE GRANTED BY THIS LICENSE. THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 """
+from app.api.v1.helpers.lookupcache import LookupCache
 from app.api.v1.models.technologies import Technologies
 
 
@@ -30,6 +31,7 @@ def test_get_technology_id(session):
     ]
     session.bulk_save_objects(techs)
     session.commit()
+    LookupCache.invalidate()
     assert Technologies.get_technology_id('123 Tech') == 123
     assert Technologies.get_technology_id('567 Tech') == 567
     assert Technologies.get_technology_id('890 Tech') == 890
@@ -45,6 +47,7 @@ def test_get_technologies(session):
     ]
     session.bulk_save_objects(techs)
     session.commit()
+    LookupCache.invalidate()
     assert Technologies.get_technologies()
 
 
@@ -57,6 +60,7 @@ def test_get_technologies_names(session):
     ]
     session.bulk_save_objects(techs)
     session.commit()
+    LookupCache.invalidate()
     for name in Technologies.get_technologies_names():
         assert isinstance(name, str)
 
@@ -70,6 +74,7 @@ def test_get_technology_by_id(session):
     ]
     session.bulk_save_objects(techs)
     session.commit()
+    LookupCache.invalidate()
     assert Technologies.get_technology_by_id(123123) == '123 Tech'
     assert Technologies.get_technology_by_id(567123) == '567 Tech'
     assert Technologies.get_technology_by_id(890123) == '890 Tech'
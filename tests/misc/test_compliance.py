@@ -0,0 +1,115 @@
+"""
+Compliance summary unit tests
+
+Copyright (c) 2018-2020 Qualcomm Technologies, Inc.
+All rights reserved.
+Redistribution and use in source and binary forms, with or without modification, are permitted (subject to the limitations in the disclaimer below) provided that the following conditions are met:
+
+    Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+    Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+    Neither the name of Qualcomm Technologies, Inc. nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+    The origin of this software must not be misrepresented; you must not claim that you wrote the original software. If you use this software in a product, an acknowledgment is required by displaying the trademark/log as per the details provided here: https://www.qualcomm.com/documents/dirbs-logo-and-brand-guidelines
+    Altered source versions must be plainly marked as such, and must not be misrepresented as being the original software.
+    This notice may not be removed or altered from any source distribution.
+
+NO EXPRESS OR IMPLIED LICENSES TO ANY PARTY'S PATENT RIGHTS ARE GRANTED BY THIS LICENSE. THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+import csv
+import gzip
+
+import pytest
+
+from app.api.v1.helpers.compliance import ComplianceReportWriter, ComplianceSummary
+from app.api.v1.helpers.reports_generator import BulkCommonResources
+
+
+def core_record(imei, stolen=None, registered=None, seen=False, in_registration_list=False, gsma_not_found=False,
+                block_date=None, met=()):
+    """Return DIRBS Core imei-batch result of a single IMEI."""
+    return {
+        'imei_norm': imei,
+        'block_date': block_date,
+        'stolen_status': {'provisional_only': stolen},
+        'registration_status': {'provisional_only': registered},
+        'realtime_checks': {'ever_observed_on_network': seen, 'gsma_not_found': gsma_not_found,
+                            'in_registration_list': in_registration_list, 'invalid_imei': False},
+        'classification_state': {
+            'blocking_conditions': [{'condition_name': name, 'condition_met': name in met}
+                                    for name in ['gsma_not_found', 'duplicate']],
+            'informative_conditions': [{'condition_name': 'malformed', 'condition_met': 'malformed' in met}]
+        }
+    }
+
+
+RECORDS = [
+    core_record('35000000000001', seen=True, in_registration_list=True),
+    core_record('35000000000002', registered=True),
+    core_record('35000000000003', stolen=True, block_date='20200101', met=['duplicate']),
+    core_record('35000000000004', stolen=False, seen=True),
+    core_record('35000000000005', gsma_not_found=True, met=['gsma_not_found', 'malformed']),
+    core_record('35000000000006')
+]
+
+
+def test_compliance_summary(app, tmpdir):  # pylint: disable=unused-argument
+    """Verify that columnar summary matches compliance status of every record."""
+    with ComplianceReportWriter(str(tmpdir), 'compliant_report.tsv', compress=False) as writer:
+        summary = ComplianceSummary(writer).add(RECORDS[:2]).add(RECORDS[2:])
+    response = summary.summary('tracking-id')
+    assert response['verified_imei'] == 6
+    assert response['provisional_stolen'] == 1
+    assert response['stolen'] == 1
+    assert response['seen_on_network'] == 2
+    assert response['count_per_condition'] == {'gsma_not_found': 1, 'duplicate': 1, 'malformed': 1}
+    assert response['compliant'] == 1
+    assert response['compliant_active'] == 1
+    assert response['provisional_compliant'] == 1
+    assert response['non_compliant'] == 2
+    assert response['provisional_non_compliant'] == 0
+    assert response['compliant_report_name'] == 'compliant_report.tsv'
+
+    with open(str(tmpdir.join('compliant_report.tsv'))) as report:
+        rows = list(csv.DictReader(report, delimiter='\t'))
+    assert [row['imei'] for row in rows] == [record['imei_norm'] for record in RECORDS]
+    for row, record in zip(rows, RECORDS):
+        status = BulkCommonResources.compliance_status(resp=record, status_type='bulk', imei=record['imei_norm'])
+        assert row['status'] == status['status']
+        assert row['inactivity_reasons'] == str(status.get('inactivity_reasons', ''))
+    assert [row['stolen_status'] for row in rows] == ['Not Stolen', 'Not Stolen', 'Pending Stolen Verification',
+                                                      'Stolen', 'Not Stolen', 'Not Stolen']
+
+    with open(str(tmpdir.join('user_report-compliant_report.tsv'))) as report:
+        header = next(csv.reader(report, delimiter='\t'))
+    assert header == ['', 'imei', 'status', 'inactivity_reasons']
+
+
+def test_compliance_summary_compressed(app, tmpdir):  # pylint: disable=unused-argument
+    """Verify that compressed reports hold the same rows as batches are added."""
+    with ComplianceReportWriter(str(tmpdir), 'compliant_report.tsv', compress=True, buffer_size=64) as writer:
+        summary = ComplianceSummary(writer)
+        for record in RECORDS:
+            summary.add([record])
+    assert summary.summary('tracking-id')['compliant_report_name'] == 'compliant_report.tsv.gz'
+
+    with gzip.open(str(tmpdir.join('compliant_report.tsv.gz')), 'rt', newline='') as report:
+        rows = list(csv.DictReader(report, delimiter='\t'))
+    assert [row[''] for row in rows] == [str(index) for index in range(len(RECORDS))]
+    assert [row['imei'] for row in rows] == [record['imei_norm'] for record in RECORDS]
+    with gzip.open(str(tmpdir.join('user_report-compliant_report.tsv.gz')), 'rt', newline='') as report:
+        assert len(list(csv.DictReader(report, delimiter='\t'))) == len(RECORDS)
+
+
+def test_compliance_report_removed_on_failure(app, tmpdir):  # pylint: disable=unused-argument
+    """Verify that partially written reports are removed when the summary fails."""
+    with pytest.raises(KeyError):
+        with ComplianceReportWriter(str(tmpdir), 'compliant_report.tsv', compress=False) as writer:
+            ComplianceSummary(writer).add(RECORDS).add([{'imei_norm': '35000000000007'}])
+    assert tmpdir.listdir() == []
+
+
+def test_compliance_summary_empty(app, tmpdir):  # pylint: disable=unused-argument
+    """Verify that no summary or reports are generated without records."""
+    with ComplianceReportWriter(str(tmpdir), 'compliant_report.tsv', compress=False) as writer:
+        assert ComplianceSummary(writer).add([]).summary('tracking-id') == {}
+    assert tmpdir.listdir() == []
@@ -0,0 +1,87 @@
+"""
+DIRBS Core client unit tests
+
+Copyright (c) 2018-2020 Qualcomm Technologies, Inc.
+All rights reserved.
+Redistribution and use in source and binary forms, with or without modification, are permitted (subject to the limitations in the disclaimer below) provided that the following conditions are met:
+
+    Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+    Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+    Neither the name of Qualcomm Technologies, Inc. nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+    The origin of this software must not be misrepresented; you must not claim that you wrote the original software. If you use this software in a product, an acknowledgment is required by displaying the trademark/log as per the details provided here: https://www.qualcomm.com/documents/dirbs-logo-and-brand-guidelines
+    Altered source versions must be plainly marked as such, and must not be misrepresented as being the original software.
+    This notice may not be removed or altered from any source distribution.
+
+NO EXPRESS OR IMPLIED LICENSES TO ANY PARTY'S PATENT RIGHTS ARE GRANTED BY THIS LICENSE. THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+import pytest
+
+from app.api.v1.helpers.coreclient import CoreBatchClient, CoreClientError
+
+
+class FakeCoreClient(CoreBatchClient):
+    """Core client which classifies batches locally and fails the configured batches once."""
+
+    def __init__(self, failing=None, latency=0.1, **kwargs):
+        """Constructor."""
+        super().__init__(backoff_base=0.001, backoff_cap=0.01, **kwargs)
+        self.failing = set(failing or [])
+        self.latency = latency
+        self.batches = []
+
+    def fetch(self, imeis):
+        """Return one result per imei without calling Core."""
+        self.batches.append(list(imeis))
+        if imeis[0] in self.failing:
+            self.failing.discard(imeis[0])
+            raise CoreClientError('imei batch failed with status 503')
+        return [{'imei_norm': imei} for imei in imeis], self.latency
+
+
+def test_core_client_classify(app):  # pylint: disable=unused-argument
+    """Verify that results of all batches are returned in order even when batches fail."""
+    imeis = ['{0:014d}'.format(i) for i in range(2500)]
+    client = FakeCoreClient(failing=['00000000000000', '00000000001000'], max_in_flight=3,
+                            min_batch_size=100, max_batch_size=1000)
+    records = client.classify(imeis)
+    assert [record['imei_norm'] for record in records] == imeis
+    assert sum(len(batch) for batch in client.batches) == len(imeis) + 1000 + 1000
+    assert all(len(batch) <= 1000 for batch in client.batches)
+
+
+def test_core_client_iter_classify(app):  # pylint: disable=unused-argument
+    """Verify that batches are yielded in order of the input as soon as preceding batches are classified."""
+    imeis = ['{0:014d}'.format(i) for i in range(1000)]
+    with FakeCoreClient(failing=['00000000000000'], max_in_flight=2, min_batch_size=100,
+                        max_batch_size=100) as client:
+        batches = list(client.iter_classify(imeis))
+    assert [len(batch) for batch in batches] == [100] * 10
+    assert [record['imei_norm'] for batch in batches for record in batch] == imeis
+
+
+def test_core_client_adaptive_batch_size(app):  # pylint: disable=unused-argument
+    """Verify that batch size shrinks on slow responses or failures and grows back on fast ones."""
+    client = FakeCoreClient(min_batch_size=100, max_batch_size=1000, target_latency=1)
+    assert client.batch_size == 1000
+    client.adapt(5)
+    assert client.batch_size == 500
+    client.adapt()
+    client.adapt()
+    client.adapt()
+    assert client.batch_size == 100
+    client.adapt(0.5)
+    assert client.batch_size == 125
+
+    client = FakeCoreClient(latency=5, max_in_flight=1, min_batch_size=100, max_batch_size=1000, target_latency=1)
+    imeis = ['{0:014d}'.format(i) for i in range(1750)]
+    assert len(client.classify(imeis)) == 1750
+    assert [len(batch) for batch in client.batches] == [1000, 500, 250]
+
+
+def test_core_client_exhausted_retries(app):  # pylint: disable=unused-argument
+    """Verify that a batch failing more than max retries is reported instead of being dropped."""
+    client = FakeCoreClient(max_retries=0)
+    client.failing.add('00000000000000')
+    with pytest.raises(CoreClientError):
+        client.classify(['{0:014d}'.format(i) for i in range(10)])
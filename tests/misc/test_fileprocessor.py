@@ -0,0 +1,104 @@
+"""
+File Processor unit tests
+
+Copyright (c) 2018-2020 Qualcomm Technologies, Inc.
+All rights reserved.
+Redistribution and use in source and binary forms, with or without modification, are permitted (subject to the limitations in the disclaimer below) provided that the following conditions are met:
+
+    Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+    Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+    Neither the name of Qualcomm Technologies, Inc. nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+    The origin of this software must not be misrepresented; you must not claim that you wrote the original software. If you use this software in a product, an acknowledgment is required by displaying the trademark/log as per the details provided here: https://www.qualcomm.com/documents/dirbs-logo-and-brand-guidelines
+    Altered source versions must be plainly marked as such, and must not be misrepresented as being the original software.
+    This notice may not be removed or altered from any source distribution.
+
+NO EXPRESS OR IMPLIED LICENSES TO ANY PARTY'S PATENT RIGHTS ARE GRANTED BY THIS LICENSE. THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+import os
+from app.api.v1.helpers.fileprocessor import StreamProcessor, ImeiValidator, TacGroups
+
+
+def write_file(path, rows):
+    """Helper to write rows of imeis to a file."""
+    with open(str(path), 'w') as f:
+        for row in rows:
+            f.write('\t'.join(row))
+            f.write('\n')
+    return str(path)
+
+
+def test_stream_processor_valid_registration_file(app, tmpdir):  # pylint: disable=unused-argument
+    """Verify that the stream processor returns device imeis for a valid file."""
+    rows = [['869597002886700', '869597002886800'], ['869597002887000', '869597002887100']]
+    file_path = write_file(tmpdir.join('valid.tsv'), rows)
+    response = StreamProcessor(file_path, {'device_count': 2, 'imei_per_device': 2}, chunk_size=1)\
+        .process('registration')
+    assert response == rows
+
+
+def test_stream_processor_registration_errors(app, tmpdir):  # pylint: disable=unused-argument
+    """Verify that the stream processor reports all the errors of the file."""
+    rows = [['86959700288670', '8695970028867a'], ['869597002886701'], ['1234']]
+    file_path = write_file(tmpdir.join('invalid.tsv'), rows)
+    response = StreamProcessor(file_path, {'device_count': 2, 'imei_per_device': 3}).process('registration')
+    assert 'imei_per_device' in response
+    assert 'device_count' in response
+    assert 'invalid_imeis' in response
+    assert 'duplicate_imeis' in response
+    assert 'missing_imeis' in response
+    assert 'invalid_format' in response
+    assert 'limit' not in response
+
+
+def test_stream_processor_de_registration_file(app, tmpdir):  # pylint: disable=unused-argument
+    """Verify that the stream processor maps de-registration imeis to tacs."""
+    rows = [['86954700000100'], ['86954700900100'], ['12340510454333']]
+    file_path = write_file(tmpdir.join('request_file.txt'), rows)
+    response = StreamProcessor(file_path, {'device_count': 3}).process('de_registration')
+    assert response == {'86954700': ['86954700000100', '86954700900100'], '12340510': ['12340510454333']}
+
+    response = StreamProcessor(file_path, {'device_count': 4}).process('de_registration')
+    assert 'device_count' in response
+    os.remove(file_path)
+
+
+def test_tac_groups(app):  # pylint: disable=unused-argument
+    """Verify that imeis are grouped by tac in order of appearance and can be filtered and flattened."""
+    imeis = ['35111111000001', '12345678000002', '35111111000003', '99999999000004']
+    groups = TacGroups.from_imeis(imeis)
+    assert list(groups.keys()) == ['35111111', '12345678', '99999999']
+    assert groups['35111111'] == ['35111111000001', '35111111000003']
+    assert groups.flatten() == ['35111111000001', '35111111000003', '12345678000002', '99999999000004']
+
+    filtered = groups.subset(['99999999', '35111111', '00000000', '99999999'])
+    assert filtered == {'99999999': ['99999999000004'], '35111111': ['35111111000001', '35111111000003']}
+    assert filtered.flatten() == ['99999999000004', '35111111000001', '35111111000003']
+    assert filtered.get('00000000') is None
+    assert TacGroups.from_imeis([]).flatten() == []
+
+
+def test_imei_validator(app):  # pylint: disable=unused-argument
+    """Verify that the vectorized validator reports invalid, badly formatted and duplicate imeis."""
+    imeis = ['490154203237518', '490154203237519', '12345', '1234567890123a', '49015420323751',
+             '12345678901234567', '12345', '4901542032375180']
+    validator = ImeiValidator.from_imeis(imeis)
+    assert validator.invalid_imeis() == ['12345', '12345678901234567', '12345']
+    assert validator.invalid_format() == ['1234567890123a']
+    assert validator.duplicate_imeis() == ['490154203237519', '49015420323751', '12345', '4901542032375180']
+    assert validator.luhn_valid().tolist() == [True, False, True, True, True, True, True, True]
+
+
+def test_stream_processor_blocks(app, tmpdir):  # pylint: disable=unused-argument
+    """Verify that the stream processor validates files spanning multiple blocks."""
+    rows = [['8695970028{0:04d}'.format(i), '8696970028{0:04d}'.format(i)] for i in range(1000)]
+    file_path = write_file(tmpdir.join('blocks.tsv'), rows)
+    processor = StreamProcessor(file_path, {'device_count': 1000, 'imei_per_device': 2})
+    processor.BLOCK_SIZE = 100
+    assert processor.validate_registration() == {}
+
+    rows.append([rows[10][1], '86969700290001 '])
+    file_path = write_file(tmpdir.join('blocks.tsv'), rows)
+    processor = StreamProcessor(file_path, {'device_count': 1001, 'imei_per_device': 2})
+    processor.BLOCK_SIZE = 100
+    assert list(processor.validate_registration().keys()) == ['duplicate_imeis']
@@ -0,0 +1,68 @@
+"""
+List artifact unit tests
+
+Copyright (c) 2018-2020 Qualcomm Technologies, Inc.
+All rights reserved.
+Redistribution and use in source and binary forms, with or without modification, are permitted (subject to the limitations in the disclaimer below) provided that the following conditions are met:
+
+    Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+    Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+    Neither the name of Qualcomm Technologies, Inc. nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+    The origin of this software must not be misrepresented; you must not claim that you wrote the original software. If you use this software in a product, an acknowledgment is required by displaying the trademark/log as per the details provided here: https://www.qualcomm.com/documents/dirbs-logo-and-brand-guidelines
+    Altered source versions must be plainly marked as such, and must not be misrepresented as being the original software.
+    This notice may not be removed or altered from any source distribution.
+
+NO EXPRESS OR IMPLIED LICENSES TO ANY PARTY'S PATENT RIGHTS ARE GRANTED BY THIS LICENSE. THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+import csv
+import gzip
+import hashlib
+import io
+import json
+import os
+
+import pytest
+
+from scripts.common import ListArtifact
+
+
+def read_part(path):
+    """Return csv rows of a gzip compressed part."""
+    with gzip.open(path, 'rt', newline='') as part:
+        return list(csv.reader(part))
+
+
+def test_list_artifact_parts(tmpdir):
+    """Verify that records are split into bounded parts described by the manifest."""
+    csv_file = io.StringIO('1,35000000000001,add\n2,"Nokia\nN95",add\n3,35000000000003,remove\n')
+    with ListArtifact(str(tmpdir), 'list', ['id', 'imei', 'change_type'], max_rows=2) as artifact:
+        artifact.write_csv(csv_file)
+        artifact.writerows([[4, '35000000000004', 'update']])
+        path = artifact.commit()
+    assert not os.path.exists(path + '.tmp')
+    with open(os.path.join(path, ListArtifact.MANIFEST)) as manifest_file:
+        manifest = json.load(manifest_file)
+    assert manifest['rows'] == 4
+    assert manifest['columns'] == ['id', 'imei', 'change_type']
+    assert [part['rows'] for part in manifest['parts']] == [2, 2]
+    rows = []
+    for part in manifest['parts']:
+        part_path = os.path.join(path, part['file'])
+        with open(part_path, 'rb') as part_file:
+            data = part_file.read()
+        assert part['bytes'] == len(data)
+        assert part['sha256'] == hashlib.sha256(data).hexdigest()
+        part_rows = read_part(part_path)
+        assert part_rows[0] == ['id', 'imei', 'change_type']
+        rows.extend(part_rows[1:])
+    assert rows == [['1', '35000000000001', 'add'], ['2', 'Nokia\nN95', 'add'],
+                    ['3', '35000000000003', 'remove'], ['4', '35000000000004', 'update']]
+
+
+def test_list_artifact_abort(tmpdir):
+    """Verify that an incomplete artifact is removed on failure."""
+    with pytest.raises(ValueError):
+        with ListArtifact(str(tmpdir), 'list', ['imei']) as artifact:
+            artifact.writerows([['35000000000001']])
+            raise ValueError('export failed')
+    assert os.listdir(str(tmpdir)) == []
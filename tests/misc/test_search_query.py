@@ -0,0 +1,72 @@
+"""
+Search query unit tests
+
+Copyright (c) 2018-2020 Qualcomm Technologies, Inc.
+All rights reserved.
+Redistribution and use in source and binary forms, with or without modification, are permitted (subject to the limitations in the disclaimer below) provided that the following conditions are met:
+
+    Redistributions of source code must retain the above copyright notice, this list of conditions and the following disclaimer.
+    Redistributions in binary form must reproduce the above copyright notice, this list of conditions and the following disclaimer in the documentation and/or other materials provided with the distribution.
+    Neither the name of Qualcomm Technologies, Inc. nor the names of its contributors may be used to endorse or promote products derived from this software without specific prior written permission.
+    The origin of this software must not be misrepresented; you must not claim that you wrote the original software. If you use this software in a product, an acknowledgment is required by displaying the trademark/log as per the details provided here: https://www.qualcomm.com/documents/dirbs-logo-and-brand-guidelines
+    Altered source versions must be plainly marked as such, and must not be misrepresented as being the original software.
+    This notice may not be removed or altered from any source distribution.
+
+NO EXPRESS OR IMPLIED LICENSES TO ANY PARTY'S PATENT RIGHTS ARE GRANTED BY THIS LICENSE. THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+import datetime
+
+import pytest
+
+from app.api.v1.helpers.search_query import SearchQuery
+from app.api.v1.helpers.search_registration import SearchRegistraion
+
+
+def registration_query():
+    """Return search query over the registration search table."""
+    return SearchQuery('SELECT * FROM search_registration', SearchRegistraion.TEXT_COLUMNS,
+                       SearchRegistraion.IMEI_FILTER)
+
+
+def test_search_query_parameters():
+    """Verify that searched values are bound as parameters instead of being formatted into the query."""
+    query = registration_query().equals('user_id', '800').search({
+        'brand': "x' OR '1'='1",
+        'technologies': ['2G', '3G'],
+        'updated_at': '2020-01-01,2020-01-31',
+        'imeis': ['86834403380270']
+    })
+    assert "'1'='1" not in query.sql
+    assert query.sql.startswith('SELECT * FROM search_registration WHERE user_id = :search_0 AND ')
+    assert 'brand ILIKE :search_1' in query.sql
+    assert '(technologies ILIKE :search_2 OR technologies ILIKE :search_3)' in query.sql
+    assert 'updated_at BETWEEN :search_4 AND :search_5' in query.sql
+    assert 'imeidevice.imei = ANY(:search_6)' in query.sql
+    assert query.params == {
+        'search_0': '800',
+        'search_1': "%x' OR '1'='1%",
+        'search_2': '%2G%',
+        'search_3': '%3G%',
+        'search_4': '2020-01-01',
+        'search_5': datetime.datetime(2020, 1, 31, 23, 59, 59),
+        'search_6': ['86834403380270']
+    }
+
+
+def test_search_query_invalid_arguments():
+    """Verify that unknown columns and malformed dates are rejected."""
+    with pytest.raises(ValueError):
+        registration_query().search({'id; DROP TABLE regdetails': '1'})
+    with pytest.raises(ValueError):
+        registration_query().search({'created_at': '2020-01-01,string'})
+    with pytest.raises(ValueError):
+        registration_query().search({'brand': []})
+    assert registration_query().sql == 'SELECT * FROM search_registration'
+
+
+def test_search_query_numeric_values():
+    """Verify that numeric values of free text columns are matched as text instead of being iterated."""
+    query = registration_query().search({'imei_per_device': 2, 'technologies': [4, '5G']})
+    assert '(imei_per_device ILIKE :search_0)' in query.sql
+    assert '(technologies ILIKE :search_1 OR technologies ILIKE :search_2)' in query.sql
+    assert query.params == {'search_0': '%2%', 'search_1': '%4%', 'search_2': '%5G%'}
@@ -18,8 +18,9 @@ NO EXPRESS OR IMPLIED LICENSES TO ANY PARTY'S PATENT RIGHTS ARE GRANTED BY THIS
 import uuid
 import os
 from app.api.v1.helpers.utilities import Utilities
-from tests._helpers import create_registration
-from tests.apis.test_registration_request_apis import REQUEST_DATA as REG_REQ_DATA
+from app.api.v1.helpers.filecache import FileCache, DeviceImeis
+from app.api.v1.models.approvedimeis import ApprovedImeis
+from tests._helpers import create_dummy_request, create_dummy_devices
 
 
 IMEIS = ['12345678765432', '12345678986434',
@@ -64,42 +65,48 @@ def test_extract_imeis(app, session):  # pylint: disable=unused-argument
     assert '23434343565443' in response
 
 
-def test_generate_summary(app, session, dirbs_dvs):  # pylint: disable=unused-argument
-    """Verify that the generate function works correctly."""
-
-    tracking_id = uuid.uuid4()
-    request = create_registration(REG_REQ_DATA, tracking_id)
-    Utilities.create_directory(tracking_id)
-    assert request.tracking_id == tracking_id
-    response = Utilities.generate_summary(IMEIS, tracking_id)
-    # Async process
-    assert not response
-
-
-def test_pool_summary_request(app, session, dirbs_dvs):  # pylint: disable=unused-argument
-    """Verify that the poll_summary function works correctly."""
-
-    tracking_id = uuid.uuid4()
-    request = create_registration(REG_REQ_DATA, tracking_id)
-    Utilities.create_directory(tracking_id)
-    assert request.tracking_id == tracking_id
-    response = Utilities.pool_summary_request('mock-task-id', request, app)
-    assert request.tracking_id == str(tracking_id)
-    assert response is None
-
-
 def test_de_register_bulk_imeis(app, session):  # pylint: disable=unused-argument
     """Verify that the de_register_imeis function works correctly."""
 
     response = Utilities.de_register_imeis(IMEIS)
-    assert response is False
+    assert response == 0
 
 
 def test_de_register_single_imeis(app, session):  # pylint: disable=unused-argument
     """Verify that the de_register_imeis function works correctly."""
 
     response = Utilities.de_register_imeis(IMEIS[0])
-    assert response is False
+    assert response == 0
+
+
+def test_de_register_device_imeis(app, session):  # pylint: disable=unused-argument
+    """Verify that de_register_imeis removes all the imeis of the matched devices and returns their count."""
+    data = {
+        'device_count': 1,
+        'imei_per_device': 2,
+        'imeis': "[['35679304103310', '35679304103311']]",
+        'm_location': 'local',
+        'user_name': 'de register user',
+        'user_id': 'de-register-user'
+    }
+    request = create_dummy_request(data, 'Registration', 'Approved')
+    device_data = {
+        'brand': 'samsung',
+        'operating_system': 'android',
+        'model_name': 's9',
+        'model_num': '30jjd',
+        'device_type': 'Smartphone',
+        'technologies': '2G,3G,4G',
+        'reg_id': request.id
+    }
+    create_dummy_devices(device_data, 'Registration', request)
+
+    assert Utilities.de_register_imeis(['35679304103310']) == 2
+    for imei in ['35679304103310', '35679304103311']:
+        approved_imei = ApprovedImeis.get_imei(imei)
+        assert approved_imei.status == 'removed'
+        assert approved_imei.delta_status == 'remove'
+    assert Utilities.de_register_imeis(['35679304103310', '35679304103311']) == 0
 
 
 def test_bulk_get_devices_description(app, session, dirbs_core):  # pylint: disable=unused-argument
@@ -153,3 +160,28 @@ def test_convert_to_mbs(app):  # pylint: disable=unused-argument
     response = Utilities.convert_to_mb(filesize)
     assert response
     assert response == 1
+
+
+def test_process_reg_file_cache(app):  # pylint: disable=unused-argument
+    """Verify that the validated registration file is cached and re-used."""
+    tracking_id = uuid.uuid4()
+    Utilities.create_directory(tracking_id)
+    file_path = os.path.join(app.config['DRS_UPLOADS'], '{0}'.format(tracking_id), 'imeis.tsv')
+    with open(file_path, 'w') as f:
+        f.write('012345678901234\t01234567890124\n123456789012345\t1234567890123456\n')
+
+    args = {'device_count': 2, 'imei_per_device': 2}
+    response = Utilities.process_reg_file('imeis.tsv', tracking_id, args)
+    assert response == [['012345678901234', '01234567890124'], ['123456789012345', '1234567890123456']]
+    assert os.path.isfile(FileCache.artifact_path(os.path.dirname(file_path), FileCache.file_hash(file_path)))
+    assert Utilities.load_reg_file(file_path, args) is not None
+    assert Utilities.load_reg_file(file_path, {'device_count': 3, 'imei_per_device': 2}) is None
+    cached = Utilities.process_reg_file('imeis.tsv', tracking_id, args)
+    assert isinstance(cached, DeviceImeis)
+    assert len(cached) == 2
+    assert cached[1] == response[1]
+    assert list(cached[-1:]) == response[-1:]
+    assert list(cached) == response
+    assert len(FileCache.digests) > 0
+    assert FileCache.cached_file_hash(file_path) == FileCache.file_hash(file_path)
+    Utilities.remove_directory(tracking_id)